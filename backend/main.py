@@ -11,8 +11,14 @@ from routes import (
     face_registration_routes,
     teacher_override_routes,
     teacher_routes,
-    admin_routes
+    admin_routes,
+    events_routes,
+    timetable_routes
 )
+from services import inference_pool, lbph_service
+from utils.config import QUERY_COUNT_HEADER, QUERY_BUDGET_MODE, AUTO_MIGRATE
+from services.face_batcher import batcher
+from services.attendance_writer import writer as attendance_writer
 
 app = FastAPI(title="Smart Attendance System")
 
@@ -26,6 +32,42 @@ app.add_middleware(
     expose_headers=["*"],        # ⭐ REQUIRED FOR FRONTEND
 )
 
+# Per-request SQL statement count + latency headers (for load tests)
+if QUERY_COUNT_HEADER or QUERY_BUDGET_MODE != "off":
+    from utils.db import engine
+    from utils import query_counter
+    query_counter.install(engine)
+    if QUERY_COUNT_HEADER:
+        app.add_middleware(query_counter.QueryCountMiddleware)
+
+# Schema: apply pending migrations before serving (AUTO_MIGRATE=0 to skip)
+@app.on_event("startup")
+def apply_migrations():
+    if AUTO_MIGRATE:
+        import migrations
+        from utils.db import engine
+        migrations.upgrade(engine)
+
+# Face inference workers: load + warm up VGG-Face once, before serving
+@app.on_event("startup")
+def start_face_inference():
+    inference_pool.start_pool()
+
+@app.on_event("shutdown")
+async def stop_face_inference():
+    await batcher.stop()
+    inference_pool.shutdown_pool()
+
+# LBPH model: write registrations still waiting for the batched save
+@app.on_event("shutdown")
+def flush_lbph_model():
+    lbph_service.flush()
+
+# Write-behind attendance: commit whatever is still queued before exiting
+@app.on_event("shutdown")
+def drain_attendance_writer():
+    attendance_writer.stop()
+
 # Routers
 app.include_router(auth_routes.router, prefix="/auth", tags=["Auth"])
 app.include_router(attendance_routes.router, prefix="/attendance", tags=["Attendance"])
@@ -36,6 +78,8 @@ app.include_router(face_registration_routes.router, prefix="/face-registration",
 app.include_router(teacher_override_routes.router, prefix="/teacher", tags=["Teacher Override"])
 app.include_router(teacher_routes.router, prefix="/teacher", tags=["Teacher"])
 app.include_router(admin_routes.router, prefix="/admin", tags=["Admin"])
+app.include_router(events_routes.router, prefix="/events", tags=["Events"])
+app.include_router(timetable_routes.router, prefix="/timetable", tags=["Timetable"])
 
 @app.get("/")
 def home():
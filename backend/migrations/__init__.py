@@ -0,0 +1,143 @@
+# migrations/__init__.py
+#
+# Minimal versioned schema migrations.
+# Every module mNNNN_<name>.py in this package is one migration: its
+# docstring describes it and `upgrade(conn)` applies it inside a
+# transaction. Applied versions are recorded in `schema_migrations`, so each
+# migration runs once per database, in version order.
+#
+# Migrations must be safe on databases that already have the change (older
+# installs were created by create_all, and MySQL commits DDL implicitly, so
+# a failed migration may be half applied): use the helpers below.
+#
+#   python scripts/migrate.py            # apply everything pending
+#   python scripts/migrate.py status
+
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+_MODULE_RE = re.compile(r"^m(\d{4})_(\w+)$")
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    description: str
+    module: object
+
+
+def discover() -> List[Migration]:
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_RE.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{info.name}")
+        description = (module.__doc__ or "").strip().splitlines()[0] if module.__doc__ else ""
+        found.append(Migration(int(match.group(1)), match.group(2), description, module))
+    found.sort(key=lambda m: m.version)
+    versions = [m.version for m in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"duplicate migration versions: {versions}")
+    return found
+
+
+def applied_versions(engine: Engine) -> dict:
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row.version: row.applied_at for row in conn.execute(select(schema_migrations))}
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations up to `target` (default: latest). Returns what ran."""
+    done = applied_versions(engine)
+    pending = [m for m in discover() if m.version not in done and (target is None or m.version <= target)]
+
+    ran = []
+    with _migration_lock(engine):
+        for migration in pending:
+            with engine.begin() as conn:
+                # another process may have applied it while we waited for the lock
+                if conn.execute(select(schema_migrations.c.version).where(
+                        schema_migrations.c.version == migration.version)).first():
+                    continue
+                print(f"⬆️  Migration {migration.version:04d} {migration.name}: {migration.description}")
+                migration.module.upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                ))
+            ran.append(migration)
+    return ran
+
+
+class _migration_lock:
+    """Named lock on MySQL so concurrent workers don't migrate twice."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.conn = None
+
+    def __enter__(self):
+        if self.engine.dialect.name in ("mysql", "mariadb"):
+            self.conn = self.engine.connect()
+            got = self.conn.execute(text("SELECT GET_LOCK('schema_migrations', 120)")).scalar()
+            if got != 1:
+                self.conn.close()
+                self.conn = None
+                raise RuntimeError("could not take the schema_migrations lock within 120s "
+                                   "(another process is migrating?); not migrating without it")
+        return self
+
+    def __exit__(self, *exc):
+        if self.conn is not None:
+            self.conn.execute(text("SELECT RELEASE_LOCK('schema_migrations')"))
+            self.conn.close()
+
+
+# ---------------------------
+# Helpers for migration modules
+# ---------------------------
+def has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def index_names(conn: Connection, table: str) -> set:
+    return {ix["name"] for ix in inspect(conn).get_indexes(table)}
+
+
+def column_names(conn: Connection, table: str) -> set:
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def ensure_column(conn: Connection, table: str, column: Column) -> bool:
+    """ALTER TABLE ADD COLUMN unless it exists (nullable, no default). Returns True if added."""
+    if column.name in column_names(conn, table):
+        return False
+    ddl_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column.name} {ddl_type}"))
+    print(f"   + column {table}.{column.name} {ddl_type}")
+    return True
+
+
+def ensure_index(conn: Connection, table: str, name: str, columns: Sequence[str], unique: bool = False) -> bool:
+    """CREATE [UNIQUE] INDEX unless an index with that name exists. Returns True if created."""
+    if name in index_names(conn, table):
+        return False
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(text(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"))
+    print(f"   + {kind.lower()} {name} ON {table} ({', '.join(columns)})")
+    return True
@@ -0,0 +1,100 @@
+"""Baseline schema: the tables as they were before versioned migrations"""
+
+# Frozen copy of the models at the time migrations were introduced (not
+# imported from models/), so a fresh database goes through exactly the same
+# steps as an upgraded one. Later tables, columns and indexes belong to
+# their own migrations; never edit this file to follow the models.
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Integer, JSON, LargeBinary,
+    MetaData, String, Table, UniqueConstraint, func,
+)
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("usn", String(20), unique=True, index=True),
+    Column("name", String(255), nullable=False),
+    Column("email", String(255), unique=True, index=True),
+    Column("password_hash", String(255), nullable=False),
+    Column("is_teacher", Boolean),
+    Column("is_admin", Boolean),
+    Column("photo_path", String(255), nullable=True),
+)
+
+Table(
+    "students", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), unique=True),
+    Column("usn", String(20), unique=True, index=True),
+    Column("name", String(255), nullable=False),
+    Column("email", String(255), nullable=False),
+    Column("department", String(100), nullable=True),
+    Column("year", Integer, nullable=True),
+    Column("section", String(10), nullable=True),
+)
+
+Table(
+    "teachers", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), unique=True),
+    Column("teacher_id", String(20), unique=True, index=True),
+    Column("phone_number", String(20), nullable=True),
+    Column("qualification", String(255), nullable=True),
+    Column("subjects_taken", JSON, nullable=True),
+    Column("timetable", JSON, nullable=True),
+)
+
+Table(
+    "classrooms", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("room_number", String(50), unique=True, index=True),
+    Column("lat", Float, nullable=False),
+    Column("lon", Float, nullable=False),
+    Column("image_paths", String(255), nullable=True),
+)
+
+Table(
+    "attendance", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("usn", String(20), nullable=False),
+    Column("student_name", String(255), nullable=True),
+    Column("session_id", String(100), nullable=False),
+    Column("classroom_id", Integer, nullable=True),
+    Column("subject", String(255), nullable=True),
+    Column("qr", Boolean),
+    Column("location", Boolean),
+    Column("face", Boolean),
+    Column("by_teacher", Boolean),
+    Column("timestamp", DateTime),
+)
+
+Table(
+    "active_sessions", metadata,
+    Column("session_id", String(36), primary_key=True, index=True),
+    Column("subject", String(255), nullable=False),
+    Column("teacher_id", String(255), nullable=False),
+    Column("section", String(20), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+    Column("active", Boolean, nullable=False),
+)
+
+Table(
+    "face_embeddings", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("usn", String(20), nullable=False, index=True),
+    Column("model_name", String(50), nullable=False),
+    Column("model_version", String(50), nullable=True),
+    Column("dim", Integer, nullable=False),
+    Column("vector", LargeBinary, nullable=False),
+    Column("created_at", DateTime),
+    UniqueConstraint("usn", "model_name", name="uq_face_embedding_usn_model"),
+)
+
+
+def upgrade(conn):
+    # older installs already have (some of) these from create_all
+    metadata.create_all(bind=conn, checkfirst=True)
@@ -0,0 +1,35 @@
+"""Merge duplicate attendance rows and add the (session_id, usn) unique key"""
+
+from sqlalchemy import func, select
+
+from migrations import ensure_index
+from models.attendance_model import Attendance
+from services.attendance_store import MERGED_FLAGS
+
+table = Attendance.__table__
+
+
+def upgrade(conn):
+    groups = conn.execute(
+        select(table.c.session_id, table.c.usn)
+        .group_by(table.c.session_id, table.c.usn)
+        .having(func.count() > 1)
+    ).all()
+
+    # keep the oldest row of every group, with the flags of all of them
+    removed = 0
+    for session_id, usn in groups:
+        # only columns that existed at this version (later ones may not yet)
+        rows = conn.execute(
+            select(table.c.id, *(table.c[flag] for flag in MERGED_FLAGS)).where(table.c.session_id == session_id, table.c.usn == usn)
+            .order_by(table.c.id)
+        ).all()
+        keep, rest = rows[0], rows[1:]
+        merged = {flag: any(getattr(r, flag) for r in rows) for flag in MERGED_FLAGS}
+        conn.execute(table.update().where(table.c.id == keep.id).values(**merged))
+        conn.execute(table.delete().where(table.c.id.in_([r.id for r in rest])))
+        removed += len(rest)
+    if removed:
+        print(f"   merged {len(groups)} duplicated marks ({removed} rows removed)")
+
+    ensure_index(conn, "attendance", "uq_attendance_session_usn", ["session_id", "usn"], unique=True)
@@ -0,0 +1,20 @@
+"""Indexes for the hot attendance queries (live view, history, reports)"""
+
+from migrations import ensure_index
+
+# name -> columns; the same indexes are declared on models.Attendance
+INDEXES = {
+    # live session view: WHERE session_id = ? [AND id > ?] ORDER BY id, COUNT(*)
+    "ix_attendance_session": ["session_id", "id"],
+    # student history: WHERE usn = ? ORDER BY timestamp
+    "ix_attendance_usn_ts": ["usn", "timestamp"],
+    # admin report by subject and date range
+    "ix_attendance_subject_ts": ["subject", "timestamp"],
+    # admin report by date range only
+    "ix_attendance_ts": ["timestamp", "id"],
+}
+
+
+def upgrade(conn):
+    for name, columns in INDEXES.items():
+        ensure_index(conn, "attendance", name, columns)
@@ -0,0 +1,12 @@
+"""Attendance rollup tables (per student/subject/day, per session/section), backfilled"""
+
+from models.attendance_rollup_model import AttendanceDaily, SessionAttendance
+from services import attendance_rollup
+
+
+def upgrade(conn):
+    for model in (AttendanceDaily, SessionAttendance):
+        model.__table__.create(conn, checkfirst=True)
+
+    daily_rows, session_rows = attendance_rollup.rebuild(conn)
+    print(f"   backfilled {daily_rows} daily and {session_rows} session rollup rows")
@@ -0,0 +1,18 @@
+"""attendance.updated_at (bumped by flag merges) for the live view cursor"""
+
+from sqlalchemy import Column, DateTime
+
+from migrations import ensure_column, ensure_index
+from models.attendance_model import Attendance
+
+table = Attendance.__table__
+
+
+def upgrade(conn):
+    ensure_column(conn, "attendance", Column("updated_at", DateTime))
+    backfilled = conn.execute(
+        table.update().where(table.c.updated_at.is_(None)).values(updated_at=table.c.timestamp)
+    ).rowcount
+    if backfilled:
+        print(f"   backfilled updated_at on {backfilled} rows")
+    ensure_index(conn, "attendance", "ix_attendance_session_updated", ["session_id", "updated_at"])
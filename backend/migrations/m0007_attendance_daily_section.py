@@ -0,0 +1,14 @@
+"""attendance_daily keyed by section too, so student history reads the rollup"""
+
+from models.attendance_rollup_model import AttendanceDaily
+from services import attendance_rollup
+
+daily = AttendanceDaily.__table__
+
+
+def upgrade(conn):
+    # a rollup: cheaper to recreate with the new key than to alter its primary key
+    daily.drop(conn, checkfirst=True)
+    daily.create(conn)
+    rows = attendance_rollup.rebuild_daily(conn)
+    print(f"   rebuilt {rows} daily rollup rows")
@@ -0,0 +1,175 @@
+# ml_model/classroom_recognizer.py
+#
+# 1:N classroom recognition.
+# One photo of the class -> every face detected and embedded in one batch
+# (in the inference pool) -> matched against the embedding matrix of the
+# session's section with a single similarity matrix product -> one-to-one
+# assignment -> set-based upsert of Attendance rows with face=True
+# (services/attendance_store, so the rollups count them too).
+
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.face_embedding_model import FaceEmbedding
+from models.student_model import Student
+from services.face_model import MODEL_NAME, MODEL_VERSION, DISTANCE_THRESHOLD, normalise_rows
+from services.attendance_store import ConcurrentMarkError, upsert_many
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:   # scipy is optional, greedy matching is used without it
+    linear_sum_assignment = None
+
+
+# ---------------------------
+# Gallery
+# ---------------------------
+def load_section_gallery(db: Session, section: str):
+    """
+    Embedding matrix of every student in a section with a current stored
+    vector. Returns (usns, names, L2-normalised (M, D) matrix, usns_without_embedding).
+    """
+    rows = (
+        db.query(Student.usn, Student.name, FaceEmbedding.vector, FaceEmbedding.dim)
+        .outerjoin(
+            FaceEmbedding,
+            (FaceEmbedding.usn == Student.usn)
+            & (FaceEmbedding.model_name == MODEL_NAME)
+            & (FaceEmbedding.model_version == MODEL_VERSION)
+        )
+        .filter(Student.section == section)
+        .all()
+    )
+
+    usns, names, vectors, missing = [], [], [], []
+    for usn, name, vector, dim in rows:
+        if vector is None:
+            missing.append(usn)
+            continue
+        usns.append(usn)
+        names.append(name)
+        vectors.append(np.frombuffer(vector, dtype=np.float32, count=dim))
+
+    matrix = normalise_rows(np.vstack(vectors)) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return usns, names, matrix, missing
+
+
+# ---------------------------
+# Matching
+# ---------------------------
+def match_faces(probes: np.ndarray, gallery: np.ndarray, threshold: float = DISTANCE_THRESHOLD):
+    """
+    One-to-one assignment of detected faces (N, D) to gallery students (M, D).
+    Uses the Hungarian algorithm when scipy is installed, greedy best-first
+    otherwise. Returns [(probe_idx, gallery_idx, similarity)] for pairs whose
+    cosine distance is within threshold.
+    """
+    if probes.size == 0 or gallery.size == 0:
+        return []
+
+    similarity = normalise_rows(probes) @ gallery.T          # (N, M) cosine similarity
+    min_similarity = 1.0 - threshold
+
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(-similarity)
+        pairs = zip(rows.tolist(), cols.tolist())
+    else:
+        pairs = _greedy_pairs(similarity, min_similarity)
+
+    return [
+        (i, j, float(similarity[i, j]))
+        for i, j in pairs
+        if similarity[i, j] >= min_similarity
+    ]
+
+
+def _greedy_pairs(similarity: np.ndarray, min_similarity: float):
+    n_cols = similarity.shape[1]
+    order = np.argsort(similarity, axis=None)[::-1]
+
+    used_rows, used_cols = set(), set()
+    for flat in order:
+        i, j = divmod(int(flat), n_cols)
+        if similarity[i, j] < min_similarity:
+            break
+        if i in used_rows or j in used_cols:
+            continue
+        used_rows.add(i)
+        used_cols.add(j)
+        yield i, j
+
+
+# ---------------------------
+# Attendance
+# ---------------------------
+def mark_present(db: Session, session, students) -> tuple:
+    """
+    Upsert face-verified Attendance rows for [(usn, name)] of the session's
+    section in one set-based write; students already marked (QR, teacher)
+    get face=True merged into their row.
+    Returns (marked_usns, already_marked_usns).
+    """
+    if not students:
+        return [], []
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "usn": usn,
+            "student_name": name,
+            "session_id": session.session_id,
+            "classroom_id": None,
+            "subject": session.subject,
+            "qr": False,
+            "location": False,
+            "face": True,
+            "by_teacher": False,
+            "timestamp": now,
+            "section": session.section,
+        }
+        for usn, name in students
+    ]
+
+    try:
+        results = upsert_many(db, rows)
+    except ConcurrentMarkError:
+        # a QR mark landed mid-batch (MySQL): the retry merges into it
+        db.rollback()
+        results = upsert_many(db, rows)
+    db.commit()
+
+    marked = [r["usn"] for r, (_, inserted) in zip(rows, results) if inserted]
+    already = sorted(r["usn"] for r, (_, inserted) in zip(rows, results) if not inserted)
+    return marked, already
+
+
+def recognise_classroom(db: Session, session, boxes, embeddings: np.ndarray) -> dict:
+    """Match faces from one classroom photo to the session's section and mark them"""
+    usns, names, gallery, missing = load_section_gallery(db, session.section)
+    matches = match_faces(embeddings, gallery)
+
+    recognised = [
+        {
+            "usn": usns[j],
+            "student_name": names[j],
+            "similarity": sim,
+            "box": boxes[i],
+        }
+        for i, j, sim in sorted(matches, key=lambda m: -m[2])
+    ]
+
+    marked, already = mark_present(db, session, [(r["usn"], r["student_name"]) for r in recognised])
+
+    return {
+        "session_id": session.session_id,
+        "section": session.section,
+        "faces_detected": len(boxes),
+        "gallery_size": len(usns),
+        "students_without_embedding": missing,
+        "recognised": recognised,
+        "unmatched_faces": [boxes[i] for i in sorted(set(range(len(boxes))) - {m[0] for m in matches})],
+        "marked": marked,
+        "already_marked": already,
+    }
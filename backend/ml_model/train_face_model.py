@@ -1,6 +1,12 @@
 # CLI script to train face model (run manually)
-from services.facial_service import train_model
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.lbph_service import train_model, MODEL_PATH
 
 if __name__ == "__main__":
-    ok = train_model()
-    print("Training finished:", ok)
\ No newline at end of file
+    stats = train_model()
+    print("Training finished:", stats["ok"])
+    print(f"{stats['faces']} faces in {stats['seconds']:.2f}s → {MODEL_PATH}")
+    if stats["skipped"]:
+        print(f"No face found for: {', '.join(stats['skipped'])}")
@@ -0,0 +1,297 @@
+# ml_model/video_attendance.py
+#
+# Attendance from a classroom video (or a folder of frames).
+# Frames are sampled, faces are found with the cheap Haar cascade and
+# followed across frames with an IoU tracker. Only a few of the largest
+# crops of each track are embedded (all in one batch), instead of running
+# VGG-Face on every face in every frame. Tracks are then matched against
+# the section gallery.
+#
+#   python ml_model/video_attendance.py lecture.mp4 --session-id <id>
+#   python ml_model/video_attendance.py frames_dir/ --section CSE-3A --every 5
+#   ... --commit   # write Attendance rows for the present students
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# ---------------------------
+# Frame sources
+# ---------------------------
+def iter_frames(source: str, every: int = 5):
+    """Yield (frame_index, BGR frame) for every `every`-th frame of a video file or image folder"""
+    if os.path.isdir(source):
+        files = sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTENSIONS))
+        for idx, name in enumerate(files):
+            if idx % every == 0:
+                frame = cv2.imread(os.path.join(source, name))
+                if frame is not None:
+                    yield idx, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {source}")
+
+    idx = 0
+    try:
+        while True:
+            # grab() skips decoding the frames we don't sample
+            if not cap.grab():
+                break
+            if idx % every == 0:
+                ok, frame = cap.retrieve()
+                if ok:
+                    yield idx, frame
+            idx += 1
+    finally:
+        cap.release()
+
+
+# ---------------------------
+# Detection + tracking
+# ---------------------------
+def detect_faces(frame: np.ndarray, detect_width: int = 640, min_size: int = 24):
+    """Haar detection on a downscaled grey frame; boxes in full-frame coords"""
+    from services.face_model import get_face_cascade
+
+    scale = min(1.0, detect_width / frame.shape[1])
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    faces = get_face_cascade().detectMultiScale(
+        gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_size, min_size)
+    )
+    return [tuple(int(v / scale) for v in box) for box in faces]
+
+
+def iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+class Track:
+
+    def __init__(self, track_id: int, box, step: int):
+        self.id = track_id
+        self.box = box
+        self.first_step = step
+        self.last_step = step
+        self.hits = 0
+        self.crops = []     # [(area, crop)] — the largest few are kept
+
+    def add(self, box, step: int, frame: np.ndarray, max_crops: int):
+        self.box = box
+        self.last_step = step
+        self.hits += 1
+
+        x, y, w, h = box
+        # a bit of margin so the aligner sees the whole face
+        mx, my = w // 5, h // 5
+        crop = frame[max(0, y - my):y + h + my, max(0, x - mx):x + w + mx]
+
+        self.crops.append((w * h, crop.copy()))
+        self.crops.sort(key=lambda c: -c[0])
+        del self.crops[max_crops:]
+
+
+class IouTracker:
+    """Greedy IoU association; tracks die after `max_missed` sampled frames unseen"""
+
+    def __init__(self, iou_threshold: float = 0.3, max_missed: int = 3, max_crops: int = 3):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.max_crops = max_crops
+        self.active = []
+        self.finished = []
+        self._next_id = 1
+        self._step = 0
+
+    def update(self, frame: np.ndarray, boxes):
+        self._step += 1
+        step = self._step
+
+        pairs = sorted(
+            ((iou(t.box, b), ti, bi) for ti, t in enumerate(self.active) for bi, b in enumerate(boxes)),
+            reverse=True
+        )
+        used_tracks, used_boxes = set(), set()
+        for score, ti, bi in pairs:
+            if score < self.iou_threshold:
+                break
+            if ti in used_tracks or bi in used_boxes:
+                continue
+            used_tracks.add(ti)
+            used_boxes.add(bi)
+            self.active[ti].add(boxes[bi], step, frame, self.max_crops)
+
+        # retire tracks that were not seen for a while
+        alive = []
+        for t in self.active:
+            if step - t.last_step > self.max_missed:
+                self.finished.append(t)
+            else:
+                alive.append(t)
+
+        for bi, box in enumerate(boxes):
+            if bi not in used_boxes:
+                track = Track(self._next_id, box, step)
+                track.add(box, step, frame, self.max_crops)
+                self._next_id += 1
+                alive.append(track)
+
+        self.active = alive
+
+    def all_tracks(self, min_hits: int = 1):
+        return [t for t in self.finished + self.active if t.hits >= min_hits]
+
+
+# ---------------------------
+# Recognition
+# ---------------------------
+def embed_tracks(tracks):
+    """Embed every kept crop of every track in ONE batch; mean vector per track"""
+    from services.face_model import embed_batch, normalise_rows
+
+    crops, owners = [], []
+    for ti, t in enumerate(tracks):
+        for _, crop in t.crops:
+            crops.append(crop)
+            owners.append(ti)
+
+    if not crops:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    vectors = normalise_rows(embed_batch(crops))
+    owners = np.asarray(owners)
+    return np.vstack([vectors[owners == ti].mean(axis=0) for ti in range(len(tracks))])
+
+
+def match_tracks(track_vectors: np.ndarray, usns, names, gallery: np.ndarray, threshold: float = None):
+    """
+    Best gallery student for every track (several tracks may be the same
+    person if they were lost and re-found). Returns present students with
+    their best similarity and how many tracks matched them.
+    """
+    from services.face_model import DISTANCE_THRESHOLD, normalise_rows
+
+    if track_vectors.size == 0 or gallery.size == 0:
+        return []
+    if threshold is None:
+        threshold = DISTANCE_THRESHOLD
+
+    similarity = normalise_rows(track_vectors) @ gallery.T
+    best = similarity.argmax(axis=1)
+    best_sim = similarity[np.arange(len(best)), best]
+
+    present = {}
+    for j, sim in zip(best.tolist(), best_sim.tolist()):
+        if sim < 1.0 - threshold:
+            continue
+        entry = present.setdefault(usns[j], {"usn": usns[j], "student_name": names[j], "confidence": 0.0, "tracks": 0})
+        entry["confidence"] = max(entry["confidence"], sim)
+        entry["tracks"] += 1
+
+    return sorted(present.values(), key=lambda e: -e["confidence"])
+
+
+def process_video(source: str, every: int = 5, min_hits: int = 2, detect_width: int = 640):
+    """Run detection + tracking over a source. Returns (tracks, stats)"""
+    tracker = IouTracker()
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    frames = 0
+    for _, frame in iter_frames(source, every):
+        tracker.update(frame, detect_faces(frame, detect_width))
+        frames += 1
+    tracks = tracker.all_tracks(min_hits)
+    track_time = time.perf_counter() - wall_start
+
+    vectors = embed_tracks(tracks)
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    stats = {
+        "frames_processed": frames,
+        "tracks": len(tracks),
+        "faces_embedded": sum(len(t.crops) for t in tracks),
+        "tracking_seconds": round(track_time, 3),
+        "total_seconds": round(wall, 3),
+        "fps_wall": round(frames / wall, 2) if wall else 0,
+        # frames per CPU-second = frames per second per fully used core
+        "fps_per_core": round(frames / cpu, 2) if cpu else 0,
+    }
+    return tracks, vectors, stats
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Attendance from classroom video / frames")
+    parser.add_argument("source", help="video file or folder of frames")
+    parser.add_argument("--session-id", help="ActiveSession to match against (and commit to)")
+    parser.add_argument("--section", help="section gallery to match against (dry run only)")
+    parser.add_argument("--every", type=int, default=5, help="process every Nth frame")
+    parser.add_argument("--min-hits", type=int, default=2, help="ignore tracks seen in fewer sampled frames")
+    parser.add_argument("--detect-width", type=int, default=640, help="downscale width for detection")
+    parser.add_argument("--commit", action="store_true", help="insert Attendance rows (needs --session-id)")
+    args = parser.parse_args()
+
+    if not args.session_id and not args.section:
+        parser.error("give --session-id or --section")
+    if args.commit and not args.session_id:
+        parser.error("--commit needs --session-id")
+
+    from utils.db import SessionLocal
+    from models.active_session import ActiveSession
+    from ml_model.classroom_recognizer import load_section_gallery, mark_present
+
+    db = SessionLocal()
+    try:
+        session = None
+        section = args.section
+        if args.session_id:
+            session = db.query(ActiveSession).filter(ActiveSession.session_id == args.session_id).first()
+            if not session:
+                sys.exit(f"Session {args.session_id} not found")
+            section = session.section
+
+        tracks, vectors, stats = process_video(args.source, args.every, args.min_hits, args.detect_width)
+
+        usns, names, gallery, missing = load_section_gallery(db, section)
+        present = match_tracks(vectors, usns, names, gallery)
+
+        for p in present:
+            print(f"✅ {p['usn']:<15} {p['student_name']:<30} conf={p['confidence']:.3f} tracks={p['tracks']}")
+        print(f"{len(present)} present / {len(usns)} in gallery ({len(missing)} students without embedding)")
+        print(
+            f"{stats['frames_processed']} frames, {stats['tracks']} tracks, "
+            f"{stats['faces_embedded']} crops embedded in {stats['total_seconds']}s — "
+            f"{stats['fps_wall']} fps wall, {stats['fps_per_core']} fps per core"
+        )
+
+        if args.commit:
+            marked, already = mark_present(db, session, [(p["usn"], p["student_name"]) for p in present])
+            print(f"Committed: {len(marked)} marked, {len(already)} already marked")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,9 @@
 from .user_model import User
 from .student_model import Student
 from .teacher_model import Teacher
+from .classroom_model import Classroom
 from .attendance_model import Attendance
 from .active_session import ActiveSession
+from .face_embedding_model import FaceEmbedding
+from .attendance_rollup_model import AttendanceDaily, SessionAttendance
+from .timetable_slot_model import TimetableSlot
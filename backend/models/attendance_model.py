@@ -1,9 +1,20 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
 from utils.db import Base
 from datetime import datetime
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # one row per student per session; repeat marks merge into it
+        Index("uq_attendance_session_usn", "session_id", "usn", unique=True),
+        # hot queries (added to existing databases by migration 0003)
+        Index("ix_attendance_session", "session_id", "id"),
+        Index("ix_attendance_usn_ts", "usn", "timestamp"),
+        Index("ix_attendance_subject_ts", "subject", "timestamp"),
+        Index("ix_attendance_ts", "timestamp", "id"),
+        # live view cursor: WHERE session_id = ? AND updated_at >= ? (migration 0006)
+        Index("ix_attendance_session_updated", "session_id", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -21,3 +32,6 @@ class Attendance(Base):
     by_teacher = Column(Boolean, default=False)
 
     timestamp = Column(DateTime, default=datetime.utcnow)
+
+    # first insert, then every flag merge (services/attendance_store.py)
+    updated_at = Column(DateTime, default=datetime.utcnow)
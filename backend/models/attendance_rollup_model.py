@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Date, Index
+from utils.db import Base
+
+# Rollups of the attendance table, kept up to date in the same transaction
+# as every new mark (services/attendance_rollup.py). Rebuild / verify with
+# scripts/rebuild_rollups.py.
+
+
+class AttendanceDaily(Base):
+    """Marks per student, section, subject and day (student history reads it)."""
+    __tablename__ = "attendance_daily"
+
+    usn = Column(String(20), primary_key=True)
+    section = Column(String(20), primary_key=True)    # as in attendance_session_stats
+    subject = Column(String(255), primary_key=True)   # "" when the mark had none
+    day = Column(Date, primary_key=True)              # UTC day of the mark
+
+    attended = Column(Integer, nullable=False, default=0)
+
+
+class SessionAttendance(Base):
+    """Students present per session and section (held sessions = rows)."""
+    __tablename__ = "attendance_session_stats"
+    __table_args__ = (
+        # sessions held by a section: WHERE section = ? [AND subject = ?] AND day ...
+        Index("ix_session_stats_section", "section", "subject", "day"),
+        # report summary: WHERE subject = ? AND day BETWEEN ...
+        Index("ix_session_stats_subject_day", "subject", "day"),
+        Index("ix_session_stats_day", "day"),
+    )
+
+    session_id = Column(String(100), primary_key=True)
+    section = Column(String(20), primary_key=True)
+
+    subject = Column(String(255), nullable=False)
+    day = Column(Date, nullable=False)
+
+    present = Column(Integer, nullable=False, default=0)
+    roster_size = Column(Integer, nullable=True)      # section size when the session opened
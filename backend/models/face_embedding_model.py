@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, UniqueConstraint
+from utils.db import Base
+from datetime import datetime
+
+class FaceEmbedding(Base):
+    __tablename__ = "face_embeddings"
+    __table_args__ = (
+        # One vector per user per model, so models never get mixed
+        UniqueConstraint("usn", "model_name", name="uq_face_embedding_usn_model"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    usn = Column(String(20), nullable=False, index=True)
+
+    model_name = Column(String(50), nullable=False)      # e.g. "VGG-Face"
+    model_version = Column(String(50), nullable=True)    # deepface version + pipeline tag that produced it
+
+    # float32 vector stored as raw bytes (numpy .tobytes())
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
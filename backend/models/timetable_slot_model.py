@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, SmallInteger, String, Index
+from utils.db import Base
+
+
+class TimetableSlot(Base):
+    """One weekly class: who teaches what to which section, and when."""
+    __tablename__ = "timetable_slots"
+    __table_args__ = (
+        # section timetable / "what's on now" for a section
+        Index("ix_timetable_section_day_start", "section", "day", "start_min"),
+        # a teacher's slots on a day
+        Index("ix_timetable_teacher_day", "teacher_id", "day", "start_min"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    teacher_id = Column(String(20), nullable=False)   # Teacher.teacher_id (Faculty ID)
+    section = Column(String(20), nullable=False)
+    subject = Column(String(255), nullable=False)
+
+    day = Column(SmallInteger, nullable=False)         # 0 = Monday ... 6 = Sunday
+    start_min = Column(SmallInteger, nullable=False)   # minutes after midnight, e.g. 9:00 -> 540
+    end_min = Column(SmallInteger, nullable=False)
@@ -10,3 +10,5 @@ from . import face_registration_routes
 from . import teacher_override_routes
 from . import teacher_routes
 from . import admin_routes
+from . import events_routes
+from . import timetable_routes
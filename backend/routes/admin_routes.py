@@ -1,6 +1,8 @@
 # routes/admin_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
@@ -8,13 +10,21 @@ from datetime import datetime, date
 
 from utils.db import get_db
 from utils.jwt_token import create_access_token, verify_token
+from utils.config import REPORT_PAGE_SIZE, REPORT_MAX_PAGE_SIZE, ONBOARD_CHUNK_ROWS, ONBOARD_MAX_ERRORS
+from utils.listing import fetch_page, labelled, select_fields
+from utils.query_counter import query_budget
 from models.user_model import User
 from models.student_model import Student
 from models.teacher_model import Teacher
 from models.classroom_model import Classroom
 from models.attendance_model import Attendance
-
-import os, base64
+from services.face_model import InvalidImageError, decode_base64_payload
+from services.facial_service import register_face_image
+from services import attendance_rollup, onboarding, roster_cache, timetable
+from services.onboarding import NewStudentSchema, NewTeacherSchema
+from services.principal_cache import Principal, principals
+from services.timetable import timetable_cache
+from services.attendance_export import InvalidCursor, export_stream, report_filters, report_page
 
 router = APIRouter()
 
@@ -25,24 +35,6 @@ class AdminLoginSchema(BaseModel):
     email: str
     password: str
 
-class NewStudentSchema(BaseModel):
-    usn: str
-    name: str
-    email: str
-    department: str
-    year: int
-    section: str
-    password: str
-
-class NewTeacherSchema(BaseModel):
-    teacher_id: str
-    name: str
-    email: str
-    phone_number: Optional[str] = None
-    qualification: Optional[str] = None
-    subjects: List[str]
-    password: str
-
 class ClassroomSchema(BaseModel):
     room_number: str
     lat: float
@@ -84,22 +76,22 @@ class AttendanceReportQuery(BaseModel):
 def require_admin(
     token: dict = Depends(verify_token),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
     Ensures the caller is an admin.
-    Token is decoded by verify_token (reads Authorization: Bearer <token>)
+    Token is decoded by verify_token (reads Authorization: Bearer <token>),
+    the role comes from the principal cache (no query once cached)
     """
 
-    email = token.get("email") or token.get("sub")
-    if not email:
+    if not (token.get("email") or token.get("sub")):
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == email).first()
+    principal = principals.for_token(db, token)
 
-    if not user or not user.is_admin:
+    if not principal or not principal.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
 
-    return user
+    return principal
 
 
 # ----------------------------
@@ -170,6 +162,7 @@ def create_student(payload: NewStudentSchema, db: Session = Depends(get_db)):
     db.add(student)
     db.commit()
     db.refresh(student)
+    roster_cache.invalidate(payload.section)
 
     return {"message": "Student created", "id": student.id}
 
@@ -214,42 +207,134 @@ def create_teacher(payload: NewTeacherSchema, db: Session = Depends(get_db)):
     return {"message": "Teacher created", "id": teacher.id}
 
 
+# ----------------------------
+# 3b) BULK IMPORT (CSV / NDJSON)
+# ----------------------------
+@router.post("/import/{kind}", dependencies=[Depends(require_admin)])
+async def import_people(
+    kind: str,
+    request: Request,
+    format: Optional[str] = None,
+    skip_invalid: bool = False,
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk create students or teachers from the raw request body (CSV with a
+    header row, or NDJSON; ?format= or the Content-Type decides). Same
+    fields as POST /admin/students and /admin/teachers; teacher subjects in
+    CSV are ";"-separated. Every row is validated first: with any invalid
+    row nothing is written unless ?skip_invalid=true. ?dry_run=true only
+    validates.
+    """
+
+    if kind not in onboarding.IMPORT_SCHEMAS:
+        raise HTTPException(status_code=404, detail="kind must be students or teachers")
+
+    fmt = (format or "").lower()
+    if not fmt:
+        content_type = request.headers.get("content-type", "")
+        fmt = "ndjson" if "json" in content_type else "csv"
+
+    data = await request.body()
+    if not data.strip():
+        raise HTTPException(status_code=400, detail="Empty file")
+
+    try:
+        report = await run_in_threadpool(
+            onboarding.import_people, db, kind, onboarding.IMPORT_SCHEMAS[kind], data, fmt,
+            ONBOARD_CHUNK_ROWS, skip_invalid, dry_run, ONBOARD_MAX_ERRORS,
+        )
+    except onboarding.ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if report["inserted"]:
+        roster_cache.invalidate()
+        print(f"📥 Imported {report['inserted']}/{report['rows']} {kind} ({report['rows_per_second']} rows/s)")
+    if report["failed"] and not report["inserted"] and not dry_run:
+        raise HTTPException(status_code=400, detail={"message": "Nothing imported", **report})
+
+    return report
+
+
 # ----------------------------
 # 4) LIST TEACHERS
 # ----------------------------
+TEACHER_FIELDS = {
+    "teacher_id": Teacher.teacher_id,
+    "name": User.name,
+    "email": User.email,
+    "phone_number": Teacher.phone_number,
+    "qualification": Teacher.qualification,
+    "subjects": Teacher.subjects_taken,
+}
+
+
 @router.get("/teachers", dependencies=[Depends(require_admin)])
-def list_teachers(db: Session = Depends(get_db)):
+@query_budget(2)
+def list_teachers(
+    fields: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    One joined, column-projected query. Optional ?fields=name,email and
+    ?limit= / ?cursor= (keyset on teacher_id, see next_cursor).
+    "timetable" ({"slots": [...]}) costs one more query for the whole page.
+    """
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else []
+    with_timetable = not names or "timetable" in names
+    column_fields = ",".join(n for n in names if n != "timetable") or ("teacher_id" if names else None)
 
-    teachers = db.query(Teacher).all()
-    result = []
+    columns = select_fields(column_fields, TEACHER_FIELDS, key="teacher_id")
+    query = db.query(*labelled(columns)).select_from(Teacher).outerjoin(User, User.id == Teacher.user_id)
+    teachers, next_cursor = fetch_page(query, columns, "teacher_id", limit, cursor)
 
     for t in teachers:
-        user = db.query(User).filter(User.id == t.user_id).first()
-        result.append({
-            "teacher_id": t.teacher_id,
-            "name": user.name if user else None,
-            "email": user.email if user else None,
-            "phone_number": t.phone_number,
-            "qualification": t.qualification,
-            "subjects": t.subjects_taken or [],
-            "timetable": t.timetable or {}
-        })
+        if "subjects" in t:
+            t["subjects"] = t["subjects"] or []
+
+    if with_timetable and teachers:
+        by_teacher = {}
+        for slot in timetable.teacher_week_slots(db, [t["teacher_id"] for t in teachers]):
+            by_teacher.setdefault(slot.teacher_id, []).append(slot.to_dict())
+        for t in teachers:
+            t["timetable"] = {"slots": by_teacher.get(t["teacher_id"], [])}
 
-    return {"teachers": result}
+    return {"teachers": teachers, "next_cursor": next_cursor, "has_more": next_cursor is not None}
 
 
 # ----------------------------
 # 5) LIST STUDENTS
 # ----------------------------
+STUDENT_FIELDS = {
+    "usn": Student.usn,
+    "name": Student.name,
+    "email": Student.email,
+    "department": Student.department,
+    "year": Student.year,
+    "section": Student.section,
+}
+
+
 @router.get("/students", dependencies=[Depends(require_admin)])
+@query_budget(2)
 def list_students(
     department: Optional[str] = None,
     year: Optional[int] = None,
     section: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-
-    q = db.query(Student)
+    """
+    Column-projected (no ORM objects). Optional ?fields=usn,name and
+    ?limit= / ?cursor= (keyset on usn, see next_cursor).
+    """
+    columns = select_fields(fields, STUDENT_FIELDS, key="usn")
+    q = db.query(*labelled(columns))
 
     if department:
         q = q.filter(Student.department == department)
@@ -258,21 +343,9 @@ def list_students(
     if section:
         q = q.filter(Student.section == section)
 
-    students = q.all()
+    students, next_cursor = fetch_page(q, columns, "usn", limit, cursor)
 
-    return {
-        "students": [
-            {
-                "usn": s.usn,
-                "name": s.name,
-                "email": s.email,
-                "department": s.department,
-                "year": s.year,
-                "section": s.section
-            }
-            for s in students
-        ]
-    }
+    return {"students": students, "next_cursor": next_cursor, "has_more": next_cursor is not None}
 
 
 # ----------------------------
@@ -291,6 +364,9 @@ def assign_section(payload: SectionAssignSchema, db: Session = Depends(get_db)):
     )
 
     db.commit()
+    # students may have left other sections too
+    roster_cache.invalidate()
+    principals.invalidate(usns=payload.usns)
     return {"message": f"Updated {updated} students"}
 
 
@@ -299,16 +375,35 @@ def assign_section(payload: SectionAssignSchema, db: Session = Depends(get_db)):
 # ----------------------------
 @router.post("/timetable", dependencies=[Depends(require_admin)])
 def upload_timetable(payload: TimetableUploadSchema, db: Session = Depends(get_db)):
+    """
+    Replace a teacher's whole week: {"teacher_id", "timetable": {"slots": [...]}}
+    (slots in the same format as /timetable/slot). Rejected as a whole if
+    any slot does not parse.
+    """
 
-    teacher = db.query(Teacher).filter(Teacher.teacher_id == payload.teacher_id).first()
+    teacher = db.query(Teacher.teacher_id).filter(Teacher.teacher_id == payload.teacher_id).first()
 
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
-    teacher.timetable = payload.timetable
+    raw_slots = payload.timetable.get("slots", [])
+    if not isinstance(raw_slots, list):
+        raise HTTPException(status_code=400, detail="timetable.slots must be a list")
+
+    rows, errors = [], []
+    for i, slot in enumerate(raw_slots):
+        try:
+            rows.append(timetable.slot_row(payload.teacher_id, slot))
+        except (AttributeError, ValueError) as e:
+            errors.append(f"slot {i + 1}: {e}")
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors))
+
+    sections = timetable.replace_teacher_slots(db, payload.teacher_id, rows)
     db.commit()
+    timetable_cache.invalidate(sections, [payload.teacher_id])
 
-    return {"message": "Timetable saved"}
+    return {"message": "Timetable saved", "slots": len(rows)}
 
 
 # ----------------------------
@@ -317,39 +412,31 @@ def upload_timetable(payload: TimetableUploadSchema, db: Session = Depends(get_d
 @router.post("/timetable/slot", dependencies=[Depends(require_admin)])
 def add_timetable_slot(payload: TimetableSlotSchema, db: Session = Depends(get_db)):
     """
-    Add one slot to a teacher timetable.
-    Timetable stored as:
-    {
-      "slots": [
-        {"day": "Monday", "time": "9:00-10:00", "subject": "CN", "section": "CSE-3A"}
-      ]
-    }
+    Add one slot to a teacher timetable:
+        {"teacher_id": "F01", "day": "Monday", "time": "9:00-10:00",
+         "subject": "CN", "section": "CSE-3A"}
+    Stored as a timetable_slots row (day number, start/end minutes).
     """
 
-    teacher = db.query(Teacher).filter(Teacher.teacher_id == payload.teacher_id).first()
+    teacher = db.query(Teacher.teacher_id).filter(Teacher.teacher_id == payload.teacher_id).first()
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
-    # Ensure dict
-    if not teacher.timetable or not isinstance(teacher.timetable, dict):
-        teacher.timetable = {}
+    try:
+        row = timetable.slot_row(payload.teacher_id, payload.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    slots = teacher.timetable.get("slots", [])
-    if not isinstance(slots, list):
-        slots = []
+    timetable.add_slot(db, row)
+    db.commit()
+    timetable_cache.invalidate([row["section"]], [row["teacher_id"]])
 
     new_slot = {
-        "day": payload.day,
-        "time": payload.time,
-        "subject": payload.subject,
-        "section": payload.section
+        "day": timetable.DAYS[row["day"]],
+        "time": timetable.format_time_range(row["start_min"], row["end_min"]),
+        "subject": row["subject"],
+        "section": row["section"]
     }
-
-    slots.append(new_slot)
-    teacher.timetable["slots"] = slots
-
-    db.commit()
-
     return {"message": "Slot added", "slot": new_slot}
 
 
@@ -359,47 +446,11 @@ def add_timetable_slot(payload: TimetableSlotSchema, db: Session = Depends(get_d
 @router.get("/timetable/section/{section}", dependencies=[Depends(require_admin)])
 def section_timetable(section: str, db: Session = Depends(get_db)):
     """
-    Aggregate timetable for a SECTION (e.g. CSE-3A) across all teachers.
-    Looks through Teacher.timetable["slots"] using Format B.
+    Aggregate timetable for a SECTION (e.g. CSE-3A) across all teachers,
+    sorted by day and start time (ix_timetable_section_day_start, cached).
     """
 
-    teachers = db.query(Teacher).all()
-    slots: List[Dict[str, Any]] = []
-
-    for t in teachers:
-        if not t.timetable or not isinstance(t.timetable, dict):
-            continue
-
-        t_slots = t.timetable.get("slots", [])
-        if not isinstance(t_slots, list):
-            continue
-
-        for s in t_slots:
-            try:
-                if s.get("section") == section:
-                    slots.append({
-                        "day": s.get("day"),
-                        "time": s.get("time"),
-                        "subject": s.get("subject"),
-                        "section": s.get("section"),
-                        "teacher_id": t.teacher_id
-                    })
-            except Exception:
-                continue
-
-    # Optional: sort by day + time for nicer table on frontend
-    day_order = {
-        "Monday": 1, "Tuesday": 2, "Wednesday": 3,
-        "Thursday": 4, "Friday": 5, "Saturday": 6, "Sunday": 7
-    }
-
-    def sort_key(x):
-        return (
-            day_order.get(x.get("day"), 99),
-            x.get("time") or ""
-        )
-
-    slots.sort(key=sort_key)
+    slots = [s.to_dict() for s in timetable_cache.section_slots(db, section)]
 
     return {
         "section": section,
@@ -446,14 +497,12 @@ def admin_register_face(payload: FaceRegisterSchema, db: Session = Depends(get_d
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    img_data = payload.image.split(",")[-1]
-    img_bytes = base64.b64decode(img_data)
-
-    os.makedirs("face_data", exist_ok=True)
-    file_path = os.path.join("face_data", f"{student.usn}.jpg")
+    try:
+        img_bytes = decode_base64_payload(payload.image)
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    with open(file_path, "wb") as f:
-        f.write(img_bytes)
+    file_path = register_face_image(db, student.usn, img_bytes)
 
     return {"message": "Face registered", "path": file_path}
 
@@ -461,17 +510,7 @@ def admin_register_face(payload: FaceRegisterSchema, db: Session = Depends(get_d
 # ----------------------------
 # 🔟 ATTENDANCE REPORT (NO 422)
 # ----------------------------
-@router.post("/attendance/report", dependencies=[Depends(require_admin)])
-def attendance_report(body: Dict[str, Any], db: Session = Depends(get_db)):
-    """
-    Safer version: accepts raw dict so frontend can send "" for dates
-    without causing 422 errors.
-    """
-
-    subject = (body.get("subject") or "").strip() or None
-    from_raw = (body.get("from_date") or "").strip() or None
-    to_raw = (body.get("to_date") or "").strip() or None
-
+def _parse_report_dates(from_raw: Optional[str], to_raw: Optional[str]):
     from_date_obj: Optional[date] = None
     to_date_obj: Optional[date] = None
 
@@ -485,33 +524,87 @@ def attendance_report(body: Dict[str, Any], db: Session = Depends(get_db)):
         from_date_obj = None
         to_date_obj = None
 
-    q = db.query(Attendance)
+    start = datetime.combine(from_date_obj, datetime.min.time()) if from_date_obj else None
+    end = datetime.combine(to_date_obj, datetime.max.time()) if to_date_obj else None
+    return start, end
 
-    if subject:
-        q = q.filter(Attendance.subject == subject)
 
-    if from_date_obj:
-        q = q.filter(Attendance.timestamp >= datetime.combine(from_date_obj, datetime.min.time()))
+@router.post("/attendance/report", dependencies=[Depends(require_admin)])
+def attendance_report(body: Dict[str, Any], db: Session = Depends(get_db)):
+    """
+    Safer version: accepts raw dict so frontend can send "" for dates
+    without causing 422 errors.
+    Keyset-paginated on (timestamp, id): pass back `next_cursor` as
+    "cursor" for the next page; `limit` defaults to REPORT_PAGE_SIZE.
+    For whole reports use GET /admin/attendance/export.
+    The first page also carries `summary` (per-subject sessions and
+    attendance %, from the session rollup).
+    """
+
+    subject = (body.get("subject") or "").strip() or None
+    from_raw = (body.get("from_date") or "").strip() or None
+    to_raw = (body.get("to_date") or "").strip() or None
+    cursor = (body.get("cursor") or "").strip() or None
 
-    if to_date_obj:
-        q = q.filter(Attendance.timestamp <= datetime.combine(to_date_obj, datetime.max.time()))
+    try:
+        limit = int(body.get("limit") or REPORT_PAGE_SIZE)
+    except (TypeError, ValueError):
+        limit = REPORT_PAGE_SIZE
+    limit = max(1, min(limit, REPORT_MAX_PAGE_SIZE))
 
-    records = q.all()
+    start, end = _parse_report_dates(from_raw, to_raw)
+    conditions = report_filters(subject, start, end)
 
-    return {
+    try:
+        records, next_cursor = report_page(db, conditions, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response = {
         "count": len(records),
-        "records": [
-            {
-                "id": r.id,
-                "usn": r.usn,
-                "student_name": r.student_name,
-                "subject": r.subject,
-                "timestamp": r.timestamp.isoformat(),
-                "qr": r.qr,
-                "location": r.location,
-                "face": r.face,
-                "by_teacher": r.by_teacher
-            }
-            for r in records
-        ]
+        "records": records,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
     }
+    if not cursor:
+        response["summary"] = attendance_rollup.report_summary(
+            db, subject, start.date() if start else None, end.date() if end else None
+        )
+    return response
+
+
+# ----------------------------
+# 1️⃣1️⃣ ATTENDANCE EXPORT (STREAMING)
+# ----------------------------
+@router.get("/attendance/export", dependencies=[Depends(require_admin)])
+def export_attendance(
+    format: str = "csv",
+    subject: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    gzip: bool = False,
+):
+    """
+    Streams the whole filtered report as CSV or NDJSON (optionally gzipped),
+    read through a server-side cursor: memory use does not depend on how
+    many rows the report covers.
+    """
+
+    fmt = format.lower()
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    start, end = _parse_report_dates((from_date or "").strip() or None, (to_date or "").strip() or None)
+    conditions = report_filters((subject or "").strip() or None, start, end)
+
+    filename = f"attendance_{datetime.utcnow():%Y%m%d_%H%M%S}.{fmt}"
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        export_stream(conditions, fmt, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,17 +1,26 @@
 # routes/attendance_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
 from pydantic import BaseModel
+from typing import Optional
 
 from utils.db import get_db
 from utils.jwt_token import verify_token
+from utils.config import ATTENDANCE_WRITE_BEHIND, HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE, LIVE_CURSOR_OVERLAP
+from utils.idempotency import fingerprint, idempotency
 
 from models.attendance_model import Attendance
 from models.user_model import User
 from models.active_session import ActiveSession
 from models.student_model import Student
+from services.event_hub import hub
+from services.session_cache import active_sessions
+from services import attendance_rollup, roster_cache
+from services.attendance_writer import writer, WriteTimeout
+from services.attendance_store import upsert_one
+from services.attendance_export import InvalidCursor, history_page
 
 router = APIRouter()
 
@@ -27,19 +36,38 @@ class MarkAttendanceSchema(BaseModel):
 def mark_attendance(
     payload: MarkAttendanceSchema,
     token: dict = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None)
 ):
-
-    user = db.query(User).filter(User.usn == payload.student_id).first()
-    if not user:
+    """
+    Hot path while a whole class submits at once: one joined lookup for the
+    student, the session from the in-memory active-session index, one
+    upsert + COMMIT (the id comes back from the statement, no refresh).
+    Marking twice merges the flags into the existing row; a retry with the
+    same Idempotency-Key gets the first response back.
+    """
+
+    caller = token.get("usn") or token.get("sub") or ""
+    body_hash = fingerprint(payload.model_dump()) if idempotency_key else ""
+    replay = idempotency.get("attendance.mark", caller, idempotency_key, body_hash)
+    if replay is not None:
+        return replay
+
+    student = db.query(User.usn, User.name, Student.section).join(
+        Student, Student.usn == User.usn
+    ).filter(User.usn == payload.student_id).first()
+    if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    student = db.query(Student).filter(Student.usn == user.usn).first()
-
-    session = db.query(ActiveSession).filter(
-        ActiveSession.session_id == payload.session_id,
-        ActiveSession.active == True
-    ).first()
+    now = datetime.utcnow()
+    session = active_sessions.by_id(db, payload.session_id)
+    if not session:
+        # not in this worker's index yet (started on another worker)
+        session = db.query(ActiveSession).filter(
+            ActiveSession.session_id == payload.session_id,
+            ActiveSession.active == True,
+            ActiveSession.expires_at > now
+        ).first()
     if not session:
         raise HTTPException(status_code=400, detail="Invalid or expired session")
 
@@ -47,9 +75,9 @@ def mark_attendance(
     if student.section != session.section:
         raise HTTPException(status_code=403, detail="You are not part of this section")
 
-    record = Attendance(
-        usn=user.usn,
-        student_name=user.name,
+    values = dict(
+        usn=student.usn,
+        student_name=student.name,
         session_id=session.session_id,
         classroom_id=None,
         subject=session.subject,
@@ -57,14 +85,35 @@ def mark_attendance(
         location=bool(payload.location),
         face=bool(payload.face_image),
         by_teacher=False,
-        timestamp=datetime.utcnow()
+        timestamp=now,
+        section=student.section,   # for the rollups, not stored on the row
     )
 
-    db.add(record)
-    db.commit()
-    db.refresh(record)
-
-    return {"success": True, "attendance_id": record.id}
+    if ATTENDANCE_WRITE_BEHIND:
+        # group commit: blocks until the flusher has committed this row
+        db.rollback()   # end the read transaction before waiting
+        try:
+            attendance_id = writer.submit(values)
+        except WriteTimeout as e:
+            raise HTTPException(status_code=503, detail=str(e))
+    else:
+        attendance_id, _ = upsert_one(db, values)
+        db.commit()
+
+    hub.publish(session.section, "attendance_marked", {
+        "session_id": session.session_id,
+        "usn": student.usn,
+        "student_name": student.name,
+        "timestamp": now.isoformat(),
+        "qr": True,
+        "location": values["location"],
+        "face": values["face"],
+        "by_teacher": False,
+    })
+
+    response = {"success": True, "attendance_id": attendance_id}
+    idempotency.put("attendance.mark", caller, idempotency_key, body_hash, response)
+    return response
 
 
 
@@ -74,29 +123,46 @@ def mark_attendance(
 @router.get("/session/{session_id}")
 def get_attendance_for_session(
     session_id: str,
+    since: Optional[str] = None,
     token: dict = Depends(verify_token),
     db: Session = Depends(get_db)
 ):
-    session = db.query(ActiveSession).filter(
+    """
+    Live view of one session.
+    `since` is the `cursor` of the previous response (latest updated_at the
+    client has seen): only rows inserted or changed (flag merges) after it
+    are returned, so each refresh costs the same however full the session
+    is. The window is re-read LIVE_CURSOR_OVERLAP seconds back, because
+    transactions commit out of order; clients replace rows by id.
+    Counts come from the session rollup and the cached roster size.
+    """
+
+    since_ts = None
+    if since:
+        try:
+            since_ts = datetime.fromisoformat(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid since cursor")
+
+    session = active_sessions.by_id(db, session_id) or db.query(ActiveSession).filter(
         ActiveSession.session_id == session_id
     ).first()
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # fetch students in same section
-    section_students = db.query(Student).filter(
-        Student.section == session.section
-    ).all()
+    total_students = roster_cache.section_size(db, session.section)
 
-    total_students = len(section_students)
+    present = attendance_rollup.session_present(db, session_id, session.section)
 
-    # fetch attendance records
-    records = db.query(Attendance).filter(
-        Attendance.session_id == session_id
-    ).all()
+    # fetch attendance records (only new / changed ones when a cursor is given)
+    query = db.query(Attendance).filter(Attendance.session_id == session_id)
+    if since_ts is not None:
+        query = query.filter(Attendance.updated_at >= since_ts - timedelta(seconds=LIVE_CURSOR_OVERLAP))
+    records = query.order_by(Attendance.id).all()
 
-    present = len(records)
+    latest = max((r.updated_at for r in records if r.updated_at), default=None)
+    cursor = latest.isoformat() if latest and (since_ts is None or latest > since_ts) else since
 
     percentage = (present / total_students * 100) if total_students > 0 else 0
 
@@ -106,6 +172,7 @@ def get_attendance_for_session(
         "present_count": present,
         "total_students": total_students,
         "percentage": percentage,
+        "cursor": cursor,
         "records": [
             {
                 "id": r.id,
@@ -121,164 +188,55 @@ def get_attendance_for_session(
             for r in records
         ]
     }
-# routes/attendance_routes.py
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from datetime import datetime
-from pydantic import BaseModel
-
-from utils.db import get_db
-from utils.jwt_token import verify_token
-
-from models.attendance_model import Attendance
-from models.user_model import User
-from models.active_session import ActiveSession
-from models.student_model import Student
-
-router = APIRouter()
-
-
-class MarkAttendanceSchema(BaseModel):
-    session_id: str
-    student_id: str
-    location: dict | None = None
-    face_image: str | None = None
-
-
-@router.post("/mark")
-def mark_attendance(
-    payload: MarkAttendanceSchema,
-    token: dict = Depends(verify_token),
-    db: Session = Depends(get_db)
-):
-
-    user = db.query(User).filter(User.usn == payload.student_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Student not found")
-
-    student = db.query(Student).filter(Student.usn == user.usn).first()
-
-    session = db.query(ActiveSession).filter(
-        ActiveSession.session_id == payload.session_id,
-        ActiveSession.active == True
-    ).first()
-    if not session:
-        raise HTTPException(status_code=400, detail="Invalid or expired session")
-
-    # ❗ BLOCK WRONG-SECTION STUDENT
-    if student.section != session.section:
-        raise HTTPException(status_code=403, detail="You are not part of this section")
-
-    record = Attendance(
-        usn=user.usn,
-        student_name=user.name,
-        session_id=session.session_id,
-        classroom_id=None,
-        subject=session.subject,
-        qr=True,
-        location=bool(payload.location),
-        face=bool(payload.face_image),
-        by_teacher=False,
-        timestamp=datetime.utcnow()
-    )
-
-    db.add(record)
-    db.commit()
-    db.refresh(record)
-
-    return {"success": True, "attendance_id": record.id}
-
 
 
 # ---------------------------
-# FETCH LIVE ATTENDANCE
+# WRITE-BEHIND METRICS
 # ---------------------------
-@router.get("/session/{session_id}")
-def get_attendance_for_session(
-    session_id: str,
-    token: dict = Depends(verify_token),
-    db: Session = Depends(get_db)
-):
-    session = db.query(ActiveSession).filter(
-        ActiveSession.session_id == session_id
-    ).first()
+@router.get("/writer-metrics")
+def attendance_writer_metrics(token: dict = Depends(verify_token)):
+    return {"enabled": ATTENDANCE_WRITE_BEHIND, **writer.metrics()}
 
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    # fetch students in same section
-    section_students = db.query(Student).filter(
-        Student.section == session.section
-    ).all()
-
-    total_students = len(section_students)
 
-    # fetch attendance records
-    records = db.query(Attendance).filter(
-        Attendance.session_id == session_id
-    ).all()
-
-    present = len(records)
-
-    percentage = (present / total_students * 100) if total_students > 0 else 0
-
-    return {
-        "session_id": session_id,
-        "section": session.section,
-        "present_count": present,
-        "total_students": total_students,
-        "percentage": percentage,
-        "records": [
-            {
-                "id": r.id,
-                "usn": r.usn,
-                "student_name": r.student_name,
-                "subject": r.subject,
-                "timestamp": r.timestamp.isoformat(),
-                "qr": r.qr,
-                "location": r.location,
-                "face": r.face,
-                "by_teacher": r.by_teacher,
-            }
-            for r in records
-        ]
-    }
 # -------------------------------------------------------
 # STUDENT ATTENDANCE HISTORY
 # -------------------------------------------------------
 @router.get("/history/{usn}")
 def get_attendance_history(
     usn: str,
+    limit: int = HISTORY_PAGE_SIZE,
+    cursor: Optional[str] = None,
     token: dict = Depends(verify_token),
     db: Session = Depends(get_db)
 ):
+    """
+    Attended vs. held sessions per subject and overall (grouped queries on
+    the rollups, for the student's section), plus one newest-first page of
+    records. Pass `next_cursor` back as `cursor` for older records.
+    """
     # Check if student exists
-    student = db.query(Student).filter(Student.usn == usn).first()
+    student = db.query(Student.usn, Student.section).filter(Student.usn == usn).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    # Fetch attendance records for this USN
-    records = db.query(Attendance).filter(Attendance.usn == usn).all()
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    try:
+        records, next_cursor = history_page(db, usn, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    total_records = len(records)
-    attended = sum(1 for r in records)
+    subjects = attendance_rollup.student_subjects(db, usn, student.section)
+    attended = sum(s["attended"] for s in subjects)
+    held = sum(s["held"] for s in subjects)
 
     return {
         "usn": usn,
-        "total_records": total_records,
+        "section": student.section,
+        "total_records": held,      # sessions held for the section
         "attended": attended,
-        "percentage": (attended / total_records * 100) if total_records > 0 else 0,
-        "records": [
-            {
-                "id": r.id,
-                "timestamp": r.timestamp.isoformat(),
-                "subject": r.subject,
-                "qr": r.qr,
-                "location": r.location,
-                "face": r.face,
-                "by_teacher": r.by_teacher
-            }
-            for r in records
-        ]
+        "percentage": attended / held * 100 if held > 0 else 0,
+        "subjects": subjects,
+        "records": records,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
     }
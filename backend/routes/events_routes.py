@@ -0,0 +1,103 @@
+# routes/events_routes.py
+#
+# Live push channel (Server-Sent Events) replacing the dashboard polling of
+# /qr/active-session and /attendance/session/{id}.
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from utils.config import EVENT_HEARTBEAT_SECONDS
+from utils.db import SessionLocal
+from utils.jwt_token import decode_access_token, verify_token
+from services.event_hub import hub, format_sse
+from services.session_cache import active_sessions
+
+router = APIRouter()
+
+
+def _current_session(section: str) -> Optional[dict]:
+    # Short-lived session: the stream itself must not hold a DB connection
+    db = SessionLocal()
+    try:
+        snap = active_sessions.for_section(db, section)
+    finally:
+        db.close()
+    if not snap:
+        return None
+    return {
+        "session_id": snap.session_id,
+        "subject": snap.subject,
+        "teacher_id": snap.teacher_id,
+        "expires_at": snap.expires_at.isoformat() if snap.expires_at else None,
+    }
+
+
+# ---------------------------
+# 📡 Section event stream
+# ---------------------------
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    section: Optional[str] = None,
+    token: Optional[str] = None,
+    authorization: str = Header(None),
+):
+    """
+    SSE stream of session_started / session_stopped / attendance_marked for
+    one section. EventSource cannot send headers, so the JWT may also be
+    passed as ?token=. Students are always scoped to their own section
+    and do not receive who was marked (usn / names).
+    The first frame is a `snapshot` with the section's current session.
+    """
+
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization.split(" ")[1]
+    payload = decode_access_token(token) if token else None
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    staff = bool(payload.get("is_teacher") or payload.get("is_admin"))
+    if not staff:
+        section = payload.get("section")
+    if not section:
+        raise HTTPException(status_code=400, detail="section is required")
+
+    current = await run_in_threadpool(_current_session, section)
+    sub = hub.subscribe(section, staff=staff)
+
+    async def event_stream():
+        try:
+            yield format_sse({
+                "id": 0,
+                "event": "snapshot",
+                "data": {"section": section, "active": bool(current), "session": current},
+            })
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(message)
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------------------------
+# 📊 Hub stats
+# ---------------------------
+@router.get("/stats")
+def event_stats(token: dict = Depends(verify_token)):
+    return hub.stats()
@@ -6,8 +6,8 @@ from sqlalchemy.orm import Session
 from utils.jwt_token import verify_token
 from utils.db import get_db
 from models.user_model import User
-import base64
-import os
+from services.face_model import InvalidImageError, decode_base64_payload
+from services.facial_service import register_face_image
 from datetime import datetime
 
 router = APIRouter()
@@ -21,8 +21,8 @@ class FaceRegisterSchema(BaseModel):
 @router.post("/register")
 def register_face(payload: FaceRegisterSchema, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
     """
-    Save a user's face image to the face_data folder.
-    This will be used for future DeepFace verification.
+    Save a user's face image to the face_data folder and store its
+    VGG-Face embedding, which is used for future verification.
     """
 
     try:
@@ -33,25 +33,14 @@ def register_face(payload: FaceRegisterSchema, token: dict = Depends(verify_toke
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # Decode incoming image
-        image_str = payload.image
-        if "," in image_str:
-            image_str = image_str.split(",")[1]  # Remove "data:image/jpeg;base64,"
-
+        # Decode incoming image (size cap + format check, no disk I/O)
         try:
-            image_bytes = base64.b64decode(image_str)
-        except Exception:
-            raise HTTPException(status_code=400, detail="Invalid image data")
-
-        # Ensure folder exists
-        folder_path = "face_data"
-        os.makedirs(folder_path, exist_ok=True)
-
-        # Save image as <usn>.jpg
-        save_path = os.path.join(folder_path, f"{user.usn}.jpg")
+            image_bytes = decode_base64_payload(payload.image)
+        except InvalidImageError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        with open(save_path, "wb") as f:
-            f.write(image_bytes)
+        # Save image as <usn>.jpg and precompute its embedding
+        save_path = register_face_image(db, user.usn, image_bytes)
 
         print(f"📸 Face registered for user: {user.name} ({user.usn}) → {save_path}")
 
@@ -1,12 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from utils.jwt_token import verify_token
 from utils.db import get_db
 from models.user_model import User
-import base64
-import os
-from deepface import DeepFace
+from models.active_session import ActiveSession
+from services import inference_pool, fast_face_model, lbph_service
+from services.face_batcher import batcher
+from services.face_quality import REASON_MESSAGES, check_face_quality, quality_metrics
+from services.face_model import InvalidImageError, decode_base64_payload, decode_image, embed_all_faces
+from services.facial_service import (
+    get_reference_embedding, get_fast_reference, backfill_fast_reference, compare_to_reference,
+    fast_stage_decision, cascade_enabled, margin_confidence
+)
+from ml_model.classroom_recognizer import recognise_classroom
+from utils.config import MAX_CLASSROOM_IMAGE_BYTES, CLASSROOM_DETECTOR
 from datetime import datetime
 
 router = APIRouter()
@@ -15,25 +24,75 @@ class FaceVerifySchema(BaseModel):
     image: str
     user_id: str
 
+class FacePredictSchema(BaseModel):
+    image: str
+
+class ClassroomPhotoSchema(BaseModel):
+    session_id: str
+    image: str   # base64 photo of the whole class
+
+
+def _load_references(db: Session, usn: str):
+    """DB part of verify (runs in the thread pool): (user, main-engine reference, SFace reference)"""
+    user = db.query(User).filter(User.usn == usn).first()
+    if not user:
+        return None, None, None
+
+    fast_reference = get_fast_reference(db, user.usn) if cascade_enabled() else None
+    return user, get_reference_embedding(db, user.usn), fast_reference
+
+
+# how often each cascade stage made the final call
+_stage_counts = {"fast_accept": 0, "fast_reject": 0, "deep": 0}
+
+
 @router.post("/verify")
-def verify_face(payload: FaceVerifySchema, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
+async def verify_face(payload: FaceVerifySchema, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
     """
-    Verify face using DeepFace.
+    Verify face against the stored embeddings.
     - If no registered face exists, fails verification.
-    - Uses a temp file for comparison, removes it afterwards.
+    - Only the probe image is embedded; the reference vectors are precomputed
+      (or backfilled once from face_data/<usn>.jpg).
+    - The probe is decoded in memory and handed to the model as an array.
+    - A cheap quality gate rejects unusable frames first, with a `reason`
+      code (no_face / face_too_small / too_blurry).
+    - Stage 1: fast SFace score decides clear accepts / rejects.
+    - Stage 2: the main engine (VGG-Face by default) only for scores in the
+      uncertainty band. It runs in
+      the face inference pool (micro-batched), so this endpoint never ties
+      up the threads used by the DB-bound routes.
+    The `stage` field of the response says which stage decided; `confidence`
+    is 1 - distance / threshold in that stage's model (> 0 means a match).
     """
 
     try:
+        # Cheap payload checks first (size cap, base64, image signature)
+        try:
+            image_bytes = decode_base64_payload(payload.image)
+        except InvalidImageError as e:
+            return {"verified": False, "message": str(e), "confidence": 0.0}
+
+        # Quality gate: reject blank / tiny / blurry frames before the deep model
+        try:
+            quality = await run_in_threadpool(check_face_quality, image_bytes)
+        except InvalidImageError as e:
+            return {"verified": False, "message": str(e), "confidence": 0.0}
+
+        if not quality["ok"]:
+            return {
+                "verified": False,
+                "message": REASON_MESSAGES[quality["reason"]],
+                "reason": quality["reason"],
+                "confidence": 0.0
+            }
+
         # Lookup user by USN, not name
-        user = db.query(User).filter(User.usn == payload.user_id).first()
+        user, reference, fast_reference = await run_in_threadpool(_load_references, db, payload.user_id)
 
         if not user:
             return {"verified": False, "message": "User not found"}
 
-        # Path where registered face photos are stored
-        registered_face_path = f"face_data/{user.usn}.jpg"
-
-        if not os.path.exists(registered_face_path):
+        if reference is None:
             # No registered face — fail verification
             print(f"❌ No registered face for {user.usn} — verification failed.")
             return {
@@ -42,36 +101,46 @@ def verify_face(payload: FaceVerifySchema, token: dict = Depends(verify_token),
                 "confidence": 0.00
             }
 
-        # Decode incoming image (data URL or base64 string)
-        image_str = payload.image
-        if "," in image_str:
-            image_str = image_str.split(",")[1]
+        # ---- Stage 1: fast SFace ----
+        fast_score = None
+        if fast_reference is None and cascade_enabled():
+            # legacy registration: embed the stored photo once, in the inference pool
+            fast_reference = await backfill_fast_reference(db, user.usn)
+        if fast_reference is not None:
+            # inference pool, not the default thread pool the DB-bound routes share
+            fast_probe = await inference_pool.run_async(fast_face_model.embed_bytes, image_bytes)
 
-        image_bytes = base64.b64decode(image_str)
+            if fast_probe is not None:
+                fast_score = fast_face_model.similarity(fast_reference, fast_probe)
+                decision = fast_stage_decision(fast_score)
 
-        # Save temp image file
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
-        temp_path = f"face_data/temp_{user.usn}_{timestamp}.jpg"
-        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-        with open(temp_path, "wb") as f:
-            f.write(image_bytes)
+                if decision is not None:
+                    _stage_counts["fast_accept" if decision else "fast_reject"] += 1
+                    print(f"⚡ Fast face verification for {user.usn}: verified={decision}, score={fast_score:.3f}")
+                    # same margin scale as the deep stage, in SFace's own distance space
+                    distance = 1.0 - fast_score
+                    threshold = fast_face_model.SFACE_DISTANCE_THRESHOLD
+                    return {
+                        "verified": decision,
+                        "message": "Face verified successfully" if decision else "Face verification failed",
+                        "confidence": margin_confidence(distance, threshold),
+                        "distance": distance,
+                        "threshold": threshold,
+                        "stage": "fast",
+                        "fast_score": fast_score
+                    }
 
+        # ---- Stage 2: main engine (VGG-Face) ----
         print(f"📸 Verifying face for {user.usn} using DeepFace...")
 
-        # Run DeepFace verify (enforce_detection False to avoid strict failure)
-        result = DeepFace.verify(
-            img1_path=registered_face_path,
-            img2_path=temp_path,
-            model_name="VGG-Face",
-            enforce_detection=False
-        )
-
-        # Clean up temp file
+        # Embed only the probe (enforce_detection False inside embed_image)
         try:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-        except Exception as e:
-            print(f"⚠️ Failed to remove temp file {temp_path}: {e}")
+            probe = await batcher.embed(image_bytes)
+        except InvalidImageError as e:
+            return {"verified": False, "message": str(e), "confidence": 0.0}
+
+        result = compare_to_reference(reference, probe)
+        _stage_counts["deep"] += 1
 
         verified = result.get("verified", False)
         distance = result.get("distance", None)
@@ -82,17 +151,16 @@ def verify_face(payload: FaceVerifySchema, token: dict = Depends(verify_token),
         # Compute a safety confidence if possible
         confidence = None
         if distance is not None and threshold:
-            try:
-                confidence = 1 - (distance / threshold) if threshold > 0 else 0
-            except Exception:
-                confidence = None
+            confidence = margin_confidence(distance, threshold)
 
         return {
             "verified": bool(verified),
             "message": "Face verified successfully" if verified else "Face verification failed",
             "confidence": confidence,
             "distance": distance,
-            "threshold": threshold
+            "threshold": threshold,
+            "stage": "deep",
+            "fast_score": fast_score
         }
 
     except Exception as e:
@@ -102,3 +170,89 @@ def verify_face(payload: FaceVerifySchema, token: dict = Depends(verify_token),
             "message": f"Verification error: {str(e)}",
             "confidence": 0.0
         }
+
+
+# ---------------------------
+# 🏫 Classroom photo: mark every recognised student at once
+# ---------------------------
+def _get_open_session(db: Session, session_id: str):
+    session = db.query(ActiveSession).filter(
+        ActiveSession.session_id == session_id,
+        ActiveSession.active == True
+    ).first()
+
+    if not session or (session.expires_at and session.expires_at < datetime.utcnow()):
+        return None
+    return session
+
+
+@router.post("/classroom")
+async def classroom_attendance(
+    payload: ClassroomPhotoSchema,
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_db)
+):
+    """
+    Teacher uploads one photo of the class for an active session of their own.
+    All faces are embedded in one batch and matched 1:N against the
+    section's stored embeddings; matches get Attendance rows with face=True.
+    """
+
+    if not token.get("is_teacher"):
+        raise HTTPException(status_code=403, detail="Not a teacher")
+
+    try:
+        image_bytes = decode_base64_payload(payload.image, max_bytes=MAX_CLASSROOM_IMAGE_BYTES)
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    session = await run_in_threadpool(_get_open_session, db, payload.session_id)
+    if not session:
+        raise HTTPException(status_code=400, detail="Invalid or expired session")
+    if session.teacher_id != token.get("usn"):
+        raise HTTPException(status_code=403, detail="Session belongs to another teacher")
+
+    try:
+        boxes, embeddings = await inference_pool.run_async(embed_all_faces, image_bytes, CLASSROOM_DETECTOR)
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    print(f"🏫 Classroom photo for {session.section}: {len(boxes)} face(s) detected")
+
+    return await run_in_threadpool(recognise_classroom, db, session, boxes, embeddings)
+
+
+# ---------------------------
+# 🔎 1:N identification (LBPH)
+# ---------------------------
+@router.post("/predict")
+def predict_face(payload: FacePredictSchema, token: dict = Depends(verify_token)):
+    """
+    Who is this? Identifies the face among all registered students with the
+    in-memory LBPH model (trained by ml_model/train_face_model.py, updated
+    incrementally on every registration).
+    Teachers and admins only.
+    """
+
+    if not (token.get("is_teacher") or token.get("is_admin")):
+        raise HTTPException(status_code=403, detail="Teacher or admin access required")
+
+    try:
+        img = decode_image(decode_base64_payload(payload.image), scale=1)
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return lbph_service.predict(img)
+
+
+# ---------------------------
+# 📊 Inference metrics (for tuning batch size / wait)
+# ---------------------------
+@router.get("/metrics")
+def face_metrics(token: dict = Depends(verify_token)):
+    return {
+        "batching": batcher.metrics(),
+        "quality_gate": quality_metrics(),
+        "cascade": {"enabled": cascade_enabled(), **_stage_counts},
+        "lbph": lbph_service.metrics()
+    }
@@ -6,7 +6,11 @@ from sqlalchemy.orm import Session
 from utils.db import get_db
 from models.active_session import ActiveSession
 from utils.jwt_token import verify_token
+from services.session_cache import active_sessions
+from services.event_hub import hub
+from services import attendance_rollup, roster_cache
 from datetime import datetime, timedelta
+from typing import Optional
 import uuid
 
 router = APIRouter()
@@ -59,9 +63,27 @@ def generate_qr(
     )
 
     db.add(new_session)
+    # counts as held for the section even if nobody marks it
+    attendance_rollup.session_opened(
+        db, session_id, payload.section, payload.subject,
+        new_session.created_at.date(), roster_cache.section_size(db, payload.section),
+    )
     db.commit()
     db.refresh(new_session)
 
+    # Only one active session: replaces everything in the cache
+    replaced = active_sessions.started(new_session, exclusive=True)
+
+    # Push to the dashboards of every affected section
+    for old in replaced:
+        hub.publish(old.section, "session_stopped", {"session_id": old.session_id})
+    hub.publish(new_session.section, "session_started", {
+        "session_id": session_id,
+        "subject": payload.subject,
+        "teacher_id": payload.teacher_id,
+        "expires_at": expires_at.isoformat(),
+    })
+
     return {
         "message": "QR session created",
         "session_id": session_id,
@@ -91,6 +113,9 @@ def stop_qr(
     session.active = False
     db.commit()
 
+    active_sessions.stopped(payload.session_id)
+    hub.publish(session.section, "session_stopped", {"session_id": payload.session_id})
+
     return {"message": "QR session stopped", "session_id": payload.session_id}
 
 
@@ -124,25 +149,19 @@ def verify_qr_session(session_id: str, db: Session = Depends(get_db)):
 # 🟩 Fetch Active Session (Student Dashboard)
 # ---------------------------
 @router.get("/active-session")
-def get_active_session(db=Depends(get_db)):
-    now = datetime.utcnow()
-
-    # Auto-expire old sessions
-    db.query(ActiveSession).filter(
-        ActiveSession.expires_at < now
-    ).update({ActiveSession.active: False})
-    db.commit()
+def get_active_session(section: Optional[str] = None, db=Depends(get_db)):
+    """
+    Polled by every student dashboard, so it is served from the in-process
+    session cache: no DB round trip and no writes. Expiry is checked in
+    memory from expires_at.
+    Pass ?section= to get that section's session; without it the newest
+    open session is returned (old behaviour).
+    """
 
-    # Latest active session
-    active_session = (
-        db.query(ActiveSession)
-        .filter(
-            ActiveSession.active == True,
-            ActiveSession.expires_at > now
-        )
-        .order_by(ActiveSession.created_at.desc())
-        .first()
-    )
+    if section:
+        active_session = active_sessions.for_section(db, section)
+    else:
+        active_session = active_sessions.latest(db)
 
     if not active_session:
         return {"active": False}
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import Optional
 
 from utils.db import get_db
 from utils.jwt_token import verify_token
+from utils.idempotency import fingerprint, idempotency
+from utils.listing import fetch_page, labelled, select_fields
+from utils.query_counter import query_budget
 from models.user_model import User
 from models.student_model import Student
-from models.attendance_model import Attendance
+from models.active_session import ActiveSession
+from services.event_hub import hub
+from services.session_cache import active_sessions
+from services.attendance_store import ConcurrentMarkError, upsert_many
 
 router = APIRouter()
 
@@ -14,28 +21,33 @@ router = APIRouter()
 # ===============================
 # FETCH STUDENTS BY SECTION
 # ===============================
+SECTION_STUDENT_FIELDS = {
+    "name": Student.name,
+    "usn": Student.usn,
+    "email": Student.email,
+    "section": Student.section,
+}
+
+
 @router.get("/students/{section}")
+@query_budget(1)
 def list_students_by_section(
     section: str,
+    fields: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
     token: dict = Depends(verify_token),
     db: Session = Depends(get_db)
 ):
-    students = db.query(Student).filter(Student.section == section).all()
+    """Column-projected; optional ?fields=, ?limit= / ?cursor= (keyset on usn)."""
+    columns = select_fields(fields, SECTION_STUDENT_FIELDS, key="usn")
+    query = db.query(*labelled(columns)).filter(Student.section == section)
+    students, next_cursor = fetch_page(query, columns, "usn", limit, cursor)
 
-    if not students:
+    if not students and not cursor:
         raise HTTPException(status_code=404, detail=f"No students found in section {section}")
 
-    return {
-        "students": [
-            {
-                "name": s.name,
-                "usn": s.usn,
-                "email": s.email,
-                "section": s.section
-            }
-            for s in students
-        ]
-    }
+    return {"students": students, "next_cursor": next_cursor, "has_more": next_cursor is not None}
 
 
 # ===============================
@@ -45,54 +57,132 @@ def list_students_by_section(
 def manual_mark_attendance(
     data: dict,
     token: dict = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None)
 ):
+    """
+    Teacher override, set-based: one IN query resolves the roster, one
+    multi-row upsert writes it.
+      {"subject", "usns": [...]}                   mark these students
+      {"subject", "section", "all_except": [...]}  whole section but these
+    Marks go into the teacher's manual session for the subject and day, or
+    into an existing QR session when "session_id" is given (only the
+    teacher's own session, and only students of its section). Each USN
+    gets an outcome: marked, already_present or unknown (no such student,
+    or not in the session's section). A retry with the same
+    Idempotency-Key replays the response.
+    """
+    if not token.get("is_teacher"):
+        raise HTTPException(status_code=403, detail="Not a teacher")
+
     subject = data.get("subject")
-    usns = data.get("usns", [])
+    usns = data.get("usns") or []
+    section = data.get("section")
+    all_except = data.get("all_except")
+    session_id = data.get("session_id")
     classroom_id = data.get("classroom_id", 1)
 
-    if not subject:
-        raise HTTPException(status_code=400, detail="Subject missing")
-
-    if not usns:
+    whole_section = section is not None and all_except is not None
+    if not whole_section and not usns:
         raise HTTPException(status_code=400, detail="No students provided")
 
     teacher_usn = token.get("usn") or "T_MANUAL"
-    manual_session_id = f"manual-{teacher_usn}-{subject.replace(' ', '_')}"
-
-    marked = []
-
+    body_hash = fingerprint(data) if idempotency_key else ""
+    replay = idempotency.get("teacher.mark", teacher_usn, idempotency_key, body_hash)
+    if replay is not None:
+        return replay
+
+    now = datetime.utcnow()
+    session = None
+    if session_id:
+        session = active_sessions.by_id(db, session_id) or db.query(ActiveSession).filter(
+            ActiveSession.session_id == session_id
+        ).first()
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if session.teacher_id != token.get("usn"):
+            raise HTTPException(status_code=403, detail="Session belongs to another teacher")
+        if whole_section and section != session.section:
+            raise HTTPException(status_code=400, detail=f"Session is for section {session.section}")
+        subject = session.subject
+    elif not subject:
+        raise HTTPException(status_code=400, detail="Subject missing")
+    else:
+        session_id = f"manual-{teacher_usn}-{subject.replace(' ', '_')}-{now:%Y%m%d}"
+
+    # ---- resolve the roster (one query) ----
+    roster = db.query(Student.usn, Student.name, Student.section)
+    if whole_section:
+        excluded = set(all_except)
+        roster = roster.filter(Student.section == section)
+        if excluded:
+            roster = roster.filter(Student.usn.notin_(excluded))
+        students = roster.all()
+        requested = [s.usn for s in students]
+    else:
+        excluded = set()
+        requested = list(dict.fromkeys(usns))
+        roster = roster.filter(Student.usn.in_(requested))
+        if session is not None:
+            # QR session: other sections' students stay "unknown"
+            roster = roster.filter(Student.section == session.section)
+        students = roster.all()
+
+    rows = [
+        dict(
+            usn=s.usn,
+            student_name=s.name,
+            session_id=session_id,
+            classroom_id=classroom_id,
+            subject=subject,
+            qr=False,
+            location=False,
+            face=False,
+            by_teacher=True,
+            timestamp=now,
+            section=s.section,
+        )
+        for s in students
+    ]
+
+    # ---- write (one multi-row upsert) ----
     try:
-        for usn in usns:
-            student = db.query(Student).filter(Student.usn == usn).first()
-            if not student:
-                continue
-
-            att = Attendance(
-                usn=student.usn,
-                student_name=student.name,
-                session_id=manual_session_id,
-                classroom_id=classroom_id,
-                subject=subject,
-                qr=False,
-                location=False,
-                face=False,
-                by_teacher=True,
-                timestamp=datetime.utcnow()
-            )
-
-            db.add(att)
-            marked.append(student.usn)
-
+        results = upsert_many(db, rows)
         db.commit()
-
-        return {
-            "success": True,
-            "marked": marked,
-            "session_id": manual_session_id,
-            "message": "Attendance overridden successfully"
-        }
-
+    except ConcurrentMarkError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
+
+    outcomes = {usn: "unknown" for usn in requested}
+    by_section = {}
+    for student, (_, inserted) in zip(students, results):
+        outcomes[student.usn] = "marked" if inserted else "already_present"
+        by_section.setdefault(student.section, []).append(student.usn)
+
+    for student_section, section_usns in by_section.items():
+        hub.publish(student_section, "attendance_marked", {
+            "session_id": session_id,
+            "usns": section_usns,
+            "subject": subject,
+            "by_teacher": True,
+        })
+
+    counts = {"marked": 0, "already_present": 0, "unknown": 0}
+    for outcome in outcomes.values():
+        counts[outcome] += 1
+
+    response = {
+        "success": True,
+        "marked": [s.usn for s in students],
+        "session_id": session_id,
+        "outcomes": outcomes,
+        "counts": counts,
+        "message": "Attendance overridden successfully"
+    }
+    if whole_section:
+        response["excluded"] = sorted(excluded)
+    idempotency.put("teacher.mark", teacher_usn, idempotency_key, body_hash, response)
+    return response
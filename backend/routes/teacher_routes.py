@@ -4,8 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from utils.db import get_db
 from utils.jwt_token import verify_token
-from models.user_model import User
 from models.teacher_model import Teacher
+from services.principal_cache import principals
 
 router = APIRouter()
 
@@ -19,17 +19,18 @@ def get_teacher_subjects(
 ):
     """Return subjects handled by the logged-in teacher"""
 
-    email = token.get("email")
-
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not user.is_teacher:
+    principal = principals.for_token(db, token)
+    if not principal or not principal.is_teacher:
         raise HTTPException(status_code=403, detail="Not a teacher")
 
-    teacher = db.query(Teacher).filter(Teacher.user_id == user.id).first()
-    if not teacher:
+    if not principal.teacher_id:
         return {"subjects": []}
 
+    subjects = db.query(Teacher.subjects_taken).filter(
+        Teacher.teacher_id == principal.teacher_id
+    ).scalar()
+
     return {
-        "teacher_id": teacher.teacher_id,
-        "subjects": teacher.subjects_taken or []
+        "teacher_id": principal.teacher_id,
+        "subjects": subjects or []
     }
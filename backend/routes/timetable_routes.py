@@ -0,0 +1,65 @@
+# routes/timetable_routes.py
+#
+# "What's scheduled now" lookups for dashboards, served from the in-process
+# timetable cache (services/timetable.py).
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from utils.db import get_db
+from utils.jwt_token import verify_token
+from services.timetable import local_now, timetable_cache, to_local
+
+router = APIRouter()
+
+
+def _at(at: Optional[str]) -> datetime:
+    if not at:
+        return local_now()
+    try:
+        # "...+05:30" / "...Z" are converted; naive values are local time
+        return to_local(datetime.fromisoformat(at.replace("Z", "+00:00")))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid 'at' (expected ISO datetime)")
+
+
+def _now_and_next(db: Session, kind: str, key: str, at: Optional[str]) -> dict:
+    when = _at(at)
+    current, upcoming = timetable_cache.now_and_next(db, kind, key, when)
+    return {
+        kind: key,
+        "at": when.isoformat(),
+        "current": current.to_dict() if current else None,
+        "next": upcoming.to_dict() if upcoming else None,
+    }
+
+
+# ---------------------------
+# Section: current / next slot
+# ---------------------------
+@router.get("/section/{section}/now")
+def section_now(
+    section: str,
+    at: Optional[str] = None,
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_db)
+):
+    """Slot running now for `section` (or at ?at=, local time) and the next one."""
+    return _now_and_next(db, "section", section, at)
+
+
+# ---------------------------
+# Teacher: slot right now
+# ---------------------------
+@router.get("/teacher/{teacher_id}/now")
+def teacher_now(
+    teacher_id: str,
+    at: Optional[str] = None,
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_db)
+):
+    """The teacher's slot running now (or at ?at=, local time) and their next one."""
+    return _now_and_next(db, "teacher", teacher_id, at)
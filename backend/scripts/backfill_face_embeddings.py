@@ -0,0 +1,57 @@
+# Precompute face embeddings for every registered face_data/<usn>.jpg
+# that has no (current) stored vector yet.
+#
+#   python scripts/backfill_face_embeddings.py          # only missing / stale
+#   python scripts/backfill_face_embeddings.py --force  # re-embed everything
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from utils.db import SessionLocal
+from utils.config import FACE_DATA_DIR
+from services import inference_pool
+from services.facial_service import backfill_embedding, load_embedding
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill stored face embeddings")
+    parser.add_argument("--force", action="store_true", help="re-embed even if a vector exists")
+    args = parser.parse_args()
+
+    if not os.path.isdir(FACE_DATA_DIR):
+        print(f"No {FACE_DATA_DIR} folder, nothing to do.")
+        return
+
+    usns = sorted(
+        f[:-4] for f in os.listdir(FACE_DATA_DIR)
+        if f.endswith(".jpg") and not f.startswith("temp_")
+    )
+
+    db = SessionLocal()
+    done, skipped, failed = 0, 0, 0
+
+    try:
+        for usn in usns:
+            if not args.force and load_embedding(db, usn) is not None:
+                skipped += 1
+                continue
+
+            try:
+                backfill_embedding(db, usn)
+                done += 1
+                print(f"✅ {usn}")
+            except Exception as e:
+                db.rollback()
+                failed += 1
+                print(f"❌ {usn}: {e}")
+    finally:
+        db.close()
+        inference_pool.shutdown_pool()
+
+    print(f"Backfill finished: {done} embedded, {skipped} already up to date, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Compare face engines: cold start, memory footprint and per-image latency.
+#
+#   python scripts/benchmark_face_engines.py                    # all engines, synthetic images
+#   python scripts/benchmark_face_engines.py --images face_data --runs 50
+#   python scripts/benchmark_face_engines.py --engine opencv
+#
+# Every engine is measured in a fresh subprocess, so cold start includes the
+# imports (TensorFlow for deepface) and RSS is not polluted by other engines.
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import subprocess
+import time
+
+
+def _rss_mb() -> float:
+    """Current resident set size (Linux), falls back to peak RSS"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _load_images(folder, limit):
+    import cv2
+    import numpy as np
+
+    if folder:
+        files = sorted(f for f in os.listdir(folder) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+        images = [cv2.imread(os.path.join(folder, f)) for f in files[:limit]]
+        images = [img for img in images if img is not None]
+        if images:
+            return images
+
+    # no folder: random noise frames (detection misses, but the model still runs)
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(limit)]
+
+
+def run_child(engine_name: str, folder: str, runs: int):
+    """Measure one engine inside this (fresh) process and print JSON"""
+    rss_start = _rss_mb()
+    t0 = time.perf_counter()
+
+    from services.face_engines import get_engine
+    engine = get_engine(engine_name)
+    engine.warm_up()
+
+    cold_start = time.perf_counter() - t0
+    rss_loaded = _rss_mb()
+
+    images = _load_images(folder, runs)
+    latencies = []
+    for img in images:
+        t = time.perf_counter()
+        engine.embed([img])
+        latencies.append((time.perf_counter() - t) * 1000)
+    latencies.sort()
+
+    print(json.dumps({
+        "engine": engine_name,
+        "model": engine.name,
+        "cold_start_s": round(cold_start, 2),
+        "rss_start_mb": round(rss_start, 1),
+        "rss_loaded_mb": round(rss_loaded, 1),
+        "rss_after_mb": round(_rss_mb(), 1),
+        "images": len(latencies),
+        "p50_ms": round(latencies[len(latencies) // 2], 1),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face engines")
+    parser.add_argument("--engine", action="append", help="engine(s) to run (default: all)")
+    parser.add_argument("--images", help="folder of face images (default: synthetic frames)")
+    parser.add_argument("--runs", type=int, default=30, help="images to embed per engine")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.images, args.runs)
+        return
+
+    from services.face_engines import ENGINES
+    results = []
+    for name in args.engine or list(ENGINES):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--runs", str(args.runs)]
+        if args.images:
+            cmd += ["--images", args.images]
+
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(f"❌ {name} failed:\n{proc.stderr.strip()[-800:]}")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    print(f"\n{'engine':<10}{'model':<10}{'cold s':>8}{'RSS MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}")
+    for r in results:
+        print(f"{r['engine']:<10}{r['model']:<10}{r['cold_start_s']:>8}{r['rss_loaded_mb']:>9}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['mean_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
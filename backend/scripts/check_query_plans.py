@@ -0,0 +1,90 @@
+# EXPLAIN check for the hot attendance queries.
+#
+#   python scripts/check_query_plans.py
+#   python scripts/check_query_plans.py --db-url sqlite:////tmp/attendance_bench.db
+#
+# Every query must be answered through an index (no full scan of
+# `attendance`); exits 1 otherwise. Run it against a database with
+# realistic data: on a near-empty table MySQL may prefer a scan anyway.
+# Supports MySQL/MariaDB and SQLite.
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, select, text
+
+from models.attendance_model import Attendance
+
+table = Attendance.__table__
+
+
+def hot_queries(session_id="s-1", usn="U0000001", subject="Subject 1", day=None):
+    """name -> SELECT, mirroring the routes that hit attendance hardest."""
+    day = day or datetime(2025, 1, 15)
+    start, end = day, day + timedelta(days=7)
+    return {
+        "live view (since cursor)": select(table).where(
+            table.c.session_id == session_id, table.c.id > 0).order_by(table.c.id),
+        "live view present_count": select(func.count(table.c.id)).where(
+            table.c.session_id == session_id),
+        "student history page": select(table).where(
+            table.c.usn == usn).order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(51),
+        "report by subject + dates": select(table).where(
+            table.c.subject == subject, table.c.timestamp >= start, table.c.timestamp <= end),
+        "report by dates": select(table).where(
+            table.c.timestamp >= start, table.c.timestamp <= end).order_by(table.c.timestamp, table.c.id),
+    }
+
+
+def explain(conn, stmt):
+    """Returns (uses_index, plan text)."""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    dialect = conn.dialect.name
+
+    if dialect == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        details = [r[3] for r in rows]
+        scans = [d for d in details if d.startswith("SCAN") and "attendance" in d]
+        return not scans, " | ".join(details)
+
+    if dialect in ("mysql", "mariadb"):
+        rows = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+        plan = [r for r in rows if r["table"] == "attendance"]
+        uses_index = all(r["type"] != "ALL" and r["key"] for r in plan)
+        return uses_index, " | ".join(f"type={r['type']} key={r['key']} rows={r['rows']}" for r in plan)
+
+    raise SystemExit(f"EXPLAIN check not implemented for {dialect}")
+
+
+def check(engine) -> bool:
+    ok = True
+    with engine.connect() as conn:
+        for name, stmt in hot_queries().items():
+            uses_index, plan = explain(conn, stmt)
+            ok &= uses_index
+            print(f"  {'✅' if uses_index else '❌'} {name:<28} {plan}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot attendance queries")
+    parser.add_argument("--db-url", help="default: DATABASE_URL from utils/db.py")
+    args = parser.parse_args()
+
+    if args.db_url:
+        engine = create_engine(args.db_url)
+    else:
+        from utils.db import engine
+
+    print(f"🔎 {engine.url.render_as_string(hide_password=True)}")
+    if not check(engine):
+        print("❌ Some hot queries scan the attendance table (run scripts/migrate.py)")
+        sys.exit(1)
+    print("✅ All hot queries use an index")
+
+
+if __name__ == "__main__":
+    main()
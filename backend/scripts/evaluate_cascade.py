@@ -0,0 +1,160 @@
+# Offline evaluation of the two-stage verification cascade.
+#
+# Labelled folder layout:   <root>/<usn or person>/<any>.jpg
+# The first image (sorted) of every person is the reference, the others are
+# probes. Each probe is compared with its own reference (genuine pair) and
+# with up to --impostors other references (impostor pairs).
+#
+#   python scripts/evaluate_cascade.py data/faces
+#   python scripts/evaluate_cascade.py data/faces --band 0.55:0.20 --band 0.45:0.30
+#
+# Every image is embedded once per model and timed, then each band setting
+# is simulated: stage 1 latency is always paid, stage 2 only inside the band.
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+
+import cv2
+
+from utils.config import FACE_CASCADE_ACCEPT, FACE_CASCADE_REJECT
+from services import fast_face_model
+from services.face_engines import get_engine
+from services.facial_service import fast_stage_decision
+
+# stage 2 is always VGG-Face here, whatever FACE_ENGINE is set to
+deep_engine = get_engine("deepface")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def load_dataset(root: str):
+    people = {}
+    for person in sorted(os.listdir(root)):
+        folder = os.path.join(root, person)
+        if not os.path.isdir(folder):
+            continue
+        files = sorted(
+            os.path.join(folder, f) for f in os.listdir(folder)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if len(files) >= 2:
+            people[person] = files
+    return people
+
+
+def embed_all(paths):
+    """path -> (fast vector | None, fast ms, deep vector, deep ms)"""
+    out = {}
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+
+        t0 = time.perf_counter()
+        fast = fast_face_model.embed(img)
+        t1 = time.perf_counter()
+        deep = deep_engine.embed([img])[0]
+        t2 = time.perf_counter()
+
+        out[path] = (fast, (t1 - t0) * 1000, deep, (t2 - t1) * 1000)
+    return out
+
+
+def build_pairs(people, impostors: int, seed: int):
+    rng = random.Random(seed)
+    refs = {p: files[0] for p, files in people.items()}
+    pairs = []
+    for person, files in people.items():
+        others = [p for p in people if p != person]
+        for probe in files[1:]:
+            pairs.append((refs[person], probe, True))
+            for other in rng.sample(others, min(impostors, len(others))):
+                pairs.append((refs[other], probe, False))
+    return pairs
+
+
+def evaluate(pairs, emb, accept=None, reject=None, mode="cascade"):
+    correct = false_accepts = false_rejects = deep_calls = 0
+    genuine = sum(1 for _, _, same in pairs if same)
+    latency = 0.0
+
+    for ref, probe, same in pairs:
+        if ref not in emb or probe not in emb:
+            continue
+        ref_fast, _, ref_deep, _ = emb[ref]
+        probe_fast, fast_ms, probe_deep, deep_ms = emb[probe]
+
+        decision = None
+        if mode in ("cascade", "fast") and ref_fast is not None and probe_fast is not None:
+            score = fast_face_model.similarity(ref_fast, probe_fast)
+            if mode == "fast":
+                decision = score >= 0.363     # SFace's own cosine cut-off
+            else:
+                decision = fast_stage_decision(score, accept, reject)
+            latency += fast_ms
+
+        if decision is None:
+            decision = deep_engine.compare(ref_deep, probe_deep) <= deep_engine.distance_threshold
+            latency += deep_ms
+            deep_calls += 1
+
+        if decision == same:
+            correct += 1
+        elif decision:
+            false_accepts += 1
+        else:
+            false_rejects += 1
+
+    n = len(pairs)
+    return {
+        "accuracy": correct / n if n else 0,
+        "far": false_accepts / (n - genuine) if n - genuine else 0,
+        "frr": false_rejects / genuine if genuine else 0,
+        "mean_ms": latency / n if n else 0,
+        "stage2_share": deep_calls / n if n else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy vs latency of the verification cascade")
+    parser.add_argument("root", help="labelled folder: <root>/<person>/*.jpg")
+    parser.add_argument("--band", action="append", default=[],
+                        help="ACCEPT:REJECT SFace similarity band (repeatable)")
+    parser.add_argument("--impostors", type=int, default=3, help="impostor pairs per probe")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not fast_face_model.is_available():
+        sys.exit("SFace / YuNet ONNX models not found (see services/fast_face_model.py)")
+
+    people = load_dataset(args.root)
+    if len(people) < 2:
+        sys.exit("Need at least 2 people with 2+ images each")
+
+    bands = [tuple(float(v) for v in b.split(":")) for b in args.band] or [(FACE_CASCADE_ACCEPT, FACE_CASCADE_REJECT)]
+
+    print("Warming up VGG-Face...")
+    deep_engine.warm_up()
+
+    paths = [p for files in people.values() for p in files]
+    emb = embed_all(paths)
+    pairs = build_pairs(people, args.impostors, args.seed)
+    print(f"{len(people)} people, {len(emb)} images, {len(pairs)} pairs\n")
+
+    rows = [("VGG-Face only", evaluate(pairs, emb, mode="deep")),
+            ("SFace only", evaluate(pairs, emb, mode="fast"))]
+    for accept, reject in bands:
+        rows.append((f"cascade {accept:.2f}/{reject:.2f}", evaluate(pairs, emb, accept, reject)))
+
+    print(f"{'setting':<22}{'accuracy':>10}{'FAR':>8}{'FRR':>8}{'mean ms':>10}{'stage2':>9}")
+    for name, r in rows:
+        print(f"{name:<22}{r['accuracy']:>10.3f}{r['far']:>8.3f}{r['frr']:>8.3f}"
+              f"{r['mean_ms']:>10.1f}{r['stage2_share']:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
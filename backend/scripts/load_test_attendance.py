@@ -0,0 +1,161 @@
+# Load test for POST /attendance/mark: a whole section submitting at once.
+#
+# Start the server with QUERY_COUNT_HEADER=1 to also get queries/request:
+#   QUERY_COUNT_HEADER=1 uvicorn main:app --port 5000
+#   python scripts/load_test_attendance.py --seed --students 120 --concurrency 60
+#
+# --seed creates the LT students directly in the configured DB (run the
+# script against the same DB as the server); --cleanup removes them and
+# their attendance rows afterwards. Tokens are minted locally with the
+# server's JWT secret.
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.jwt_token import create_access_token
+
+
+def request(method, url, body=None, token=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            status, headers, payload = resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        status, headers, payload = e.code, e.headers, e.read()
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    queries = headers.get("x-query-count")
+    return status, elapsed_ms, int(queries) if queries is not None else None, payload
+
+
+def usns_for(prefix, count):
+    return [f"{prefix}{i:04d}" for i in range(1, count + 1)]
+
+
+def seed_students(usns, section):
+    from utils.db import SessionLocal
+    from models.user_model import User
+    from models.student_model import Student
+
+    db = SessionLocal()
+    try:
+        existing = {u for (u,) in db.query(User.usn).filter(User.usn.in_(usns))}
+        for usn in usns:
+            if usn in existing:
+                continue
+            user = User(usn=usn, name=f"Load {usn}", email=f"{usn.lower()}@loadtest.local",
+                        password_hash="loadtest", is_teacher=False, is_admin=False)
+            db.add(user)
+            db.flush()
+            db.add(Student(user_id=user.id, usn=usn, name=user.name, email=user.email, section=section))
+        db.commit()
+        print(f"🌱 Seeded {len(usns) - len(existing)} students in section {section}")
+    finally:
+        db.close()
+
+
+def cleanup_students(usns):
+    from utils.db import SessionLocal
+    from models.user_model import User
+    from models.student_model import Student
+    from models.attendance_model import Attendance
+
+    db = SessionLocal()
+    try:
+        db.query(Attendance).filter(Attendance.usn.in_(usns)).delete(synchronize_session=False)
+        db.query(Student).filter(Student.usn.in_(usns)).delete(synchronize_session=False)
+        db.query(User).filter(User.usn.in_(usns)).delete(synchronize_session=False)
+        db.commit()
+        print(f"🧹 Removed {len(usns)} load-test students and their attendance")
+    finally:
+        db.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /attendance/mark")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--section", default="LT")
+    parser.add_argument("--prefix", default="LT", help="USN prefix of the load-test students")
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=1, help="submissions per student")
+    parser.add_argument("--seed", action="store_true", help="create the students first")
+    parser.add_argument("--cleanup", action="store_true", help="delete them afterwards")
+    args = parser.parse_args()
+
+    base = args.base_url.rstrip("/")
+    usns = usns_for(args.prefix, args.students)
+    if args.seed:
+        seed_students(usns, args.section)
+
+    teacher_token = create_access_token({"usn": "LT_TEACHER", "is_teacher": True, "is_admin": False})
+    status, _, _, body = request("POST", f"{base}/qr/generate", {
+        "subject": "Load Test", "teacher_id": "LT_TEACHER", "section": args.section,
+    }, teacher_token)
+    if status != 200:
+        sys.exit(f"❌ Could not start a session: {status} {body[:200]!r}")
+    session_id = json.loads(body)["session_id"]
+    print(f"▶️  Session {session_id} for section {args.section}")
+
+    tokens = {
+        usn: create_access_token({"usn": usn, "is_teacher": False, "is_admin": False, "section": args.section})
+        for usn in usns
+    }
+
+    def mark(usn):
+        return request("POST", f"{base}/attendance/mark", {
+            "session_id": session_id, "student_id": usn, "location": {"lat": 0, "lng": 0},
+        }, tokens[usn])
+
+    jobs = usns * args.rounds
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(mark, jobs))
+    wall = time.perf_counter() - started
+
+    request("POST", f"{base}/qr/stop", {"session_id": session_id}, teacher_token)
+
+    latencies = sorted(ms for _, ms, _, _ in results)
+    statuses = {}
+    for status, _, _, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    queries = [q for _, _, q, _ in results if q is not None]
+
+    print(f"\n📊 {len(results)} requests, concurrency {args.concurrency}, {wall:.2f}s "
+          f"({len(results) / wall:.1f} req/s)")
+    print(f"   status: {statuses}")
+    print(f"   latency ms  p50 {percentile(latencies, 50):.1f}  p90 {percentile(latencies, 90):.1f}  "
+          f"p99 {percentile(latencies, 99):.1f}  max {latencies[-1]:.1f}  "
+          f"mean {statistics.mean(latencies):.1f}")
+    if queries:
+        print(f"   queries/request  mean {statistics.mean(queries):.2f}  max {max(queries)}")
+    else:
+        print("   (start the server with QUERY_COUNT_HEADER=1 for queries/request)")
+
+    if args.cleanup:
+        cleanup_students(usns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Versioned DB migrations (replaces scripts/create_tables.py).
+#
+#   python scripts/migrate.py              # apply all pending migrations
+#   python scripts/migrate.py upgrade --to 2
+#   python scripts/migrate.py status
+#
+# Uses DATABASE_URL (utils/db.py). The API also applies pending migrations
+# on startup unless AUTO_MIGRATE=0.
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from utils.db import engine
+import migrations
+
+
+def status():
+    done = migrations.applied_versions(engine)
+    print(f"🗄️  {engine.url.render_as_string(hide_password=True)}")
+    for m in migrations.discover():
+        applied_at = done.get(m.version)
+        mark = f"✅ {applied_at:%Y-%m-%d %H:%M}" if applied_at else "⏳ pending        "
+        print(f"  {m.version:04d}  {mark}  {m.name}: {m.description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status"])
+    parser.add_argument("--to", type=int, help="stop after this version")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        status()
+        return
+
+    ran = migrations.upgrade(engine, target=args.to)
+    print(f"✅ {len(ran)} migration(s) applied" if ran else "✅ Database is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Rebuild or verify the attendance rollups (attendance_daily,
+# attendance_session_stats) against the raw attendance table.
+#
+#   python scripts/rebuild_rollups.py --verify     # compare only, exit 1 on drift
+#   python scripts/rebuild_rollups.py              # recompute both tables
+#   python scripts/rebuild_rollups.py --db-url sqlite:////tmp/attendance_bench.db
+#
+# Normal marks keep the rollups current on their own; rebuild after editing
+# or deleting attendance rows by hand. The rebuild runs in one transaction.
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+
+from services import attendance_rollup
+
+
+def verify(engine) -> bool:
+    with engine.connect() as conn:
+        drift = attendance_rollup.diff(conn)
+
+    ok = True
+    for table, rows in drift.items():
+        if not rows:
+            print(f"  ✅ {table} matches attendance")
+            continue
+        ok = False
+        print(f"  ❌ {table}: rows differ (first {len(rows)})")
+        for key, expected, actual in rows:
+            print(f"     {key}: expected {expected}, found {actual}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild / verify the attendance rollups")
+    parser.add_argument("--db-url", help="default: DATABASE_URL from utils/db.py")
+    parser.add_argument("--verify", action="store_true", help="only compare, do not write")
+    args = parser.parse_args()
+
+    if args.db_url:
+        engine = create_engine(args.db_url)
+    else:
+        from utils.db import engine
+
+    print(f"🗄️  {engine.url.render_as_string(hide_password=True)}")
+
+    if not args.verify:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            daily_rows, session_rows = attendance_rollup.rebuild(conn)
+        print(f"🔁 Rebuilt {daily_rows} daily and {session_rows} session rows "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    if not verify(engine):
+        print("❌ Rollups drifted from attendance (run without --verify to rebuild)")
+        sys.exit(1)
+    print("✅ Rollups are consistent")
+
+
+if __name__ == "__main__":
+    main()
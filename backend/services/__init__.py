@@ -0,0 +1 @@
+# Service layer: logic shared by routes and CLI scripts
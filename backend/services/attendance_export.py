@@ -0,0 +1,167 @@
+# services/attendance_export.py
+#
+# Attendance report queries shared by the paginated JSON API and the
+# streaming export, and the student history page.
+# - pages are keyset-paginated on (timestamp, id), so page N costs the same
+#   as page 1 (ix_attendance_ts / ix_attendance_subject_ts)
+# - exports stream rows from a server-side cursor in chunks of
+#   EXPORT_CHUNK_ROWS and are encoded chunk by chunk (CSV or NDJSON,
+#   optionally gzip), so worker memory does not grow with the report size
+
+import base64
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+
+from utils.config import EXPORT_CHUNK_ROWS
+from utils.db import SessionLocal
+from models.attendance_model import Attendance
+
+table = Attendance.__table__
+
+REPORT_COLUMNS = ("id", "usn", "student_name", "subject", "timestamp", "qr", "location", "face", "by_teacher")
+HISTORY_COLUMNS = ("id", "timestamp", "subject", "session_id", "qr", "location", "face", "by_teacher")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# ---------------------------
+# Filters + keyset cursor
+# ---------------------------
+def report_filters(subject: Optional[str], start: Optional[datetime], end: Optional[datetime]) -> list:
+    conditions = []
+    if subject:
+        conditions.append(table.c.subject == subject)
+    if start:
+        conditions.append(table.c.timestamp >= start)
+    if end:
+        conditions.append(table.c.timestamp <= end)
+    return conditions
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts_raw, id_raw = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(ts_raw), int(id_raw)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def _report_select(conditions: list):
+    columns = [table.c[name] for name in REPORT_COLUMNS]
+    return select(*columns).where(*conditions).order_by(table.c.timestamp, table.c.id)
+
+
+def report_page(db, conditions: list, cursor: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """One page after `cursor`; returns (records, next_cursor or None)."""
+    conditions = list(conditions)
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        conditions.append(or_(
+            table.c.timestamp > ts,
+            and_(table.c.timestamp == ts, table.c.id > row_id),
+        ))
+
+    # one extra row tells whether there is a next page
+    rows = db.execute(_report_select(conditions).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    records = [_record(row) for row in rows]
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id) if has_more else None
+    return records, next_cursor
+
+
+def history_page(db, usn: str, cursor: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Newest-first page of one student's marks (ix_attendance_usn_ts)."""
+    conditions = [table.c.usn == usn]
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        conditions.append(or_(
+            table.c.timestamp < ts,
+            and_(table.c.timestamp == ts, table.c.id < row_id),
+        ))
+
+    rows = db.execute(
+        select(*[table.c[name] for name in HISTORY_COLUMNS]).where(*conditions)
+        .order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    records = [_record(row) for row in rows]
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id) if has_more else None
+    return records, next_cursor
+
+
+def _record(row) -> dict:
+    record = dict(row._mapping)
+    record["timestamp"] = row.timestamp.isoformat() if row.timestamp else None
+    return record
+
+
+# ---------------------------
+# Streaming export
+# ---------------------------
+def _chunks(conditions: list) -> Iterator[list]:
+    # dedicated session: the request's session is closed before the body
+    # has finished streaming
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            _report_select(conditions),
+            execution_options={"stream_results": True, "yield_per": EXPORT_CHUNK_ROWS},
+        )
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _encode_csv(conditions: list) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REPORT_COLUMNS)
+    for partition in _chunks(conditions):
+        # columns in REPORT_COLUMNS order; timestamp is index 4
+        writer.writerows(
+            (*row[:4], row.timestamp.isoformat() if row.timestamp else None, *row[5:])
+            for row in partition
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _encode_ndjson(conditions: list) -> Iterator[bytes]:
+    for partition in _chunks(conditions):
+        yield "".join(json.dumps(_record(row)) + "\n" for row in partition).encode()
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)   # 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(conditions: list, fmt: str, gzip: bool) -> Iterator[bytes]:
+    chunks = _encode_csv(conditions) if fmt == "csv" else _encode_ndjson(conditions)
+    return _gzip(chunks) if gzip else chunks
@@ -0,0 +1,294 @@
+# services/attendance_rollup.py
+#
+# Incrementally maintained attendance rollups (models/attendance_rollup_model.py)
+#   attendance_daily           marks per (usn, section, subject, day)
+#   attendance_session_stats   present per (session, section); one row per held session
+# attendance_store calls record_marks() for every *newly inserted* mark, on
+# the same connection, so the rollups commit or roll back with the marks
+# themselves. Merges into an existing mark change nothing here.
+# Every new mark also bumps its session's one attendance_session_stats row,
+# so concurrent marks of a class queue on that row lock until each commits.
+# With ATTENDANCE_WRITE_BEHIND the flusher batches them: one increment per
+# (session, section) per flush (services/attendance_writer.py).
+# rebuild() recomputes both tables from `attendance` (backfill, repair);
+# diff() compares them without writing (scripts/rebuild_rollups.py).
+
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models.attendance_model import Attendance
+from models.attendance_rollup_model import AttendanceDaily, SessionAttendance
+from models.active_session import ActiveSession
+from models.student_model import Student
+from services import roster_cache
+
+attendance = Attendance.__table__
+daily = AttendanceDaily.__table__
+stats = SessionAttendance.__table__
+active = ActiveSession.__table__
+students = Student.__table__
+
+_DIALECT_INSERT = {
+    "mysql": mysql.insert,
+    "mariadb": mysql.insert,
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def _dialect_name(db) -> str:
+    return db.get_bind().dialect.name if hasattr(db, "get_bind") else db.dialect.name
+
+
+def _increment(dialect_name: str, target, key: List[str], counter: str, keep: Iterable[str] = ()):
+    """INSERT ... or add the new row's `counter` to the existing one."""
+    if dialect_name not in _DIALECT_INSERT:
+        raise NotImplementedError(f"attendance rollups not supported on {dialect_name}")
+
+    stmt = _DIALECT_INSERT[dialect_name](target)
+    if dialect_name in ("mysql", "mariadb"):
+        incoming = stmt.inserted
+        updates = {counter: target.c[counter] + incoming[counter]}
+        updates.update({col: func.coalesce(target.c[col], incoming[col]) for col in keep})
+        return stmt.on_duplicate_key_update(**updates)
+
+    incoming = stmt.excluded
+    updates = {counter: target.c[counter] + incoming[counter]}
+    updates.update({col: func.coalesce(target.c[col], incoming[col]) for col in keep})
+    return stmt.on_conflict_do_update(index_elements=key, set_=updates)
+
+
+# ---------------------------
+# Incremental updates
+# ---------------------------
+def record_marks(db, rows: List[dict]):
+    """
+    Count newly inserted marks (dicts with usn, subject, session_id,
+    timestamp and optionally section). Session or Connection; does not commit.
+    """
+    if not rows:
+        return
+
+    missing = {r["usn"] for r in rows if "section" not in r}
+    sections = {}
+    if missing:
+        sections = dict(db.execute(
+            select(students.c.usn, students.c.section).where(students.c.usn.in_(missing))
+        ).all())
+
+    per_day: Counter = Counter()
+    per_session: Counter = Counter()
+    session_info: Dict[Tuple[str, str], Tuple[str, date]] = {}
+    for r in rows:
+        subject = r.get("subject") or ""
+        day = r["timestamp"].date()
+        section = (r["section"] if "section" in r else sections.get(r["usn"])) or ""
+        per_day[(r["usn"], section, subject, day)] += 1
+        per_session[(r["session_id"], section)] += 1
+        session_info.setdefault((r["session_id"], section), (subject, day))
+
+    dialect_name = _dialect_name(db)
+    db.execute(
+        _increment(dialect_name, daily, ["usn", "section", "subject", "day"], "attended"),
+        [dict(usn=usn, section=section, subject=subject, day=day, attended=n)
+         for (usn, section, subject, day), n in per_day.items()],
+    )
+
+    sizes = {section: roster_cache.section_size(db, section) for _, section in per_session if section}
+    db.execute(
+        _increment(dialect_name, stats, ["session_id", "section"], "present", keep=["roster_size"]),
+        [
+            dict(session_id=session_id, section=section, subject=session_info[(session_id, section)][0],
+                 day=session_info[(session_id, section)][1], present=n, roster_size=sizes.get(section))
+            for (session_id, section), n in per_session.items()
+        ],
+    )
+
+
+def session_opened(db, session_id: str, section: str, subject: str, day: date, roster_size: Optional[int]):
+    """A QR session counts as held even if nobody marks it."""
+    db.execute(
+        _increment(_dialect_name(db), stats, ["session_id", "section"], "present", keep=["roster_size"]),
+        [dict(session_id=session_id, section=section, subject=subject,
+              day=day, present=0, roster_size=roster_size)],
+    )
+
+
+# ---------------------------
+# Reads (all index / primary-key range scans on the rollups)
+# ---------------------------
+def session_present(db, session_id: str, section: str) -> int:
+    return db.execute(
+        select(stats.c.present).where(stats.c.session_id == session_id, stats.c.section == section)
+    ).scalar() or 0
+
+
+def student_subjects(db, usn: str, section: Optional[str]) -> List[dict]:
+    """
+    Per subject: the student's marks vs. sessions held for their section
+    (QR and manual sessions alike), two grouped queries on the rollups.
+    Marks are rolled up under the section they counted for, so attended
+    never exceeds held (marks from before a section change stay out).
+    """
+    section = section or ""
+    attended = dict(db.execute(
+        select(daily.c.subject, func.sum(daily.c.attended))
+        .where(daily.c.usn == usn, daily.c.section == section).group_by(daily.c.subject)
+    ).all())
+    held = dict(db.execute(
+        select(stats.c.subject, func.count())
+        .where(stats.c.section == section).group_by(stats.c.subject)
+    ).all())
+
+    return [
+        {
+            "subject": subject,
+            "attended": int(attended.get(subject, 0)),
+            "held": held.get(subject, 0),
+            "percentage": _percentage(int(attended.get(subject, 0)), held.get(subject, 0)),
+        }
+        for subject in sorted(attended.keys() | held.keys())
+    ]
+
+
+def _percentage(attended: int, held: int) -> float:
+    return attended / held * 100 if held else 0
+
+
+def report_summary(db, subject: Optional[str], start: Optional[date], end: Optional[date]) -> List[dict]:
+    """Per subject: sessions held, students present and attendance % over the range."""
+    conditions = []
+    if subject:
+        conditions.append(stats.c.subject == subject)
+    if start:
+        conditions.append(stats.c.day >= start)
+    if end:
+        conditions.append(stats.c.day <= end)
+
+    rows = db.execute(
+        select(
+            stats.c.subject,
+            func.count().label("sessions"),
+            func.sum(stats.c.present).label("present"),
+            func.sum(stats.c.roster_size).label("expected"),
+        ).where(*conditions).group_by(stats.c.subject).order_by(stats.c.subject)
+    ).all()
+    return [
+        {
+            "subject": r.subject,
+            "sessions": r.sessions,
+            "present": int(r.present or 0),
+            "expected": int(r.expected or 0),
+            "percentage": (int(r.present or 0) / int(r.expected) * 100) if r.expected else 0,
+        }
+        for r in rows
+    ]
+
+
+# ---------------------------
+# Full recomputation
+# ---------------------------
+def _mark_section():
+    # the section record_marks() counted the mark for: a QR session's own
+    # (marks into it are only accepted from that section), else the
+    # student's current one (manual sessions don't record it)
+    return func.coalesce(active.c.section, students.c.section, literal(""))
+
+
+def _marks_joined():
+    return (
+        attendance
+        .outerjoin(active, active.c.session_id == attendance.c.session_id)
+        .outerjoin(students, students.c.usn == attendance.c.usn)
+    )
+
+
+def _expected_daily():
+    section = _mark_section()
+    subject = func.coalesce(attendance.c.subject, literal(""))
+    day = func.date(attendance.c.timestamp)
+    return (
+        select(attendance.c.usn, section.label("section"), subject.label("subject"), day.label("day"),
+               func.count().label("attended"))
+        .select_from(_marks_joined())
+        .group_by(attendance.c.usn, section, subject, day)
+    )
+
+
+def _expected_sessions():
+    # QR sessions are dated by their start
+    section = _mark_section()
+    subject = func.coalesce(attendance.c.subject, literal(""))
+    day = func.min(func.coalesce(func.date(active.c.created_at), func.date(attendance.c.timestamp)))
+    return (
+        select(attendance.c.session_id, section.label("section"), subject.label("subject"),
+               day.label("day"), func.count().label("present"))
+        .select_from(_marks_joined())
+        .group_by(attendance.c.session_id, section, subject)
+    )
+
+
+def _unmarked_sessions():
+    marked = select(attendance.c.id).where(attendance.c.session_id == active.c.session_id).exists()
+    return select(
+        active.c.session_id, active.c.section, active.c.subject,
+        func.date(func.coalesce(active.c.created_at, active.c.expires_at)).label("day"),
+        literal(0).label("present"),
+    ).where(~marked)
+
+
+def rebuild_daily(conn) -> int:
+    """Recompute attendance_daily from `attendance`. Returns its row count."""
+    conn.execute(daily.delete())
+    conn.execute(daily.insert().from_select(["usn", "section", "subject", "day", "attended"], _expected_daily()))
+    return conn.execute(select(func.count()).select_from(daily)).scalar()
+
+
+def rebuild(conn) -> Tuple[int, int]:
+    """Recompute both rollups from `attendance`. Returns (daily rows, session rows)."""
+    daily_rows = rebuild_daily(conn)
+    conn.execute(stats.delete())
+
+    columns = ["session_id", "section", "subject", "day", "present"]
+    conn.execute(stats.insert().from_select(columns, _expected_sessions()))
+    conn.execute(stats.insert().from_select(columns, _unmarked_sessions()))
+
+    # roster size as of now: the size at the time is not recorded anywhere
+    roster = (
+        select(func.count(students.c.id)).where(students.c.section == stats.c.section).scalar_subquery()
+    )
+    conn.execute(stats.update().values(roster_size=roster))
+
+    return daily_rows, conn.execute(select(func.count()).select_from(stats)).scalar()
+
+
+def diff(conn, limit: int = 20) -> Dict[str, list]:
+    """Rollup rows that disagree with `attendance`: {table: [(key, expected, actual)]}."""
+    def compare(expected_rows, actual_rows):
+        expected = {tuple(str(v) for v in row[:-1]): row[-1] for row in expected_rows}
+        actual = {tuple(str(v) for v in row[:-1]): row[-1] for row in actual_rows}
+        bad = [
+            (key, expected.get(key, 0), actual.get(key, 0))
+            for key in expected.keys() | actual.keys()
+            if expected.get(key, 0) != actual.get(key, 0)
+        ]
+        return sorted(bad)[:limit] if limit else sorted(bad)
+
+    expected_sessions = [
+        (r.session_id, r.section, r.present) for r in conn.execute(_expected_sessions())
+    ] + [(r.session_id, r.section, 0) for r in conn.execute(_unmarked_sessions())]
+
+    return {
+        "attendance_daily": compare(
+            [(r.usn, r.section, r.subject, r.day, r.attended) for r in conn.execute(_expected_daily())],
+            conn.execute(select(daily.c.usn, daily.c.section, daily.c.subject, daily.c.day, daily.c.attended)).all(),
+        ),
+        "attendance_session_stats": compare(
+            expected_sessions,
+            conn.execute(select(stats.c.session_id, stats.c.section, stats.c.present)).all(),
+        ),
+    }
@@ -0,0 +1,182 @@
+# services/attendance_store.py
+#
+# Atomic insert-or-merge of attendance rows on the (session_id, usn) unique
+# key. A repeat mark (client retry, double tap, teacher override after a
+# QR mark) does not add a row: its verification flags are OR-ed into the
+# existing one.
+#   MySQL          INSERT IGNORE, then UPDATE the flags of existing rows
+#                  (IGNORE downgrades *every* error to a warning, so skipped
+#                  rows are checked against SHOW WARNINGS: only duplicate
+#                  keys count as "already there")
+#   SQLite / PG    INSERT ... ON CONFLICT (session_id, usn) DO NOTHING RETURNING
+# Knowing exactly which marks are new lets the attendance rollups count
+# them in the same transaction (services/attendance_rollup.py).
+#
+# Values may carry a `section` key (the student's section): it is not an
+# attendance column, only used for the rollups.
+
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models.attendance_model import Attendance
+from services import attendance_rollup
+
+table = Attendance.__table__
+
+# flags merged into an existing row; everything else keeps its first value
+MERGED_FLAGS = ("qr", "location", "face", "by_teacher")
+
+_DIALECT_INSERT = {
+    "mysql": mysql.insert,
+    "mariadb": mysql.insert,
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+_EXTRA_KEYS = ("section",)
+
+Key = Tuple[str, str]
+
+_MYSQL_DUP_ENTRY = 1062
+
+
+class ConcurrentMarkError(RuntimeError):
+    """A key in the batch was inserted by another transaction meanwhile; retry."""
+
+
+class AttendanceWriteError(RuntimeError):
+    """MySQL skipped a row for a reason other than a duplicate key (bad value, FK, ...)."""
+
+
+def _dialect_name(db) -> str:
+    name = db.get_bind().dialect.name if hasattr(db, "get_bind") else db.dialect.name
+    if name not in _DIALECT_INSERT:
+        raise NotImplementedError(f"attendance upsert not supported on {name}")
+    return name
+
+
+def _columns(values: dict) -> dict:
+    return {k: v for k, v in values.items() if k not in _EXTRA_KEYS}
+
+
+def _merge_flags(db, rows: Dict[Key, dict]):
+    """
+    OR the flags of `rows` into their existing attendance rows (one UPDATE
+    per flag and session). Rows that change get a new updated_at, so the
+    live view re-sends them.
+    """
+    now = datetime.utcnow()
+    for flag in MERGED_FLAGS:
+        by_session: Dict[str, List[str]] = {}
+        for (session_id, usn), values in rows.items():
+            if values.get(flag):
+                by_session.setdefault(session_id, []).append(usn)
+        for session_id, usns in by_session.items():
+            db.execute(
+                table.update()
+                .where(table.c.session_id == session_id, table.c.usn.in_(usns), table.c[flag] == False)  # noqa: E712
+                .values({flag: True, "updated_at": now})
+            )
+
+
+def _check_skipped(db):
+    """After an INSERT IGNORE that skipped rows (MySQL): raise unless they were all duplicate keys."""
+    problems = [
+        f"{code}: {message}" for _, code, message in db.execute(text("SHOW WARNINGS")).all()
+        if int(code) != _MYSQL_DUP_ENTRY
+    ]
+    if problems:
+        raise AttendanceWriteError("attendance insert rejected: " + "; ".join(problems))
+
+
+def upsert_one(db, values: dict) -> Tuple[int, bool]:
+    """Insert or merge one row (Session or Connection). Returns (row id, inserted)."""
+    dialect_name = _dialect_name(db)
+    columns = _columns(values)
+
+    if dialect_name in ("mysql", "mariadb"):
+        result = db.execute(mysql.insert(table).prefix_with("IGNORE").values(**columns))
+        row_id = result.lastrowid if result.rowcount == 1 else None
+        if row_id is None:
+            _check_skipped(db)
+    else:
+        stmt = _DIALECT_INSERT[dialect_name](table).values(**columns)
+        stmt = stmt.on_conflict_do_nothing(index_elements=["session_id", "usn"]).returning(table.c.id)
+        row_id = db.execute(stmt).scalar()
+
+    if row_id is not None:
+        attendance_rollup.record_marks(db, [values])
+        return row_id, True
+
+    key = (values["session_id"], values["usn"])
+    _merge_flags(db, {key: values})
+    row_id = db.execute(
+        select(table.c.id).where(table.c.session_id == key[0], table.c.usn == key[1])
+    ).scalar_one()
+    return row_id, False
+
+
+def _insert_new(db, dialect_name: str, merged: Dict[Key, dict]) -> Set[Key]:
+    """Insert the rows whose key does not exist yet; returns the inserted keys."""
+    if dialect_name in ("mysql", "mariadb"):
+        # FOR UPDATE also gap-locks the missing keys, so nobody can insert
+        # them before we do (InnoDB, REPEATABLE READ)
+        existing = set(db.execute(
+            select(table.c.session_id, table.c.usn)
+            .where(tuple_(table.c.session_id, table.c.usn).in_(list(merged)))
+            .with_for_update()
+        ).all())
+        new = [key for key in merged if key not in existing]
+        if new:
+            result = db.execute(mysql.insert(table).prefix_with("IGNORE"), [_columns(merged[k]) for k in new])
+            if result.rowcount != len(new):
+                _check_skipped(db)
+                raise ConcurrentMarkError("attendance rows were inserted concurrently; retry")
+        return set(new)
+
+    stmt = _DIALECT_INSERT[dialect_name](table).on_conflict_do_nothing(index_elements=["session_id", "usn"])
+    stmt = stmt.returning(table.c.session_id, table.c.usn)
+    return {tuple(row) for row in db.execute(stmt, [_columns(v) for v in merged.values()])}
+
+
+def upsert_many(db, rows: List[dict]) -> List[Tuple[int, bool]]:
+    """
+    Insert or merge many rows, set-based. Returns (id, inserted) in `rows`
+    order; rows sharing a key (double taps inside one batch) share both.
+    """
+    if not rows:
+        return []
+
+    # merge same-key rows first: one statement may not touch a row twice
+    merged: Dict[Key, dict] = {}
+    for values in rows:
+        key = (values["session_id"], values["usn"])
+        if key in merged:
+            first = merged[key]
+            for flag in MERGED_FLAGS:
+                first[flag] = bool(first.get(flag)) or bool(values.get(flag))
+        else:
+            merged[key] = dict(values)
+
+    dialect_name = _dialect_name(db)
+    inserted = _insert_new(db, dialect_name, merged)
+    _merge_flags(db, {key: values for key, values in merged.items() if key not in inserted})
+    attendance_rollup.record_marks(db, [merged[key] for key in inserted])
+
+    session_ids = {k[0] for k in merged}
+    usns = {k[1] for k in merged}
+    ids = {
+        (session_id, usn): row_id
+        for row_id, session_id, usn in db.execute(
+            select(table.c.id, table.c.session_id, table.c.usn).where(
+                table.c.session_id.in_(session_ids), table.c.usn.in_(usns)
+            )
+        )
+    }
+    return [
+        (ids[key], key in inserted)
+        for key in ((values["session_id"], values["usn"]) for values in rows)
+    ]
@@ -0,0 +1,218 @@
+# services/attendance_writer.py
+#
+# Optional write-behind (group commit) for attendance marks.
+# Requests validate synchronously, then drop their row into a queue and
+# block until a flusher thread has written it. The flusher collects up to
+# ATTENDANCE_FLUSH_ROWS rows or waits at most ATTENDANCE_FLUSH_MS after the
+# first one, and writes the batch with one multi-row upsert + one COMMIT:
+# one fsync for the whole burst instead of one per student.
+#
+# Callers only return after the commit, so success is still durable. If a
+# batch fails, its rows are retried one by one so a single bad row only
+# fails its own request.
+# A caller that times out cancels its row; the flusher skips cancelled rows,
+# so a 503 means "not written". If the row was already in a batch being
+# committed, the caller waits one more timeout for that commit; only if it
+# is still stuck does the 503 leave the outcome open (at-least-once: a retry
+# is safe, marks are unique per session and student).
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import List, Tuple
+
+from sqlalchemy.engine import Engine
+
+from utils.config import ATTENDANCE_FLUSH_MS, ATTENDANCE_FLUSH_ROWS, ATTENDANCE_FLUSH_TIMEOUT
+from utils.db import engine as default_engine
+from services.attendance_store import upsert_many, upsert_one
+
+_STOP = object()
+
+
+class WriteTimeout(Exception):
+    """The row was not flushed within the caller's timeout."""
+
+
+class AttendanceWriter:
+
+    def __init__(self, engine: Engine, flush_ms: float, flush_rows: int, timeout: float):
+        self.engine = engine
+        self.flush_wait = max(0.0, flush_ms) / 1000
+        self.flush_rows = max(1, flush_rows)
+        self.timeout = timeout
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+        # metrics
+        self.batches = 0
+        self.rows = 0
+        self.failed_rows = 0
+        self.cancelled_rows = 0
+        self.fallback_batches = 0
+        self.max_queue_depth = 0
+        self.max_batch = 0
+        self.total_flush_time = 0.0
+        self.total_wait_time = 0.0
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    def submit(self, values: dict) -> int:
+        """Queue one attendance row and block until it is committed. Returns its id."""
+        future: Future = Future()
+        with self._lock:
+            # checked under the lock: stop() queues its marker under it too,
+            # so a row is either ahead of the marker or written inline
+            stopped = self._stopped
+            if not stopped:
+                self._ensure_started()
+                self._queue.put((values, future, time.perf_counter()))
+        if stopped:
+            # shutting down: write inline rather than lose the mark
+            return self._insert_one(values)
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise WriteTimeout(f"attendance write not flushed within {self.timeout}s")
+        # already in a batch: that commit is under way, give it one more timeout
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise WriteTimeout(f"attendance write still committing after {2 * self.timeout}s; "
+                               "it may yet succeed, retrying is safe")
+
+    def stop(self, timeout: float = 30):
+        """Flush everything still queued, then stop the flusher."""
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is None:
+            return
+        thread.join(timeout)
+        print(f"🧾 Attendance writer drained ({self.rows} rows in {self.batches} batches)")
+
+    def metrics(self) -> dict:
+        return {
+            "flush_ms": self.flush_wait * 1000,
+            "flush_rows": self.flush_rows,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "rows": self.rows,
+            "failed_rows": self.failed_rows,
+            "cancelled_rows": self.cancelled_rows,
+            "fallback_batches": self.fallback_batches,
+            "mean_batch_size": (self.rows / self.batches) if self.batches else 0,
+            "max_batch_size": self.max_batch,
+            "mean_flush_ms": (self.total_flush_time / self.batches * 1000) if self.batches else 0,
+            "mean_wait_ms": (self.total_wait_time / self.rows * 1000) if self.rows else 0,
+        }
+
+    # ---------------------------
+    # Flusher thread
+    # ---------------------------
+    def _ensure_started(self):
+        # caller holds self._lock
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="attendance-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.perf_counter() + self.flush_wait
+            while len(batch) < self.flush_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+        # drain whatever raced in behind the stop marker
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for i in range(0, len(leftover), self.flush_rows):
+            self._flush(leftover[i:i + self.flush_rows])
+
+    def _flush(self, batch: List[Tuple[dict, Future, float]]):
+        # claim the rows; callers that already gave up cancelled theirs
+        claimed = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        self.cancelled_rows += len(batch) - len(claimed)
+        batch = claimed
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        rows = [values for values, _, _ in batch]
+
+        try:
+            ids = self._insert_many(rows)
+        except Exception:
+            # one bad row must not fail the whole burst
+            self.fallback_batches += 1
+            for values, future, _ in batch:
+                try:
+                    future.set_result(self._insert_one(values))
+                except Exception as e:
+                    self.failed_rows += 1
+                    future.set_exception(e)
+        else:
+            for (_, future, _), row_id in zip(batch, ids):
+                future.set_result(row_id)
+
+        done = time.perf_counter()
+        self.batches += 1
+        self.rows += len(batch)
+        self.max_batch = max(self.max_batch, len(batch))
+        self.total_flush_time += done - started
+        self.total_wait_time += sum(done - queued_at for _, _, queued_at in batch)
+
+    # ---------------------------
+    # SQL
+    # ---------------------------
+    def _insert_many(self, rows: List[dict]) -> List[int]:
+        """One multi-row upsert + COMMIT; ids in row order."""
+        with self.engine.begin() as conn:
+            return [row_id for row_id, _ in upsert_many(conn, rows)]
+
+    def _insert_one(self, values: dict) -> int:
+        with self.engine.begin() as conn:
+            return upsert_one(conn, values)[0]
+
+
+writer = AttendanceWriter(
+    default_engine,
+    flush_ms=ATTENDANCE_FLUSH_MS,
+    flush_rows=ATTENDANCE_FLUSH_ROWS,
+    timeout=ATTENDANCE_FLUSH_TIMEOUT,
+)
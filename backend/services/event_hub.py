@@ -0,0 +1,142 @@
+# services/event_hub.py
+#
+# In-process fan-out of live events to /events/stream subscribers, scoped by
+# section.
+# - each subscriber owns a bounded asyncio.Queue; a slow client loses its
+#   oldest events instead of growing memory (it can re-fetch on reconnect)
+# - publish() is safe to call from the sync routes (they run in the
+#   threadpool): delivery is handed to the event loop with
+#   call_soon_threadsafe
+# - an idle subscriber costs one parked coroutine and an empty queue, so
+#   a single worker can hold thousands of them
+# - students share their section's stream, so who was marked (usn, name)
+#   only goes to staff subscribers; students get the event without it
+#
+# Events only reach clients connected to the same process. With several
+# uvicorn workers put a broker in front of this (or pin /events to one worker).
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from utils.config import EVENT_QUEUE_SIZE
+
+# event data fields only teacher / admin subscribers receive
+STAFF_ONLY_FIELDS = ("usn", "usns", "student_name")
+
+
+class Subscriber:
+
+    def __init__(self, section: str, maxsize: int, staff: bool = False):
+        self.section = section
+        self.staff = staff
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, message: dict):
+        """Runs on the loop thread. Drop the oldest event when full."""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+
+class EventHub:
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subs: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    # ---------------------------
+    # Subscribers (loop thread)
+    # ---------------------------
+    # (the lock only guards against stats() reading from the threadpool)
+    def subscribe(self, section: str, staff: bool = False) -> Subscriber:
+        self._loop = asyncio.get_running_loop()
+        sub = Subscriber(section, self.queue_size, staff)
+        with self._lock:
+            self._subs[section].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            subs = self._subs.get(sub.section)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.section]
+
+    # ---------------------------
+    # Publishing (any thread)
+    # ---------------------------
+    def publish(self, section: str, event: str, data: dict):
+        """Queue an event for every subscriber of `section`. Never blocks."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not section:
+            return  # nobody has ever subscribed
+
+        with self._lock:
+            event_id = next(self._ids)
+            self.published += 1
+
+        message = {
+            "id": event_id,
+            "event": event,
+            "data": {**data, "section": section, "at": datetime.utcnow().isoformat()},
+        }
+        try:
+            loop.call_soon_threadsafe(self._fan_out, section, message)
+        except RuntimeError:
+            pass  # loop shut down between the check and the call
+
+    def _fan_out(self, section: str, message: dict):
+        public = None
+        for sub in list(self._subs.get(section, ())):
+            if sub.staff:
+                sub.offer(message)
+            else:
+                if public is None:
+                    data = {k: v for k, v in message["data"].items() if k not in STAFF_ONLY_FIELDS}
+                    public = {**message, "data": data}
+                sub.offer(public)
+            self.delivered += 1
+
+    # ---------------------------
+    # Introspection
+    # ---------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            sections = len(self._subs)
+            subs = [s for group in self._subs.values() for s in group]
+        return {
+            "subscribers": len(subs),
+            "sections": sections,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(s.dropped for s in subs),
+        }
+
+
+def format_sse(message: dict) -> str:
+    """One Server-Sent Events frame."""
+    return (
+        f"id: {message['id']}\n"
+        f"event: {message['event']}\n"
+        f"data: {json.dumps(message['data'], default=str)}\n\n"
+    )
+
+
+hub = EventHub(queue_size=EVENT_QUEUE_SIZE)
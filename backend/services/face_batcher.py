@@ -0,0 +1,137 @@
+# services/face_batcher.py
+#
+# Micro-batching in front of the embedding model.
+# Concurrent verify requests drop their probe into a queue; a collector
+# task gathers up to FACE_BATCH_MAX_SIZE probes or waits at most
+# FACE_BATCH_MAX_WAIT_MS after the first one, runs ONE batched forward pass
+# in the inference pool, and hands each embedding back to its request.
+#
+# Up to FACE_WORKERS batches are in flight at once, so every worker stays
+# busy during a burst.
+
+import asyncio
+import time
+
+from utils.config import FACE_BATCH_MAX_SIZE, FACE_BATCH_MAX_WAIT_MS, FACE_WORKERS
+from services import inference_pool
+from services.face_model import embed_bytes_batch
+
+
+class FaceBatcher:
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, max_in_flight: int):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._queue = None
+        self._collector = None
+        self._in_flight = None
+
+        # metrics
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self.total_queue_wait = 0.0
+        self.total_inference_time = 0.0
+        self.size_histogram = {}
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    async def embed(self, image_bytes: bytes):
+        """Embed one probe as part of whatever batch it lands in"""
+        if self._collector is None or self._collector.done():
+            self._start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image_bytes, future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+        return await future
+
+    async def stop(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+
+    def metrics(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": (self.items / self.batches) if self.batches else 0,
+            "mean_fill_ratio": (self.items / (self.batches * self.max_batch_size)) if self.batches else 0,
+            "batch_size_histogram": dict(sorted(self.size_histogram.items())),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_queue_wait_ms": (self.total_queue_wait / self.items * 1000) if self.items else 0,
+            "mean_batch_inference_ms": (self.total_inference_time / self.batches * 1000) if self.batches else 0,
+        }
+
+    # ---------------------------
+    # Internals
+    # ---------------------------
+    def _start(self):
+        self._queue = asyncio.Queue()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._collector = asyncio.get_running_loop().create_task(self._collect())
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._in_flight.acquire()
+            loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        try:
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.total_queue_wait += started - queued_at
+
+            try:
+                results = await inference_pool.run_async(
+                    embed_bytes_batch, [image_bytes for image_bytes, _, _ in batch]
+                )
+            except Exception as e:
+                results = [e] * len(batch)
+
+            self.total_inference_time += time.perf_counter() - started
+            self.batches += 1
+            self.items += len(batch)
+            self.size_histogram[len(batch)] = self.size_histogram.get(len(batch), 0) + 1
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():      # request was cancelled meanwhile
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._in_flight.release()
+
+
+batcher = FaceBatcher(
+    max_batch_size=FACE_BATCH_MAX_SIZE,
+    max_wait_ms=FACE_BATCH_MAX_WAIT_MS,
+    max_in_flight=max(1, FACE_WORKERS)
+)
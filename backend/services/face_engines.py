@@ -0,0 +1,290 @@
+# services/face_engines.py
+#
+# Pluggable face engines. Every backend implements the same small
+# interface (detect / embed / compare) and the app picks one with
+# FACE_ENGINE:
+#
+#   deepface  VGG-Face through DeepFace (TensorFlow)   — the original engine
+#   opencv    YuNet + SFace from opencv-contrib         — no TensorFlow at all
+#
+# Heavy imports happen lazily inside the engine that needs them, so
+# choosing "opencv" means TensorFlow is never imported by any process.
+# Stored embeddings are namespaced by `engine.name` (face_embeddings.model_name),
+# so vectors from different engines are never compared with each other.
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from importlib import metadata
+
+import cv2
+import numpy as np
+
+from utils.config import (
+    FACE_ENGINE, FACE_MODEL_NAME, FACE_DISTANCE_THRESHOLDS,
+    FACE_YUNET_MODEL, FACE_SFACE_MODEL
+)
+
+
+def _as_array(img) -> np.ndarray:
+    """Engines accept a file path or a BGR array"""
+    if isinstance(img, str):
+        arr = cv2.imread(img)
+        if arr is None:
+            raise ValueError(f"Cannot read image: {img}")
+        return arr
+    return img
+
+
+def _box(x, y, w, h, confidence) -> dict:
+    return {"x": int(x), "y": int(y), "w": int(w), "h": int(h), "confidence": float(confidence)}
+
+
+class FaceEngine(ABC):
+    """
+    key                    FACE_ENGINE value (and threshold override suffix)
+    name / version         identify the embedding space (stored with vectors)
+    default_threshold      cosine distance at or below which two faces match
+    """
+
+    key = None
+    name = None
+    version = None
+    default_threshold = None
+
+    @property
+    def distance_threshold(self) -> float:
+        # a threshold only means something in its own embedding space
+        return FACE_DISTANCE_THRESHOLDS.get(self.key, self.default_threshold)
+
+    def warm_up(self):
+        """Load weights and run one dummy image through the pipeline"""
+        self.embed([np.zeros((224, 224, 3), dtype=np.uint8)])
+
+    @abstractmethod
+    def detect(self, img) -> list:
+        """All faces in an image as {x, y, w, h, confidence} boxes"""
+
+    @abstractmethod
+    def embed(self, images) -> np.ndarray:
+        """(N, D) matrix: one embedding (largest face) per image"""
+
+    @abstractmethod
+    def embed_all_faces(self, img, detector_backend=None, min_confidence: float = 0.5):
+        """(boxes, (N, D) matrix) for EVERY face in one image"""
+
+    def compare(self, a: np.ndarray, b: np.ndarray) -> float:
+        """Cosine distance (0 = identical)"""
+        denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+        if denom == 0:
+            return 1.0
+        return 1.0 - float(np.dot(a, b)) / denom
+
+
+# ---------------------------
+# DeepFace / VGG-Face
+# ---------------------------
+class DeepFaceEngine(FaceEngine):
+
+    key = "deepface"
+    name = FACE_MODEL_NAME
+    # Bump the suffix when the preprocessing below changes, so stored vectors get re-made
+    PIPELINE_VERSION = "batch1"
+    default_threshold = 0.68
+
+    def __init__(self):
+        try:
+            deepface_version = metadata.version("deepface")
+        except metadata.PackageNotFoundError:
+            deepface_version = "unknown"
+
+        self.version = f"{deepface_version}+{self.PIPELINE_VERSION}"
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            from deepface import DeepFace
+            self._model = DeepFace.build_model(FACE_MODEL_NAME)
+        return self._model
+
+    def _input_size(self):
+        return tuple(getattr(self._get_model(), "input_shape", (224, 224)))
+
+    @staticmethod
+    def _extract_faces(img, detector_backend: str = "opencv") -> list:
+        from deepface import DeepFace
+        return DeepFace.extract_faces(
+            img_path=img,
+            detector_backend=detector_backend,
+            enforce_detection=False,
+            align=True
+        )
+
+    @staticmethod
+    def _resize_with_padding(face: np.ndarray, target_size) -> np.ndarray:
+        """Fit the face into target_size keeping aspect ratio (as DeepFace does)"""
+        h, w = target_size
+        factor = min(h / face.shape[0], w / face.shape[1])
+        face = cv2.resize(face, (max(1, int(face.shape[1] * factor)), max(1, int(face.shape[0] * factor))))
+
+        diff_h = h - face.shape[0]
+        diff_w = w - face.shape[1]
+        face = np.pad(
+            face,
+            ((diff_h // 2, diff_h - diff_h // 2), (diff_w // 2, diff_w - diff_w // 2), (0, 0)),
+            "constant"
+        )
+        if face.shape[:2] != (h, w):
+            face = cv2.resize(face, (w, h))
+
+        return face.astype(np.float32)
+
+    def _shape_face(self, face_rgb: np.ndarray) -> np.ndarray:
+        # extract_faces gives RGB in [0, 1]; the model was fed BGR by represent()
+        return self._resize_with_padding(face_rgb[:, :, ::-1], self._input_size())
+
+    def _forward(self, faces) -> np.ndarray:
+        """One forward pass over a list of shaped faces -> (N, D) matrix"""
+        return np.asarray(self._get_model().model(np.stack(faces), training=False), dtype=np.float32)
+
+    def detect(self, img, detector_backend: str = "opencv") -> list:
+        return [
+            _box(f["facial_area"]["x"], f["facial_area"]["y"], f["facial_area"]["w"],
+                 f["facial_area"]["h"], f.get("confidence") or 0)
+            for f in self._extract_faces(img, detector_backend)
+        ]
+
+    def embed(self, images) -> np.ndarray:
+        shaped = []
+        for img in images:
+            faces = self._extract_faces(img)
+            best = max(faces, key=lambda f: f["facial_area"]["w"] * f["facial_area"]["h"])
+            shaped.append(self._shape_face(best["face"]))
+        return self._forward(shaped)
+
+    def embed_all_faces(self, img, detector_backend=None, min_confidence: float = 0.5):
+        # with enforce_detection=False a miss comes back as the whole image, confidence 0
+        faces = [
+            f for f in self._extract_faces(img, detector_backend or "opencv")
+            if (f.get("confidence") or 0) >= min_confidence
+        ]
+        if not faces:
+            return [], np.zeros((0, 0), dtype=np.float32)
+
+        boxes = [
+            _box(f["facial_area"]["x"], f["facial_area"]["y"], f["facial_area"]["w"],
+                 f["facial_area"]["h"], f.get("confidence") or 0)
+            for f in faces
+        ]
+        return boxes, self._forward([self._shape_face(f["face"]) for f in faces])
+
+
+# ---------------------------
+# OpenCV DNN: YuNet + SFace
+# ---------------------------
+class OpenCVEngine(FaceEngine):
+    """
+    The ONNX files are not shipped with the repo; download them from the
+    OpenCV model zoo into ml_model/ (or point FACE_YUNET_MODEL /
+    FACE_SFACE_MODEL at them).
+    """
+
+    key = "opencv"
+    name = "SFace"
+    version = f"opencv-{cv2.__version__}"
+    # SFace's published cosine *similarity* cut-off is 0.363
+    default_threshold = 1.0 - 0.363
+
+    # detection runs on a copy no wider than this
+    DETECT_WIDTH = 640
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @staticmethod
+    def is_available() -> bool:
+        return os.path.exists(FACE_YUNET_MODEL) and os.path.exists(FACE_SFACE_MODEL)
+
+    def _models(self):
+        """YuNet + SFace instances, one pair per thread (they are not thread-safe)"""
+        local = self._local
+        if getattr(local, "recognizer", None) is None:
+            if not self.is_available():
+                raise FileNotFoundError(
+                    f"OpenCV face models missing: {FACE_YUNET_MODEL}, {FACE_SFACE_MODEL}"
+                )
+            local.detector = cv2.FaceDetectorYN.create(FACE_YUNET_MODEL, "", (320, 320), 0.7)
+            local.recognizer = cv2.FaceRecognizerSF.create(FACE_SFACE_MODEL, "")
+        return local.detector, local.recognizer
+
+    def _detect_raw(self, img: np.ndarray):
+        """YuNet rows (box + 5 landmarks + score) in full-size coordinates"""
+        detector, _ = self._models()
+
+        scale = min(1.0, self.DETECT_WIDTH / img.shape[1])
+        small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+
+        detector.setInputSize((small.shape[1], small.shape[0]))
+        _, faces = detector.detect(small)
+        if faces is None or len(faces) == 0:
+            return []
+
+        faces = faces.copy()
+        faces[:, :14] /= scale     # box + landmarks back to full-size coordinates
+        return list(faces)
+
+    def _feature(self, img: np.ndarray, face) -> np.ndarray:
+        _, recognizer = self._models()
+        aligned = recognizer.alignCrop(img, face)
+        return recognizer.feature(aligned).flatten().astype(np.float32)
+
+    def embed_one(self, img):
+        """Embedding of the largest face, or None if no face was found"""
+        img = _as_array(img)
+        faces = self._detect_raw(img)
+        if not faces:
+            return None
+        return self._feature(img, max(faces, key=lambda f: f[2] * f[3]))
+
+    def detect(self, img) -> list:
+        return [_box(*f[:4], f[14]) for f in self._detect_raw(_as_array(img))]
+
+    def embed(self, images) -> np.ndarray:
+        _, recognizer = self._models()
+        vectors = []
+        for img in images:
+            img = _as_array(img)
+            vector = self.embed_one(img)
+            if vector is None:
+                # like enforce_detection=False: fall back to the whole frame
+                vector = recognizer.feature(cv2.resize(img, (112, 112))).flatten().astype(np.float32)
+            vectors.append(vector)
+        return np.vstack(vectors)
+
+    def embed_all_faces(self, img, detector_backend=None, min_confidence: float = 0.5):
+        img = _as_array(img)
+        faces = [f for f in self._detect_raw(img) if f[14] >= min_confidence]
+        if not faces:
+            return [], np.zeros((0, 0), dtype=np.float32)
+
+        boxes = [_box(*f[:4], f[14]) for f in faces]
+        return boxes, np.vstack([self._feature(img, f) for f in faces])
+
+
+# ---------------------------
+# Selection
+# ---------------------------
+ENGINES = {engine.key: engine for engine in (DeepFaceEngine, OpenCVEngine)}
+
+_instances = {}
+
+
+def get_engine(name: str = None) -> FaceEngine:
+    """Engine instance (one per process per backend). Defaults to FACE_ENGINE."""
+    name = name or FACE_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown FACE_ENGINE '{name}', choose from {sorted(ENGINES)}")
+
+    if name not in _instances:
+        _instances[name] = ENGINES[name]()
+    return _instances[name]
@@ -0,0 +1,180 @@
+# services/face_model.py
+#
+# Pure model-side code: image decoding + embedding with the configured
+# face engine (services/face_engines.py).
+# No DB / app imports here, so inference worker processes can import this
+# module without opening database connections. DeepFace (and TensorFlow)
+# is imported lazily, only in the process that actually runs the model.
+
+import base64
+import binascii
+import threading
+
+import cv2
+import numpy as np
+
+from utils.config import MAX_FACE_IMAGE_BYTES, FACE_DECODE_SCALE
+from services.face_engines import get_engine
+
+
+# ---------------------------
+# In-memory image decoding
+# ---------------------------
+class InvalidImageError(ValueError):
+    """Raised for payloads rejected before / during decoding"""
+
+
+# Magic bytes of the formats browsers send from a canvas / camera
+_IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",        # JPEG
+    b"\x89PNG\r\n\x1a\n",   # PNG
+)
+
+_REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def decode_base64_payload(image_str: str, max_bytes: int = MAX_FACE_IMAGE_BYTES) -> bytes:
+    """
+    data URL / base64 string -> raw image bytes.
+    Cheap checks run first so oversized or garbage payloads are rejected
+    without doing any real decode work.
+    """
+    if not image_str:
+        raise InvalidImageError("Empty image")
+
+    if "," in image_str:
+        image_str = image_str.split(",", 1)[1]   # Remove "data:image/jpeg;base64,"
+
+    # base64 inflates by 4/3, so we can check the size before decoding
+    if len(image_str) * 3 // 4 > max_bytes:
+        raise InvalidImageError("Image too large")
+
+    try:
+        image_bytes = base64.b64decode(image_str, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidImageError("Invalid base64 image data")
+
+    if not image_bytes.startswith(_IMAGE_SIGNATURES) and not (
+        image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP"
+    ):
+        raise InvalidImageError("Unsupported image format")
+
+    return image_bytes
+
+
+def decode_image(image_bytes: bytes, scale: int = FACE_DECODE_SCALE) -> np.ndarray:
+    """
+    Raw bytes -> BGR numpy array, fully in memory (no temp files).
+    scale 2/4/8 uses libjpeg's reduced-resolution decode.
+    """
+    flag = _REDUCED_FLAGS.get(scale, cv2.IMREAD_COLOR)
+    img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), flag)
+
+    if img is None:
+        raise InvalidImageError("Could not decode image")
+
+    return img
+
+
+# ---------------------------
+# Cheap face detection (no deep model)
+# ---------------------------
+_cascades = threading.local()
+
+
+def get_face_cascade():
+    """Haar cascade, loaded once per thread (detectMultiScale isn't thread-safe)"""
+    cascade = getattr(_cascades, "haar", None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        )
+        _cascades.haar = cascade
+    return cascade
+
+
+# ---------------------------
+# Embedding (through the configured FACE_ENGINE)
+# ---------------------------
+_engine = get_engine()
+
+MODEL_NAME = _engine.name
+MODEL_VERSION = _engine.version
+DISTANCE_THRESHOLD = _engine.distance_threshold
+
+
+def embed_batch(images) -> np.ndarray:
+    """
+    Embed several images (file paths or BGR arrays) in one batch.
+    Returns an (N, D) float32 matrix.
+    """
+    return _engine.embed(images)
+
+
+def embed_all_faces(image_bytes: bytes, detector_backend: str = None, min_confidence: float = 0.5):
+    """
+    Detect EVERY face in one (classroom) photo and embed them in one batch.
+    Returns (boxes, matrix): boxes are {x, y, w, h, confidence} dicts, the
+    matrix is (N, D). Photos are decoded at full resolution since faces
+    at the back of a room are small.
+    """
+    return _engine.embed_all_faces(decode_image(image_bytes, scale=1), detector_backend, min_confidence)
+
+
+def embed_image(img) -> np.ndarray:
+    """
+    Run detection + embedding on one image (file path or BGR numpy array)
+    and return the embedding as a float32 vector.
+    """
+    return embed_batch([img])[0]
+
+
+def embed_bytes(image_bytes: bytes, scale: int = FACE_DECODE_SCALE) -> np.ndarray:
+    """Decode + embed one image"""
+    return embed_image(decode_image(image_bytes, scale))
+
+
+def embed_bytes_batch(items, scale: int = FACE_DECODE_SCALE) -> list:
+    """
+    Decode + embed a micro-batch (this is what inference workers run).
+    A payload that fails to decode gets its InvalidImageError back in its
+    slot instead of failing the whole batch.
+    """
+    results = [None] * len(items)
+    decoded, slots = [], []
+
+    for i, image_bytes in enumerate(items):
+        try:
+            decoded.append(decode_image(image_bytes, scale))
+            slots.append(i)
+        except InvalidImageError as e:
+            results[i] = e
+
+    if decoded:
+        for i, vector in zip(slots, embed_batch(decoded)):
+            results[i] = vector
+
+    return results
+
+
+def warm_up():
+    """
+    Load the model weights and push one dummy image through the whole
+    pipeline, so the first real request doesn't pay for graph building.
+    """
+    _engine.warm_up()
+
+
+def cosine_distance(a: np.ndarray, b: np.ndarray) -> float:
+    return _engine.compare(a, b)
+
+
+def normalise_rows(matrix: np.ndarray) -> np.ndarray:
+    """Unit-length rows (zero rows stay zero), so a @ b.T is cosine similarity"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
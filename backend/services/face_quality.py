@@ -0,0 +1,135 @@
+# services/face_quality.py
+#
+# Cheap quality gate in front of the deep model.
+# Works on a reduced-resolution greyscale decode, so unusable frames
+# (no face, face too small, too blurry) are rejected in a few milliseconds
+# with a reason code the frontend can show, instead of paying for a full
+# VGG-Face forward pass that would fail anyway.
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from utils.config import (
+    FACE_GATE_DETECTOR, FACE_YUNET_MODEL, FACE_GATE_WIDTH,
+    FACE_MIN_SIZE_PX, FACE_BLUR_THRESHOLD
+)
+from services.face_model import InvalidImageError, get_face_cascade
+
+# Reason codes (shown by the frontend)
+NO_FACE = "no_face"
+FACE_TOO_SMALL = "face_too_small"
+TOO_BLURRY = "too_blurry"
+
+REASON_MESSAGES = {
+    NO_FACE: "No face detected. Look straight at the camera.",
+    FACE_TOO_SMALL: "Face too small. Move closer to the camera.",
+    TOO_BLURRY: "Image too blurry. Hold the phone still.",
+}
+
+_local = threading.local()
+_lock = threading.Lock()
+_stats = {"checked": 0, "passed": 0, "rejected": {}, "total_ms": 0.0}
+
+
+# ---------------------------
+# Detectors (one per thread)
+# ---------------------------
+def _detect_haar(gray: np.ndarray):
+    faces = get_face_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
+    return [tuple(int(v) for v in b) for b in faces]
+
+
+def _detect_yunet(gray: np.ndarray):
+    detector = getattr(_local, "yunet", None)
+    if detector is None:
+        detector = cv2.FaceDetectorYN.create(FACE_YUNET_MODEL, "", (320, 320), 0.7)
+        _local.yunet = detector
+
+    h, w = gray.shape[:2]
+    detector.setInputSize((w, h))
+    _, faces = detector.detect(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    if faces is None:
+        return []
+    return [tuple(int(v) for v in f[:4]) for f in faces]
+
+
+_DETECTORS = {"haar": _detect_haar, "yunet": _detect_yunet}
+
+
+# ---------------------------
+# Gate
+# ---------------------------
+def _decode_small_gray(image_bytes: bytes):
+    """Reduced greyscale decode + resize to FACE_GATE_WIDTH. Returns (gray, scale to original)."""
+    gray = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_2)
+    if gray is None:
+        raise InvalidImageError("Could not decode image")
+
+    scale = 2.0
+    if gray.shape[1] > FACE_GATE_WIDTH:
+        factor = FACE_GATE_WIDTH / gray.shape[1]
+        gray = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+        scale /= factor
+
+    return gray, scale
+
+
+def check_face_quality(image_bytes: bytes) -> dict:
+    """
+    {"ok": bool, "reason": code | None, "face_px": int, "blur": float, "ms": float}
+    Raises InvalidImageError if the bytes don't decode at all.
+    """
+    started = time.perf_counter()
+    gray, scale = _decode_small_gray(image_bytes)
+
+    faces = _DETECTORS.get(FACE_GATE_DETECTOR, _detect_haar)(gray)
+    result = {"ok": False, "reason": None, "face_px": 0, "blur": 0.0}
+
+    if not faces:
+        result["reason"] = NO_FACE
+    else:
+        x, y, w, h = max(faces, key=lambda b: b[2] * b[3])
+        result["face_px"] = int(w * scale)
+
+        # sharpness of the face region (variance of the Laplacian)
+        roi = gray[max(0, y):y + h, max(0, x):x + w]
+        result["blur"] = float(cv2.Laplacian(roi, cv2.CV_64F).var()) if roi.size else 0.0
+
+        if result["face_px"] < FACE_MIN_SIZE_PX:
+            result["reason"] = FACE_TOO_SMALL
+        elif result["blur"] < FACE_BLUR_THRESHOLD:
+            result["reason"] = TOO_BLURRY
+        else:
+            result["ok"] = True
+
+    result["ms"] = (time.perf_counter() - started) * 1000
+    _record(result)
+    return result
+
+
+# ---------------------------
+# Metrics
+# ---------------------------
+def _record(result: dict):
+    with _lock:
+        _stats["checked"] += 1
+        _stats["total_ms"] += result["ms"]
+        if result["ok"]:
+            _stats["passed"] += 1
+        else:
+            _stats["rejected"][result["reason"]] = _stats["rejected"].get(result["reason"], 0) + 1
+
+
+def quality_metrics() -> dict:
+    with _lock:
+        checked = _stats["checked"]
+        return {
+            "detector": FACE_GATE_DETECTOR,
+            "checked": checked,
+            "passed": _stats["passed"],
+            "rejected": dict(_stats["rejected"]),
+            "mean_gate_ms": (_stats["total_ms"] / checked) if checked else 0,
+        }
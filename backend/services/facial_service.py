@@ -0,0 +1,205 @@
+# services/facial_service.py
+#
+# Face embedding storage + comparison.
+# The registration photo is embedded ONCE (at registration / first verify)
+# and the vector is stored in `face_embeddings`, so verification only has to
+# embed the probe image.
+#
+# Embeddings are stored per engine (face_embeddings.model_name), so
+# switching FACE_ENGINE never compares vectors from different models.
+#
+# Verification is a two-stage cascade: the fast SFace model decides clear
+# accepts / rejects, the main engine (VGG-Face) only runs for scores in the
+# uncertainty band.
+
+import os
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from utils.config import (
+    FACE_DATA_DIR, FACE_CASCADE_ENABLED, FACE_CASCADE_ACCEPT, FACE_CASCADE_REJECT
+)
+from models.face_embedding_model import FaceEmbedding
+from services import inference_pool, fast_face_model, lbph_service
+from services.face_model import (
+    MODEL_NAME, MODEL_VERSION, DISTANCE_THRESHOLD,
+    cosine_distance, embed_bytes, embed_image
+)
+
+
+# ---------------------------
+# Paths
+# ---------------------------
+def face_image_path(usn: str) -> str:
+    """Where the registration photo of a user lives"""
+    return os.path.join(FACE_DATA_DIR, f"{usn}.jpg")
+
+
+# ---------------------------
+# Storage
+# ---------------------------
+def save_embedding(db: Session, usn: str, vector: np.ndarray,
+                   model_name: str = MODEL_NAME, model_version: str = MODEL_VERSION) -> FaceEmbedding:
+    """Insert or replace the stored embedding of a user for one model"""
+    vector = np.asarray(vector, dtype=np.float32)
+
+    row = db.query(FaceEmbedding).filter(
+        FaceEmbedding.usn == usn,
+        FaceEmbedding.model_name == model_name
+    ).first()
+
+    if not row:
+        row = FaceEmbedding(usn=usn, model_name=model_name)
+        db.add(row)
+
+    row.model_version = model_version
+    row.dim = int(vector.shape[0])
+    row.vector = vector.tobytes()
+
+    db.commit()
+    return row
+
+
+def load_embedding(db: Session, usn: str,
+                   model_name: str = MODEL_NAME, model_version: str = MODEL_VERSION):
+    """
+    Stored embedding for one model, or None.
+    Vectors produced by another model version are treated as stale.
+    """
+    row = db.query(FaceEmbedding).filter(
+        FaceEmbedding.usn == usn,
+        FaceEmbedding.model_name == model_name
+    ).first()
+
+    if not row or row.model_version != model_version:
+        return None
+
+    return np.frombuffer(row.vector, dtype=np.float32, count=row.dim)
+
+
+def get_reference_embedding(db: Session, usn: str):
+    """
+    Stored embedding (configured engine) for a user. Old JPEG-only registrations are
+    backfilled lazily here (embedded once, then persisted).
+    Returns None if the user never registered a face.
+    """
+    vector = load_embedding(db, usn)
+    if vector is not None:
+        return vector
+
+    print(f"🧩 Backfilling face embedding for {usn}")
+    return backfill_embedding(db, usn)
+
+
+def backfill_embedding(db: Session, usn: str):
+    """Embed face_data/<usn>.jpg and store it. None if there is no photo."""
+    path = face_image_path(usn)
+    if not os.path.exists(path):
+        return None
+
+    vector = inference_pool.run(embed_image, path)
+    save_embedding(db, usn, vector)
+    return vector
+
+
+def get_fast_reference(db: Session, usn: str):
+    """
+    Stored SFace embedding (first cascade stage), or None: then
+    backfill_fast_reference() makes it from the registration photo.
+    """
+    if not fast_face_model.is_available():
+        return None
+    return load_embedding(db, usn, fast_face_model.SFACE_MODEL_NAME, fast_face_model.SFACE_MODEL_VERSION)
+
+
+async def backfill_fast_reference(db: Session, usn: str):
+    """
+    Embed face_data/<usn>.jpg with SFace in the inference pool and store
+    it. None if there is no photo or SFace finds no face in it.
+    """
+    path = face_image_path(usn)
+    if not os.path.exists(path):
+        return None
+
+    vector = await inference_pool.run_async(fast_face_model.embed_path, path)
+    if vector is not None:
+        await run_in_threadpool(
+            save_embedding, db, usn, vector, fast_face_model.SFACE_MODEL_NAME, fast_face_model.SFACE_MODEL_VERSION
+        )
+    return vector
+
+
+def register_face_image(db: Session, usn: str, image_bytes: bytes) -> str:
+    """
+    Save the registration photo and precompute its embeddings.
+    If embedding fails the photo is still kept; it will be backfilled
+    on first verify.
+    """
+    os.makedirs(FACE_DATA_DIR, exist_ok=True)
+    save_path = face_image_path(usn)
+
+    with open(save_path, "wb") as f:
+        f.write(image_bytes)
+
+    try:
+        save_embedding(db, usn, inference_pool.run(embed_bytes, image_bytes, 1))
+
+        if cascade_enabled():
+            fast_vector = fast_face_model.embed_bytes(image_bytes)
+            if fast_vector is not None:
+                save_embedding(db, usn, fast_vector, fast_face_model.SFACE_MODEL_NAME, fast_face_model.SFACE_MODEL_VERSION)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Could not embed face for {usn}, will backfill on verify: {e}")
+
+    # Incremental LBPH update (1:N predict), no full retrain
+    try:
+        result = lbph_service.add_face(usn, image_bytes)
+        if result["ok"]:
+            print(f"🧠 LBPH model updated for {usn} in {result['ms']:.1f} ms")
+    except Exception as e:
+        print(f"⚠️ LBPH update failed for {usn}: {e}")
+
+    return save_path
+
+
+# ---------------------------
+# Comparison
+# ---------------------------
+def compare_to_reference(reference: np.ndarray, probe: np.ndarray) -> dict:
+    """Same result shape DeepFace.verify used to give us"""
+    distance = cosine_distance(reference, probe)
+    threshold = DISTANCE_THRESHOLD
+
+    return {
+        "verified": distance <= threshold,
+        "distance": distance,
+        "threshold": threshold
+    }
+
+
+def margin_confidence(distance: float, threshold: float) -> float:
+    """1 for identical faces, 0 at the threshold, negative beyond it (both cascade stages)"""
+    return 1 - distance / threshold if threshold > 0 else 0.0
+
+
+def fast_stage_decision(score: float, accept: float = FACE_CASCADE_ACCEPT, reject: float = FACE_CASCADE_REJECT):
+    """
+    First cascade stage: True (clear accept), False (clear reject) or
+    None (uncertain -> ask VGG-Face).
+    """
+    if score >= accept:
+        return True
+    if score <= reject:
+        return False
+    return None
+
+
+def cascade_enabled() -> bool:
+    # pointless when the main engine already is SFace
+    return (
+        FACE_CASCADE_ENABLED
+        and MODEL_NAME != fast_face_model.SFACE_MODEL_NAME
+        and fast_face_model.is_available()
+    )
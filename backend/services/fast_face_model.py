@@ -0,0 +1,50 @@
+# services/fast_face_model.py
+#
+# Fast CPU face verifier used as the first stage of the verification
+# cascade: the OpenCV engine (YuNet detection + SFace 128-d embedding).
+# A few milliseconds per image, no TensorFlow.
+#
+# Without the ONNX files (see OpenCVEngine) the cascade is skipped and
+# every verification goes straight to the main engine.
+
+import cv2
+import numpy as np
+
+from services.face_engines import get_engine
+from services.face_model import decode_image
+
+_engine = get_engine("opencv")
+
+SFACE_MODEL_NAME = _engine.name
+SFACE_MODEL_VERSION = _engine.version
+# cosine distance cut-off (1 - similarity), as DISTANCE_THRESHOLD in face_model
+SFACE_DISTANCE_THRESHOLD = _engine.distance_threshold
+
+
+def is_available() -> bool:
+    return _engine.is_available()
+
+
+def warm_up():
+    """Load YuNet + SFace now (inference workers run stage 1 too)"""
+    if is_available():
+        _engine.warm_up()
+
+
+def embed(img: np.ndarray):
+    """SFace embedding of the largest face in a BGR image, or None if no face"""
+    return _engine.embed_one(img)
+
+
+def embed_bytes(image_bytes: bytes):
+    return embed(decode_image(image_bytes))
+
+
+def embed_path(path: str):
+    img = cv2.imread(path)
+    return embed(img) if img is not None else None
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity (higher = more alike; SFace's own cut-off is 0.363)"""
+    return 1.0 - _engine.compare(a, b)
@@ -0,0 +1,78 @@
+# services/inference_pool.py
+#
+# Dedicated pool for face inference.
+# TensorFlow work runs in separate worker processes (FACE_WORKERS), each of
+# which loads VGG-Face (and the SFace cascade stage, when its models are
+# present) once at boot and does a warm-up pass. Routes await
+# the result, so the event loop and FastAPI's thread pool stay free for
+# cheap DB-bound endpoints like /qr/active-session and /attendance/mark.
+#
+# FACE_WORKERS=0 runs inference in-process on one dedicated thread instead
+# (handy for development, still separate from the default thread pool).
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.config import FACE_WORKERS
+from services import face_model, fast_face_model
+
+_executor = None
+
+
+def _init_worker():
+    # Runs once in every worker process
+    face_model.warm_up()
+    fast_face_model.warm_up()
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+def start_pool():
+    """Create the pool and wait until every worker has warmed up"""
+    global _executor
+    if _executor is not None:
+        return
+
+    if FACE_WORKERS > 0:
+        # spawn, not fork: TensorFlow is not fork-safe
+        _executor = ProcessPoolExecutor(
+            max_workers=FACE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        # Submitting N tasks at once makes the executor start all N workers now
+        pids = {f.result() for f in [_executor.submit(_worker_pid) for _ in range(FACE_WORKERS)]}
+        print(f"🧠 Face inference pool ready: {len(pids)} worker process(es)")
+    else:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-inference")
+        _executor.submit(face_model.warm_up).result()
+        _executor.submit(fast_face_model.warm_up).result()
+        print("🧠 Face inference running in-process (FACE_WORKERS=0)")
+
+
+def shutdown_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+def _get_executor():
+    if _executor is None:
+        # e.g. CLI scripts that never called start_pool()
+        start_pool()
+    return _executor
+
+
+def run(fn, *args):
+    """Blocking call into the pool (for sync code paths and scripts)"""
+    return _get_executor().submit(fn, *args).result()
+
+
+async def run_async(fn, *args):
+    """Await a pool call without blocking the event loop"""
+    return await asyncio.wrap_future(_get_executor().submit(fn, *args))
@@ -0,0 +1,304 @@
+# services/lbph_service.py
+#
+# LBPH face recognizer (1:N identification) built from face_data/.
+# - full (re)train from every registered photo: train_model()
+# - incremental update when a face is registered: add_face()
+#   (LBPHFaceRecognizer.update() appends histograms, no retrain)
+# - label <-> USN map kept next to the model file
+# - the model is held in memory once per process; if another process
+#   updated the file on disk, it is reloaded before the next prediction
+# - writing the model file is O(all samples), so registrations only update
+#   memory and a background timer persists them in one write
+#   LBPH_SAVE_DELAY seconds after the first (flush() on shutdown). Files are
+#   written to a temp name and renamed, so readers never see half a model.
+# - every uvicorn worker keeps its own copy, so a save is read-merge-write
+#   under a lock file: if another process saved since we loaded, its model
+#   is read back and our pending faces are added on top before writing
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from utils.config import FACE_DATA_DIR, LBPH_MODEL_PATH, LBPH_LABELS_PATH, LBPH_THRESHOLD, LBPH_SAVE_DELAY
+from services.face_model import decode_image, get_face_cascade
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+MODEL_PATH = LBPH_MODEL_PATH
+LABELS_PATH = LBPH_LABELS_PATH
+
+# LBPH compares histograms of same-size crops
+FACE_SIZE = (200, 200)
+
+_lock = threading.Lock()
+_state = {
+    "recognizer": None,
+    "label_to_usn": {},
+    "usn_to_label": {},
+    "mtime": None,
+    "last_train_s": None,
+    "last_update_ms": None,
+    "last_save_ms": None,
+    "dirty": False,        # in-memory updates not written yet
+    "pending": [],         # (usn, face) added since the last save, for the merge
+    "save_timer": None,
+}
+
+
+# ---------------------------
+# Preprocessing
+# ---------------------------
+def extract_face(img: np.ndarray):
+    """Largest Haar face of a BGR/grey image as an equalised 200x200 grey crop, or None"""
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    faces = get_face_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4)
+    if len(faces) == 0:
+        return None
+
+    x, y, w, h = max(faces, key=lambda b: b[2] * b[3])
+    face = cv2.resize(gray[y:y + h, x:x + w], FACE_SIZE)
+    return cv2.equalizeHist(face)
+
+
+# ---------------------------
+# Persistence
+# ---------------------------
+@contextmanager
+def _disk_lock():
+    """Serialise model writes across worker processes."""
+    os.makedirs(os.path.dirname(MODEL_PATH) or ".", exist_ok=True)
+    with open(MODEL_PATH + ".lock", "a+") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _disk_version():
+    return os.stat(MODEL_PATH).st_mtime_ns if os.path.exists(MODEL_PATH) else None
+
+
+def _read_disk():
+    """(recognizer, usn_to_label) from the model files"""
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(MODEL_PATH)
+    with open(LABELS_PATH) as f:
+        usn_to_label = {usn: int(label) for usn, label in json.load(f).items()}
+    return recognizer, usn_to_label
+
+
+def _add_samples(recognizer, usn_to_label: dict, samples):
+    """Append (usn, face) samples, new USNs get the next labels. Returns the recognizer."""
+    faces, labels = [], []
+    for usn, face in samples:
+        faces.append(face)
+        labels.append(usn_to_label.setdefault(usn, max(usn_to_label.values(), default=-1) + 1))
+    labels = np.array(labels, dtype=np.int32)
+    if recognizer is None:
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.train(faces, labels)
+    else:
+        recognizer.update(faces, labels)
+    return recognizer
+
+
+def _save(recognizer, usn_to_label: dict):
+    """Write model + labels (write-then-rename). Call with _lock and _disk_lock held."""
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(MODEL_PATH) or ".", exist_ok=True)
+
+    # OpenCV picks the format from the extension: keep it on the temp name
+    root, ext = os.path.splitext(MODEL_PATH)
+    tmp = f"{root}.tmp{ext}"
+    recognizer.write(tmp)
+    os.replace(tmp, MODEL_PATH)
+
+    tmp = LABELS_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(usn_to_label, f)
+    os.replace(tmp, LABELS_PATH)
+
+    _state["mtime"] = _disk_version()
+    _state["dirty"] = False
+    _state["pending"] = []
+    _state["last_save_ms"] = (time.perf_counter() - started) * 1000
+
+
+def _persist():
+    """Merge with what other processes saved, then write. Call with _lock held."""
+    with _disk_lock():
+        if _state["pending"] and _disk_version() not in (None, _state["mtime"]) and os.path.exists(LABELS_PATH):
+            recognizer, usn_to_label = _read_disk()
+            recognizer = _add_samples(recognizer, usn_to_label, _state["pending"])
+            _set_state(recognizer, usn_to_label)
+        _save(_state["recognizer"], _state["usn_to_label"])
+
+
+def flush():
+    """Write pending incremental updates now (background timer, shutdown)."""
+    with _lock:
+        _state["save_timer"] = None
+        if _state["dirty"] and _state["recognizer"] is not None:
+            _persist()
+
+
+def _schedule_save():
+    """Persist the in-memory model soon, batching registrations. Call with _lock held."""
+    _state["dirty"] = True
+    if LBPH_SAVE_DELAY <= 0:
+        _persist()
+        return
+    if _state["save_timer"] is None:
+        timer = threading.Timer(LBPH_SAVE_DELAY, flush)
+        timer.daemon = True
+        _state["save_timer"] = timer
+        timer.start()
+
+
+def _set_state(recognizer, usn_to_label: dict):
+    _state["recognizer"] = recognizer
+    _state["usn_to_label"] = dict(usn_to_label)
+    _state["label_to_usn"] = {label: usn for usn, label in usn_to_label.items()}
+    _state["mtime"] = _disk_version()
+
+
+def _ensure_loaded():
+    """Load from disk once, or again if another process rewrote the model. Call with _lock held."""
+    if _state["dirty"] or not os.path.exists(MODEL_PATH) or not os.path.exists(LABELS_PATH):
+        # unsaved local updates are newer than the file
+        return _state["recognizer"]
+
+    if _state["recognizer"] is not None and _state["mtime"] == _disk_version():
+        return _state["recognizer"]
+
+    recognizer, usn_to_label = _read_disk()
+    _set_state(recognizer, usn_to_label)
+    return recognizer
+
+
+# ---------------------------
+# Training
+# ---------------------------
+def train_model() -> dict:
+    """Full retrain from every face_data/<usn>.jpg. Returns stats incl. duration."""
+    started = time.perf_counter()
+
+    files = sorted(
+        f for f in os.listdir(FACE_DATA_DIR)
+        if f.endswith(".jpg") and not f.startswith("temp_")
+    ) if os.path.isdir(FACE_DATA_DIR) else []
+
+    usn_to_label, faces, labels, skipped = {}, [], [], []
+    for name in files:
+        usn = name[:-4]
+        img = cv2.imread(os.path.join(FACE_DATA_DIR, name))
+        face = extract_face(img) if img is not None else None
+        if face is None:
+            skipped.append(usn)
+            continue
+
+        label = usn_to_label.setdefault(usn, len(usn_to_label))
+        faces.append(face)
+        labels.append(label)
+
+    if not faces:
+        return {"ok": False, "faces": 0, "skipped": skipped, "seconds": time.perf_counter() - started}
+
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(faces, np.array(labels, dtype=np.int32))
+
+    # the photos of pending registrations are in face_data/ already
+    with _lock, _disk_lock():
+        _save(recognizer, usn_to_label)
+        _set_state(recognizer, usn_to_label)
+        seconds = time.perf_counter() - started
+        _state["last_train_s"] = seconds
+
+    return {"ok": True, "faces": len(faces), "skipped": skipped, "seconds": seconds}
+
+
+def add_face(usn: str, image_bytes: bytes) -> dict:
+    """
+    Incremental update with one newly registered face (no retrain).
+    A re-registered USN keeps its label; its old sample stays until the
+    next full train_model().
+    """
+    started = time.perf_counter()
+
+    face = extract_face(decode_image(image_bytes, scale=1))
+    if face is None:
+        return {"ok": False, "reason": "no_face"}
+
+    with _lock:
+        recognizer = _ensure_loaded()
+        usn_to_label = dict(_state["usn_to_label"])
+        recognizer = _add_samples(recognizer, usn_to_label, [(usn, face)])
+        label = usn_to_label[usn]
+
+        _state["recognizer"] = recognizer
+        _state["usn_to_label"] = usn_to_label
+        _state["label_to_usn"][label] = usn
+        _state["pending"].append((usn, face))
+        _schedule_save()
+        ms = (time.perf_counter() - started) * 1000
+        _state["last_update_ms"] = ms
+
+    return {"ok": True, "label": label, "ms": ms}
+
+
+# ---------------------------
+# Prediction (1:N)
+# ---------------------------
+def predict(img: np.ndarray) -> dict:
+    """
+    Identify the face in an image among all registered students.
+    distance is LBPH's chi-square distance (lower = closer).
+    """
+    face = extract_face(img)
+    if face is None:
+        return {"matched": False, "reason": "no_face"}
+
+    with _lock:
+        recognizer = _ensure_loaded()
+        if recognizer is None:
+            return {"matched": False, "reason": "model_not_trained"}
+
+        label, distance = recognizer.predict(face)
+        usn = _state["label_to_usn"].get(label)
+
+    matched = usn is not None and distance <= LBPH_THRESHOLD
+    return {
+        "matched": matched,
+        "usn": usn if matched else None,
+        "closest_usn": usn,
+        "distance": float(distance),
+        "threshold": LBPH_THRESHOLD,
+    }
+
+
+def metrics() -> dict:
+    return {
+        "labels": len(_state["usn_to_label"]),
+        "last_train_s": _state["last_train_s"],
+        "last_update_ms": _state["last_update_ms"],
+        "last_save_ms": _state["last_save_ms"],
+        "unsaved_updates": _state["dirty"],
+    }
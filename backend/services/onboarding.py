@@ -0,0 +1,272 @@
+# services/onboarding.py
+#
+# Bulk student / teacher onboarding from CSV or NDJSON (admin import
+# endpoint and scripts/import_people.py).
+# 1. every row is parsed and validated up front (same schemas as the
+#    single-person admin endpoints); duplicates inside the file are errors
+# 2. one set-based query finds USNs / emails that already exist
+# 3. valid rows are written in chunks of ONBOARD_CHUNK_ROWS, one transaction
+#    per chunk: multi-row INSERT into users, one SELECT for the new ids,
+#    multi-row INSERT into students / teachers
+# A chunk that still hits a unique key (concurrent insert) is retried row
+# by row, so the report stays per-row.
+# The person schemas live here (not in routes/) so scripts can validate
+# without importing the admin router.
+
+import csv
+import io
+import json
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from models.user_model import User
+from models.student_model import Student
+from models.teacher_model import Teacher
+
+users = User.__table__
+students = Student.__table__
+teachers = Teacher.__table__
+
+
+# ---------------------------
+# Schemas (POST /admin/students, /admin/teachers and bulk import)
+# ---------------------------
+class NewStudentSchema(BaseModel):
+    usn: str
+    name: str
+    email: str
+    department: str
+    year: int
+    section: str
+    password: str
+
+class NewTeacherSchema(BaseModel):
+    teacher_id: str
+    name: str
+    email: str
+    phone_number: Optional[str] = None
+    qualification: Optional[str] = None
+    subjects: List[str]
+    password: str
+
+
+IMPORT_SCHEMAS = {"students": NewStudentSchema, "teachers": NewTeacherSchema}
+KINDS = tuple(IMPORT_SCHEMAS)
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+# ---------------------------
+# Parsing
+# ---------------------------
+def _clean(record: dict) -> dict:
+    # CSV gives "" for empty cells: treat them as missing
+    cleaned = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        key = key.strip().lower()
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                value = None
+        cleaned[key] = value
+    return cleaned
+
+
+def parse_records(data: bytes, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """(line number, record) pairs; CSV needs a header row."""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFormatError("File is not UTF-8")
+
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            raise ImportFormatError("CSV has no header row")
+        for record in reader:
+            yield reader.line_num, _clean(record)
+    elif fmt == "ndjson":
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, {"__error__": f"invalid JSON: {e.msg}"}
+                continue
+            yield line_no, _clean(record) if isinstance(record, dict) else {"__error__": "not a JSON object"}
+    else:
+        raise ImportFormatError(f"Unknown format: {fmt} (csv or ndjson)")
+
+
+def _prepare(kind: str, record: dict) -> dict:
+    if kind == "teachers":
+        record.setdefault("teacher_id", record.pop("usn", None))
+        subjects = record.get("subjects")
+        if isinstance(subjects, str):
+            # CSV: "AI;CN" (or "AI|CN")
+            record["subjects"] = [s.strip() for s in subjects.replace("|", ";").split(";") if s.strip()]
+        elif subjects is None:
+            record["subjects"] = []
+    return record
+
+
+def _key(kind: str, row: BaseModel) -> str:
+    return row.teacher_id if kind == "teachers" else row.usn
+
+
+# ---------------------------
+# Validation
+# ---------------------------
+def validate(kind: str, schema, records: Iterator[Tuple[int, dict]], db) -> Tuple[List[Tuple[int, BaseModel]], List[dict], int]:
+    """Returns (valid rows, per-row errors, rows read)."""
+    valid: List[Tuple[int, BaseModel]] = []
+    errors: List[dict] = []
+    seen_keys: Dict[str, int] = {}
+    seen_emails: Dict[str, int] = {}
+    total = 0
+
+    for line_no, record in records:
+        total += 1
+        if "__error__" in record:
+            errors.append({"line": line_no, "usn": None, "error": record["__error__"]})
+            continue
+        try:
+            row = schema(**_prepare(kind, record))
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+            errors.append({"line": line_no, "usn": record.get("usn") or record.get("teacher_id"), "error": message})
+            continue
+
+        key, email = _key(kind, row), row.email.lower()
+        if key in seen_keys:
+            errors.append({"line": line_no, "usn": key, "error": f"duplicate of line {seen_keys[key]}"})
+            continue
+        if email in seen_emails:
+            errors.append({"line": line_no, "usn": key, "error": f"email duplicates line {seen_emails[email]}"})
+            continue
+        seen_keys[key] = line_no
+        seen_emails[email] = line_no
+        valid.append((line_no, row))
+
+    # one set-based lookup for everything that already exists
+    if valid:
+        keys = [_key(kind, row) for _, row in valid]
+        emails = [row.email.lower() for _, row in valid]
+        # emails match case-insensitively (plain = is case-sensitive on SQLite / Postgres)
+        existing = db.execute(
+            select(users.c.usn, users.c.email)
+            .where(or_(users.c.usn.in_(keys), func.lower(users.c.email).in_(emails)))
+        ).all()
+        taken_keys = {usn for usn, _ in existing}
+        taken_emails = {(email or "").lower() for _, email in existing}
+
+        remaining = []
+        for line_no, row in valid:
+            key = _key(kind, row)
+            if key in taken_keys:
+                errors.append({"line": line_no, "usn": key, "error": "USN already exists"})
+            elif row.email.lower() in taken_emails:
+                errors.append({"line": line_no, "usn": key, "error": "email already exists"})
+            else:
+                remaining.append((line_no, row))
+        valid = remaining
+
+    errors.sort(key=lambda e: e["line"])
+    return valid, errors, total
+
+
+# ---------------------------
+# Inserts
+# ---------------------------
+def _user_row(kind: str, row: BaseModel) -> dict:
+    return dict(
+        usn=_key(kind, row), name=row.name, email=row.email,
+        password_hash=row.password,   # plain, like the single-person endpoints
+        is_teacher=kind == "teachers", is_admin=False,
+    )
+
+
+def _profile_rows(kind: str, rows: List[BaseModel], user_ids: Dict[str, int]) -> List[dict]:
+    if kind == "teachers":
+        return [
+            dict(user_id=user_ids[r.teacher_id], teacher_id=r.teacher_id, phone_number=r.phone_number,
+                 qualification=r.qualification, subjects_taken=r.subjects, timetable={})
+            for r in rows
+        ]
+    return [
+        dict(user_id=user_ids[r.usn], usn=r.usn, name=r.name, email=r.email,
+             department=r.department, year=r.year, section=r.section)
+        for r in rows
+    ]
+
+
+def _insert_chunk(db, kind: str, rows: List[BaseModel]):
+    db.execute(users.insert(), [_user_row(kind, r) for r in rows])
+    keys = [_key(kind, r) for r in rows]
+    user_ids = dict(db.execute(select(users.c.usn, users.c.id).where(users.c.usn.in_(keys))).all())
+    profile = teachers if kind == "teachers" else students
+    db.execute(profile.insert(), _profile_rows(kind, rows, user_ids))
+
+
+def insert_rows(db, kind: str, valid: List[Tuple[int, BaseModel]], chunk_rows: int) -> Tuple[int, List[dict]]:
+    """Insert in chunks (one commit each). Returns (inserted, per-row errors)."""
+    inserted, errors = 0, []
+    for offset in range(0, len(valid), chunk_rows):
+        chunk = valid[offset:offset + chunk_rows]
+        try:
+            _insert_chunk(db, kind, [row for _, row in chunk])
+            db.commit()
+            inserted += len(chunk)
+        except IntegrityError:
+            db.rollback()
+            for line_no, row in chunk:
+                try:
+                    _insert_chunk(db, kind, [row])
+                    db.commit()
+                    inserted += 1
+                except IntegrityError as e:
+                    db.rollback()
+                    errors.append({"line": line_no, "usn": _key(kind, row), "error": f"rejected by DB: {e.orig}"})
+    return inserted, errors
+
+
+def import_people(db, kind: str, schema, data: bytes, fmt: str, chunk_rows: int,
+                  skip_invalid: bool = False, dry_run: bool = False, max_errors: Optional[int] = None) -> dict:
+    """
+    Validate everything, then insert. Unless skip_invalid, any invalid row
+    means nothing is inserted. Returns the report (errors capped at max_errors).
+    """
+    if kind not in KINDS:
+        raise ImportFormatError(f"Unknown kind: {kind} ({' or '.join(KINDS)})")
+
+    started = time.perf_counter()
+    valid, errors, total = validate(kind, schema, parse_records(data, fmt), db)
+    validated = time.perf_counter()
+
+    inserted = 0
+    if not dry_run and valid and (skip_invalid or not errors):
+        inserted, insert_errors = insert_rows(db, kind, valid, chunk_rows)
+        errors.extend(insert_errors)
+    done = time.perf_counter()
+
+    return {
+        "kind": kind,
+        "rows": total,
+        "valid": len(valid),
+        "inserted": inserted,
+        "failed": len(errors),
+        "dry_run": dry_run,
+        "errors": errors[:max_errors] if max_errors else errors,
+        "validate_seconds": round(validated - started, 3),
+        "insert_seconds": round(done - validated, 3),
+        "rows_per_second": round(inserted / (done - validated), 1) if inserted and done > validated else 0,
+    }
@@ -0,0 +1,93 @@
+# services/principal_cache.py
+#
+# Who a token belongs to, for the role checks (require_admin, teacher-only
+# routes). The JWT's is_admin / is_teacher claims are only as fresh as the
+# login, so roles are read from the DB, but once per user rather than on
+# every request: principals are cached by email, bounded LRU + TTL. Admin
+# endpoints that change users call invalidate(); the TTL covers changes
+# made by other workers.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+
+from utils.config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
+from models.user_model import User
+from models.student_model import Student
+from models.teacher_model import Teacher
+
+
+class Principal(NamedTuple):
+    user_id: int
+    usn: Optional[str]
+    email: str
+    is_admin: bool
+    is_teacher: bool
+    section: Optional[str]      # students only
+    teacher_id: Optional[str]   # teachers only
+
+
+class PrincipalCache:
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self.hits = 0
+
+    def _load(self, db, email: str) -> Optional[Principal]:
+        row = db.execute(
+            select(User.id, User.usn, User.email, User.is_admin, User.is_teacher,
+                   Student.section, Teacher.teacher_id)
+            .outerjoin(Student, Student.user_id == User.id)
+            .outerjoin(Teacher, Teacher.user_id == User.id)
+            .where(User.email == email)
+        ).first()
+        if row is None:
+            return None
+        user_id, usn, email, is_admin, is_teacher, section, teacher_id = row
+        return Principal(user_id, usn, email, bool(is_admin), bool(is_teacher), section, teacher_id)
+
+    def get(self, db, email: Optional[str]) -> Optional[Principal]:
+        """Principal for `email` (one SELECT on a miss). Unknown users are not cached."""
+        if not email:
+            return None
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(email)
+                self.hits += 1
+                return entry[1]
+
+        principal = self._load(db, email)
+        if principal is not None:
+            with self._lock:
+                self._entries[email] = (time.monotonic(), principal)
+                self._entries.move_to_end(email)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return principal
+
+    def for_token(self, db, token: dict) -> Optional[Principal]:
+        return self.get(db, token.get("email") or token.get("sub"))
+
+    def invalidate(self, usns: Optional[Iterable[str]] = None, emails: Optional[Iterable[str]] = None):
+        """Forget the given users (by USN / teacher id or email), or everyone when neither is given."""
+        with self._lock:
+            if usns is None and emails is None:
+                self._entries.clear()
+                return
+            usns, emails = set(usns or ()), set(emails or ())
+            stale = [
+                key for key, (_, p) in self._entries.items()
+                if key in emails or p.usn in usns or p.teacher_id in usns
+            ]
+            for key in stale:
+                del self._entries[key]
+
+
+principals = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
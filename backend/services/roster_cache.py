@@ -0,0 +1,41 @@
+# services/roster_cache.py
+#
+# Section roster sizes for the live attendance view. Counting the section on
+# every refresh is wasted work: rosters change only through the admin
+# endpoints, which call invalidate(). The TTL covers writes made by other
+# workers.
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from utils.config import ROSTER_CACHE_TTL
+from models.student_model import Student
+
+_lock = threading.Lock()
+_sizes: Dict[str, Tuple[int, float]] = {}   # section -> (count, loaded_at)
+
+
+def section_size(db, section: str) -> int:
+    """Number of students in `section` (SELECT COUNT(*), cached). Session or Connection."""
+    cached = _sizes.get(section)
+    if cached and time.monotonic() - cached[1] < ROSTER_CACHE_TTL:
+        return cached[0]
+
+    count = db.execute(
+        select(func.count(Student.id)).where(Student.section == section)
+    ).scalar() or 0
+    with _lock:
+        _sizes[section] = (count, time.monotonic())
+    return count
+
+
+def invalidate(section: Optional[str] = None):
+    """Forget one section's size, or all of them when section is None."""
+    with _lock:
+        if section is None:
+            _sizes.clear()
+        else:
+            _sizes.pop(section, None)
@@ -0,0 +1,148 @@
+# services/session_cache.py
+#
+# In-process read-through cache of the active QR sessions, keyed by section
+# (and indexed by session_id).
+# - filled from the DB once (and re-read at most every ACTIVE_SESSION_CACHE_TTL
+#   seconds, so sessions started by another worker show up)
+# - updated explicitly by qr_routes.generate_qr / stop_qr
+# - expiry is evaluated lazily from expires_at; nothing is written to the
+#   DB on the read path
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from utils.config import ACTIVE_SESSION_CACHE_TTL
+from models.active_session import ActiveSession
+
+
+@dataclass(frozen=True)
+class SessionSnapshot:
+    session_id: str
+    subject: str
+    teacher_id: str
+    section: str
+    created_at: Optional[datetime]
+    expires_at: datetime
+
+    def is_open(self, now: datetime = None) -> bool:
+        now = now or datetime.utcnow()
+        return self.expires_at is None or self.expires_at > _naive(now)
+
+    @classmethod
+    def from_row(cls, row: ActiveSession) -> "SessionSnapshot":
+        return cls(
+            session_id=row.session_id,
+            subject=row.subject,
+            teacher_id=row.teacher_id,
+            section=row.section,
+            created_at=_naive(row.created_at),
+            expires_at=_naive(row.expires_at),
+        )
+
+
+def _naive(dt):
+    # MySQL gives naive UTC; SQLite / tz-aware columns may not
+    return dt.replace(tzinfo=None) if dt is not None and dt.tzinfo else dt
+
+
+class ActiveSessionCache:
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._by_section: Dict[str, SessionSnapshot] = {}
+        self._by_id: Dict[str, SessionSnapshot] = {}
+        self._loaded_at = None
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    def _stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return self.ttl > 0 and (time.monotonic() - self._loaded_at) > self.ttl
+
+    def _ensure_loaded(self, db: Session):
+        if not self._stale():
+            return
+
+        now = datetime.utcnow()
+        rows = (
+            db.query(ActiveSession)
+            .filter(ActiveSession.active == True, ActiveSession.expires_at > now)
+            .order_by(ActiveSession.created_at)
+            .all()
+        )
+        with self._lock:
+            self._by_section = {}
+            for row in rows:
+                # newest session wins per section
+                self._by_section[row.section] = SessionSnapshot.from_row(row)
+            self._by_id = {s.session_id: s for s in self._by_section.values()}
+            self._loaded_at = time.monotonic()
+
+    # ---------------------------
+    # Reads (hot path)
+    # ---------------------------
+    def for_section(self, db: Session, section: str) -> Optional[SessionSnapshot]:
+        self._ensure_loaded(db)
+        snap = self._by_section.get(section)
+        return snap if snap and snap.is_open() else None
+
+    def latest(self, db: Session) -> Optional[SessionSnapshot]:
+        """Newest open session of any section"""
+        self._ensure_loaded(db)
+        now = datetime.utcnow()
+        open_sessions = [s for s in self._by_section.values() if s.is_open(now)]
+        if not open_sessions:
+            return None
+        return max(open_sessions, key=lambda s: s.created_at or datetime.min)
+
+    def by_id(self, db: Session, session_id: str) -> Optional[SessionSnapshot]:
+        self._ensure_loaded(db)
+        snap = self._by_id.get(session_id)
+        return snap if snap and snap.is_open() else None
+
+    # ---------------------------
+    # Explicit invalidation (writers)
+    # ---------------------------
+    def started(self, row: ActiveSession, exclusive: bool = True):
+        """
+        A new session was committed. exclusive: all other sessions were deactivated.
+        Returns the snapshots it replaced.
+        """
+        snap = SessionSnapshot.from_row(row)
+        with self._lock:
+            if exclusive:
+                replaced = list(self._by_section.values())
+                by_section = {}
+            else:
+                replaced = [s for s in (self._by_section.get(snap.section),) if s]
+                by_section = dict(self._by_section)
+            by_section[snap.section] = snap
+            self._by_section = by_section
+            self._by_id = {s.session_id: s for s in by_section.values()}
+        return replaced
+
+    def stopped(self, session_id: str) -> Optional[SessionSnapshot]:
+        with self._lock:
+            snap = self._by_id.get(session_id)
+            if not snap:
+                return None
+            self._by_section = {k: v for k, v in self._by_section.items() if v.session_id != session_id}
+            self._by_id = {k: v for k, v in self._by_id.items() if k != session_id}
+        return snap
+
+    def clear(self):
+        with self._lock:
+            self._by_section = {}
+            self._by_id = {}
+            self._loaded_at = None
+
+
+active_sessions = ActiveSessionCache(ttl=ACTIVE_SESSION_CACHE_TTL)
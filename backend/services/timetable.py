@@ -0,0 +1,243 @@
+# services/timetable.py
+#
+# Weekly timetable (models/timetable_slot_model.py).
+# - "9:00-10:00" / "Monday" strings are parsed once, on write, into minute
+#   offsets and a day number
+# - per-section and per-teacher slot lists are cached in-process, sorted by
+#   week minute, so "what's on now / next" is a bisect over a handful of
+#   slots. Writers (admin upload / add slot) call invalidate(); the TTL
+#   covers writes made by other workers.
+
+import re
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+
+from utils.config import TIMETABLE_CACHE_TTL, TIMETABLE_TZ
+from models.timetable_slot_model import TimetableSlot
+
+table = TimetableSlot.__table__
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+_DAY_LOOKUP = {name.lower(): i for i, name in enumerate(DAYS)}
+_DAY_LOOKUP.update({name[:3].lower(): i for i, name in enumerate(DAYS)})
+
+_TIME_RANGE_RE = re.compile(
+    r"^\s*(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?\s*(?:-|–|to)\s*(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?\s*$",
+    re.IGNORECASE,
+)
+
+
+# ---------------------------
+# Parsing / formatting
+# ---------------------------
+def parse_day(value) -> int:
+    if isinstance(value, int) and 0 <= value < 7:
+        return value
+    day = _DAY_LOOKUP.get(str(value).strip().lower())
+    if day is None:
+        raise ValueError(f"Unknown day: {value!r}")
+    return day
+
+
+# Without am/pm, hours 1-7 are afternoon: timetables are written on a
+# 12-hour clock ("12:00-1:00", "2:00-3:00"); nobody teaches at 2 a.m.
+# A start hour in that range stays morning when the end is not afternoon;
+# a 0-prefixed or >12 hour ("01:00", "13:00") marks the range as 24h.
+_AFTERNOON_HOURS = range(1, 8)
+
+
+def _minutes(hour: str, minute: Optional[str], meridiem: Optional[str]) -> int:
+    h, m = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= h <= 12:
+            raise ValueError(f"Invalid hour: {h}")
+        h = h % 12 + (12 if meridiem.lower() == "pm" else 0)
+    if not (0 <= h < 24 and 0 <= m < 60):
+        raise ValueError(f"Invalid time: {hour}:{minute or '00'}")
+    return h * 60 + m
+
+
+def parse_time_range(value: str) -> Tuple[int, int]:
+    """"9:00-10:00" -> (540, 600); "1:00-2:00" -> (780, 840). 24h or am/pm; bare 1-7 mean p.m."""
+    match = _TIME_RANGE_RE.match(value or "")
+    if not match:
+        raise ValueError(f"Invalid time range: {value!r} (expected e.g. 9:00-10:00)")
+    h1, m1, ap1, h2, m2, ap2 = match.groups()
+    end = _minutes(h2, m2, ap2)
+    if ap1 or not ap2:
+        start = _minutes(h1, m1, ap1)
+    else:
+        # "1-2pm" borrows the end's meridiem, "11:00-12:00 PM" can't (23:00)
+        start = _minutes(h1, m1, ap2)
+        if start >= end:
+            start = _minutes(h1, m1, "am" if ap2.lower() == "pm" else "pm")
+    clock_24h = any(h.startswith("0") or int(h) > 12 for h in (h1, h2))
+    if not (ap1 or ap2 or clock_24h):
+        # "12:00-1:00" / "2-3" but "7:30-8:30" stays morning
+        end_pm = int(h2) in _AFTERNOON_HOURS
+        if end_pm:
+            end += 12 * 60
+        if int(h1) in _AFTERNOON_HOURS and (end_pm or end >= 13 * 60):
+            start += 12 * 60
+    if end <= start:
+        raise ValueError(f"Time range ends before it starts: {value!r}")
+    return start, end
+
+
+def format_time_range(start_min: int, end_min: int) -> str:
+    # zero-padded 24h, so it parses back to the same range
+    return f"{start_min // 60:02d}:{start_min % 60:02d}-{end_min // 60:02d}:{end_min % 60:02d}"
+
+
+def slot_row(teacher_id: str, slot: dict) -> dict:
+    """Columns for one {"day", "time", "subject", "section"} slot; ValueError if invalid."""
+    subject = (slot.get("subject") or "").strip()
+    section = (slot.get("section") or "").strip()
+    if not subject or not section:
+        raise ValueError("Slot needs a subject and a section")
+    start_min, end_min = parse_time_range(slot.get("time"))
+    return dict(
+        teacher_id=teacher_id, section=section, subject=subject,
+        day=parse_day(slot.get("day")), start_min=start_min, end_min=end_min,
+    )
+
+
+# ---------------------------
+# Cached reads
+# ---------------------------
+class Slot(NamedTuple):
+    teacher_id: str
+    section: str
+    subject: str
+    day: int
+    start_min: int
+    end_min: int
+
+    def to_dict(self) -> dict:
+        return {
+            "day": DAYS[self.day],
+            "time": format_time_range(self.start_min, self.end_min),
+            "start_min": self.start_min,
+            "end_min": self.end_min,
+            "subject": self.subject,
+            "section": self.section,
+            "teacher_id": self.teacher_id,
+        }
+
+
+class _Week(NamedTuple):
+    loaded_at: float
+    slots: List[Slot]      # sorted by (day, start_min)
+    starts: List[int]      # week minute of each slot's start, for bisect
+
+
+class TimetableCache:
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._weeks: Dict[Tuple[str, str], _Week] = {}   # ("section"|"teacher", key) -> week
+
+    def _week(self, db, kind: str, key: str) -> _Week:
+        cached = self._weeks.get((kind, key))
+        if cached and time.monotonic() - cached.loaded_at < self.ttl:
+            return cached
+
+        column = table.c.section if kind == "section" else table.c.teacher_id
+        rows = db.execute(
+            select(table.c.teacher_id, table.c.section, table.c.subject,
+                   table.c.day, table.c.start_min, table.c.end_min)
+            .where(column == key)
+            .order_by(table.c.day, table.c.start_min)
+        ).all()
+        slots = [Slot(*row) for row in rows]
+        week = _Week(time.monotonic(), slots, [s.day * 1440 + s.start_min for s in slots])
+        with self._lock:
+            self._weeks[(kind, key)] = week
+        return week
+
+    def section_slots(self, db, section: str) -> List[Slot]:
+        return self._week(db, "section", section).slots
+
+    def teacher_slots(self, db, teacher_id: str) -> List[Slot]:
+        return self._week(db, "teacher", teacher_id).slots
+
+    def now_and_next(self, db, kind: str, key: str, at: datetime) -> Tuple[Optional[Slot], Optional[Slot]]:
+        """The slot running at `at` (if any) and the next one to start (wrapping to next week)."""
+        week = self._week(db, kind, key)
+        if not week.slots:
+            return None, None
+
+        minute = at.weekday() * 1440 + at.hour * 60 + at.minute
+        i = bisect_right(week.starts, minute)
+
+        current = None
+        if i > 0:
+            candidate = week.slots[i - 1]
+            if minute < candidate.day * 1440 + candidate.end_min:
+                current = candidate
+        upcoming = week.slots[i % len(week.slots)]
+        return current, upcoming
+
+    def invalidate(self, sections: Iterable[str] = (), teachers: Iterable[str] = ()):
+        with self._lock:
+            for section in sections:
+                self._weeks.pop(("section", section), None)
+            for teacher_id in teachers:
+                self._weeks.pop(("teacher", teacher_id), None)
+
+
+timetable_cache = TimetableCache(TIMETABLE_CACHE_TTL)
+
+
+def teacher_week_slots(db, teacher_ids: List[str]) -> List[Slot]:
+    """Slots of many teachers in one query (listings; not cached)."""
+    rows = db.execute(
+        select(table.c.teacher_id, table.c.section, table.c.subject,
+               table.c.day, table.c.start_min, table.c.end_min)
+        .where(table.c.teacher_id.in_(teacher_ids))
+        .order_by(table.c.teacher_id, table.c.day, table.c.start_min)
+    ).all()
+    return [Slot(*row) for row in rows]
+
+
+def _timetable_zone():
+    if TIMETABLE_TZ:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(TIMETABLE_TZ)
+    return None   # astimezone(None) = server local time
+
+
+def local_now() -> datetime:
+    """Wall-clock time the timetable is written in (TIMETABLE_TZ, default server local)."""
+    return datetime.now(_timetable_zone()).replace(tzinfo=None)
+
+
+def to_local(at: datetime) -> datetime:
+    """An aware datetime converted to timetable wall-clock time; naive ones are taken as already local."""
+    if at.tzinfo is None:
+        return at
+    return at.astimezone(_timetable_zone()).replace(tzinfo=None)
+
+
+# ---------------------------
+# Writes (callers commit, then timetable_cache.invalidate)
+# ---------------------------
+def replace_teacher_slots(db, teacher_id: str, rows: List[dict]) -> set:
+    """Replace a teacher's whole week with `rows` (from slot_row). Returns the sections touched."""
+    old_sections = {s for (s,) in db.execute(
+        select(table.c.section).where(table.c.teacher_id == teacher_id).distinct()
+    )}
+    db.execute(table.delete().where(table.c.teacher_id == teacher_id))
+    if rows:
+        db.execute(table.insert(), rows)
+    return old_sections | {r["section"] for r in rows}
+
+
+def add_slot(db, row: dict):
+    db.execute(table.insert().values(**row))
@@ -0,0 +1,52 @@
+# tests/conftest.py
+#
+# Tests run against a throwaway SQLite file with query budgets enforced
+# (QUERY_BUDGET_MODE=raise). The environment has to be set before any
+# backend module is imported: config and the budget decorators are read
+# at import time.
+# Run with: python -m pytest -q   (needs pytest and httpx)
+
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="attendance-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+os.environ["FACE_WORKERS"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import migrations
+from utils import query_counter
+from utils.db import SessionLocal, engine
+from utils.jwt_token import create_access_token
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    migrations.upgrade(engine)
+    query_counter.install(engine)   # main does this too, but only once imported
+    return engine
+
+
+@pytest.fixture
+def db(db_engine):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def client(db_engine):
+    from main import app
+    return TestClient(app)
+
+
+def auth_header(**claims) -> dict:
+    return {"Authorization": "Bearer " + create_access_token(claims)}
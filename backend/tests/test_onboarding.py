@@ -0,0 +1,16 @@
+# tests/test_onboarding.py
+
+from models.user_model import User
+from services import onboarding
+
+CSV = b"usn,name,email,department,year,section,password\n1ON001,New,mixed@onboard.test,CSE,2,A,pw\n"
+
+
+def test_existing_email_matches_case_insensitively(db):
+    db.add(User(usn="1ON900", name="Old", email="Mixed@Onboard.test", password_hash="x"))
+    db.commit()
+
+    report = onboarding.import_people(db, "students", onboarding.NewStudentSchema, CSV, "csv", 100, dry_run=True)
+
+    assert report["valid"] == 0
+    assert report["errors"] == [{"line": 2, "usn": "1ON001", "error": "email already exists"}]
@@ -0,0 +1,100 @@
+# tests/test_query_budgets.py
+#
+# The list endpoints declare a statement budget (@query_budget); with
+# QUERY_BUDGET_MODE=raise an N+1 regression fails the request instead of
+# only slowing it down. Enough rows are seeded that a per-row query would
+# blow every budget.
+
+import pytest
+
+from models.student_model import Student
+from models.teacher_model import Teacher
+from models.timetable_slot_model import TimetableSlot
+from models.user_model import User
+from routes import admin_routes, teacher_override_routes
+from utils.query_counter import QueryBudgetExceeded, query_budget
+
+from conftest import auth_header
+
+TEACHERS = 6
+STUDENTS = 8
+
+
+@pytest.fixture(scope="module", autouse=True)
+def people(db_engine):
+    from utils.db import SessionLocal
+    db = SessionLocal()
+    db.add(User(usn="ADM1", name="Admin", email="admin@test", password_hash="x", is_admin=True))
+    for i in range(TEACHERS):
+        user = User(usn=f"FAC{i}", name=f"Teacher {i}", email=f"fac{i}@test",
+                    password_hash="x", is_teacher=True)
+        db.add(user)
+        db.flush()
+        db.add(Teacher(user_id=user.id, teacher_id=f"FAC{i}", subjects_taken=["AI", "CN"]))
+        db.add(TimetableSlot(teacher_id=f"FAC{i}", section="A", subject="AI",
+                             day=i % 5, start_min=540, end_min=600))
+    for i in range(STUDENTS):
+        user = User(usn=f"1XX{i:03d}", name=f"Student {i}", email=f"stu{i}@test", password_hash="x")
+        db.add(user)
+        db.flush()
+        db.add(Student(user_id=user.id, usn=f"1XX{i:03d}", name=f"Student {i}", email=f"stu{i}@test",
+                       department="CSE", year=3, section="A" if i % 2 else "B"))
+    db.commit()
+    db.close()
+
+
+ADMIN = auth_header(sub="admin@test", email="admin@test", usn="ADM1", is_admin=True)
+TEACHER = auth_header(sub="fac0@test", email="fac0@test", usn="FAC0", is_teacher=True)
+
+
+def test_budgets_are_enforced():
+    # decorators are pass-through when the mode is "off"
+    for route in (admin_routes.list_teachers, admin_routes.list_students,
+                  teacher_override_routes.list_students_by_section):
+        assert hasattr(route, "__wrapped__"), route.__name__
+
+
+def test_over_budget_block_raises(db):
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(1, "n+1"):
+            for teacher in db.query(Teacher).all():
+                db.query(User).filter(User.id == teacher.user_id).first()
+
+
+@pytest.mark.parametrize("params", [
+    "",
+    "?fields=name,email",
+    "?fields=name,timetable",
+    "?limit=2",
+    "?limit=2&cursor=FAC1",
+])
+def test_list_teachers_within_budget(client, params):
+    r = client.get("/admin/teachers" + params, headers=ADMIN)
+    assert r.status_code == 200, r.text
+    assert r.json()["teachers"]
+
+
+def test_list_teachers_timetable_is_one_query_per_page(client):
+    teachers = client.get("/admin/teachers", headers=ADMIN).json()["teachers"]
+    assert len(teachers) == TEACHERS
+    assert all(len(t["timetable"]["slots"]) == 1 for t in teachers)
+
+
+@pytest.mark.parametrize("params", [
+    "",
+    "?fields=usn,section",
+    "?department=CSE&year=3&section=A",
+    "?limit=3",
+    "?limit=3&cursor=1XX002",
+])
+def test_list_students_within_budget(client, params):
+    r = client.get("/admin/students" + params, headers=ADMIN)
+    assert r.status_code == 200, r.text
+    assert r.json()["students"]
+
+
+@pytest.mark.parametrize("params", ["", "?fields=usn", "?limit=2", "?limit=2&cursor=1XX001"])
+def test_students_by_section_within_budget(client, params):
+    r = client.get("/teacher/students/A" + params, headers=TEACHER)
+    assert r.status_code == 200, r.text
+    assert all(s.get("usn") for s in r.json()["students"])
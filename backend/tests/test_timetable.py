@@ -0,0 +1,50 @@
+# tests/test_timetable.py
+#
+# Timetable strings are parsed once, on write and in migration m0005;
+# a misread range either lands in the wrong slot or is rejected.
+
+import importlib
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from models.teacher_model import Teacher
+from models.timetable_slot_model import TimetableSlot
+from services.timetable import parse_time_range
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("9:00-10:00", (540, 600)),
+    ("7:30-8:30", (450, 510)),
+    ("1:00-2:00", (780, 840)),          # bare 1-7 are p.m.
+    ("12:00-1:00", (720, 780)),
+    ("13:00-14:00", (780, 840)),
+    ("1-2pm", (780, 840)),              # start borrows the end's meridiem
+    ("10:00 AM-1:00 PM", (600, 780)),
+    ("11:00-12:00 PM", (660, 720)),     # ... unless that puts it after the end
+    ("11:30 - 12:30 PM", (690, 750)),
+    ("11-12pm", (660, 720)),
+    ("11:00-1:00 PM", (660, 780)),
+])
+def test_parse_time_range(value, expected):
+    assert parse_time_range(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "9-", "10:00-9:00", "11-12am", "25:00-26:00"])
+def test_parse_time_range_rejects(value):
+    with pytest.raises(ValueError):
+        parse_time_range(value)
+
+
+def test_m0005_skips_unparsable_slots():
+    m0005 = importlib.import_module("migrations.m0005_timetable_slots")
+    engine = create_engine("sqlite://")
+    Teacher.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(Teacher.__table__.insert(), [dict(user_id=1, teacher_id="FAC1", timetable={"slots": [
+            {"day": "Monday", "time": "11:00-12:00 PM", "subject": "AI", "section": "A"},
+            {"day": "Monday", "time": "half past nine", "subject": "CN", "section": "A"},
+        ]})])
+        m0005.upgrade(conn)
+        rows = conn.execute(select(TimetableSlot.__table__.c.subject, TimetableSlot.__table__.c.start_min)).all()
+    assert rows == [("AI", 660)]
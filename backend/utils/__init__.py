@@ -1,4 +1,14 @@
 # Utility package initializer
+#
+# get_db / verify_token are re-exported lazily, so importing a light module
+# such as utils.config (e.g. in face inference workers) doesn't pull in the
+# database layer.
 
-from .db import get_db
-from .jwt_token import verify_token
+def __getattr__(name):
+    if name == "get_db":
+        from .db import get_db
+        return get_db
+    if name == "verify_token":
+        from .jwt_token import verify_token
+        return verify_token
+    raise AttributeError(f"module 'utils' has no attribute {name!r}")
@@ -5,4 +5,99 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'attendance.db')}")
 JWT_SECRET = os.getenv("JWT_SECRET", "supersecretkey")  # change in prod
 JWT_ALGORITHM = "HS256"
-QR_EXPIRY_SECONDS = 60 * 5  # QR valid for 5 minutes
\ No newline at end of file
+QR_EXPIRY_SECONDS = 60 * 5  # QR valid for 5 minutes
+
+# Face recognition
+FACE_DATA_DIR = os.getenv("FACE_DATA_DIR", "face_data")
+FACE_ENGINE = os.getenv("FACE_ENGINE", "deepface")   # "deepface" (VGG-Face) or "opencv" (YuNet + SFace)
+FACE_MODEL_NAME = "VGG-Face"                         # model used by the deepface engine
+# cosine distance threshold per engine (FACE_DISTANCE_THRESHOLD_DEEPFACE /
+# _OPENCV); unset = the engine's own default. The older FACE_DISTANCE_THRESHOLD
+# was tuned for VGG-Face and still applies to the deepface engine only.
+FACE_DISTANCE_THRESHOLDS = {
+    engine: float(value)
+    for engine, value in {
+        "deepface": os.getenv("FACE_DISTANCE_THRESHOLD_DEEPFACE") or os.getenv("FACE_DISTANCE_THRESHOLD"),
+        "opencv": os.getenv("FACE_DISTANCE_THRESHOLD_OPENCV"),
+    }.items()
+    if value
+}
+# Upload cap for base64 face images (decoded bytes)
+MAX_FACE_IMAGE_BYTES = int(os.getenv("MAX_FACE_IMAGE_BYTES", str(2 * 1024 * 1024)))
+# 1 = full resolution, 2/4/8 = let libjpeg decode at 1/2, 1/4, 1/8 size
+FACE_DECODE_SCALE = int(os.getenv("FACE_DECODE_SCALE", "1"))
+# Face inference worker processes (0 = in-process, one dedicated thread)
+FACE_WORKERS = int(os.getenv("FACE_WORKERS", "1"))
+# Micro-batching of concurrent /facial/verify probes
+FACE_BATCH_MAX_SIZE = int(os.getenv("FACE_BATCH_MAX_SIZE", "16"))
+FACE_BATCH_MAX_WAIT_MS = float(os.getenv("FACE_BATCH_MAX_WAIT_MS", "25"))
+# Classroom-photo (1:N) attendance
+MAX_CLASSROOM_IMAGE_BYTES = int(os.getenv("MAX_CLASSROOM_IMAGE_BYTES", str(12 * 1024 * 1024)))
+CLASSROOM_DETECTOR = os.getenv("CLASSROOM_DETECTOR", "opencv")   # e.g. "retinaface" for small faces
+# Pre-inference quality gate (runs before VGG-Face)
+FACE_GATE_DETECTOR = os.getenv("FACE_GATE_DETECTOR", "haar")     # "haar" or "yunet"
+FACE_YUNET_MODEL = os.getenv("FACE_YUNET_MODEL", os.path.join(BASE_DIR, "ml_model", "face_detection_yunet_2023mar.onnx"))
+FACE_GATE_WIDTH = int(os.getenv("FACE_GATE_WIDTH", "320"))       # gate works on a downscaled copy
+FACE_MIN_SIZE_PX = int(os.getenv("FACE_MIN_SIZE_PX", "80"))      # min face width in the original image
+FACE_BLUR_THRESHOLD = float(os.getenv("FACE_BLUR_THRESHOLD", "40"))  # Laplacian variance of the face
+# Two-stage verification cascade: fast OpenCV SFace first, VGG-Face only
+# when the SFace cosine similarity falls inside [REJECT, ACCEPT)
+FACE_SFACE_MODEL = os.getenv("FACE_SFACE_MODEL", os.path.join(BASE_DIR, "ml_model", "face_recognition_sface_2021dec.onnx"))
+FACE_CASCADE_ENABLED = os.getenv("FACE_CASCADE_ENABLED", "1") == "1"
+FACE_CASCADE_ACCEPT = float(os.getenv("FACE_CASCADE_ACCEPT", "0.55"))
+FACE_CASCADE_REJECT = float(os.getenv("FACE_CASCADE_REJECT", "0.20"))
+# LBPH (1:N) recognizer
+LBPH_MODEL_PATH = os.getenv("LBPH_MODEL_PATH", os.path.join(BASE_DIR, "ml_model", "lbph_model.yml"))
+LBPH_LABELS_PATH = os.getenv("LBPH_LABELS_PATH", os.path.join(BASE_DIR, "ml_model", "lbph_labels.json"))
+LBPH_THRESHOLD = float(os.getenv("LBPH_THRESHOLD", "70"))   # LBPH distance; lower = closer
+LBPH_SAVE_DELAY = float(os.getenv("LBPH_SAVE_DELAY", "5"))   # seconds registrations are batched before the model file is rewritten (0 = every time)
+# Active QR session cache: seconds before the in-process copy is re-read
+# from the DB (only matters with several workers; 0 = trust the cache)
+ACTIVE_SESSION_CACHE_TTL = float(os.getenv("ACTIVE_SESSION_CACHE_TTL", "5"))
+# Live session view: how far the ?since= cursor is re-read, in seconds, so
+# rows committed out of order (slow transactions, write-behind) are not missed
+LIVE_CURSOR_OVERLAP = float(os.getenv("LIVE_CURSOR_OVERLAP", "10"))
+# Live push (/events/stream): per-subscriber queue bound and SSE keep-alive
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "64"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+# Cached section roster sizes (seconds; admin writes invalidate explicitly)
+ROSTER_CACHE_TTL = float(os.getenv("ROSTER_CACHE_TTL", "300"))
+# Verified JWTs kept in memory (LRU, 0 = verify every request)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Cached principals (user id, roles, section, teacher id) behind the role
+# checks: seconds and max entries; admin user changes invalidate explicitly
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+# Add X-Query-Count / X-Response-Time-Ms to every response (load testing)
+QUERY_COUNT_HEADER = os.getenv("QUERY_COUNT_HEADER", "0") == "1"
+# Per-route SQL statement budgets (utils/query_counter.query_budget):
+# "off", "warn" (log overruns) or "raise" (fail the request; use in tests)
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off")
+# Write-behind (group commit) for /attendance/mark: marks are queued and
+# written in one multi-row INSERT every FLUSH_MS or FLUSH_ROWS rows
+ATTENDANCE_WRITE_BEHIND = os.getenv("ATTENDANCE_WRITE_BEHIND", "0") == "1"
+ATTENDANCE_FLUSH_MS = float(os.getenv("ATTENDANCE_FLUSH_MS", "10"))
+ATTENDANCE_FLUSH_ROWS = int(os.getenv("ATTENDANCE_FLUSH_ROWS", "200"))
+ATTENDANCE_FLUSH_TIMEOUT = float(os.getenv("ATTENDANCE_FLUSH_TIMEOUT", "10"))   # seconds a caller waits
+# Idempotency-Key replay cache for the attendance write endpoints
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "600"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+# Apply pending DB migrations on startup (turn off when several workers
+# start at once and run `python scripts/migrate.py` before deploying)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1") == "1"
+# Admin attendance report: JSON page size and export fetch chunk
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", "500"))
+REPORT_MAX_PAGE_SIZE = int(os.getenv("REPORT_MAX_PAGE_SIZE", "5000"))
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+# Student attendance history: records per page (newest first)
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "200"))
+# Admin / teacher listings: max rows per page when ?limit= is given
+LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", "1000"))
+# Timetable slots cache (seconds; admin timetable writes invalidate explicitly)
+TIMETABLE_CACHE_TTL = float(os.getenv("TIMETABLE_CACHE_TTL", "300"))
+# Time zone timetables are written in, e.g. "Asia/Kolkata" (default: server local time)
+TIMETABLE_TZ = os.getenv("TIMETABLE_TZ", "")
+# Bulk student / teacher import: rows per insert transaction, errors listed in the response
+ONBOARD_CHUNK_ROWS = int(os.getenv("ONBOARD_CHUNK_ROWS", "500"))
+ONBOARD_MAX_ERRORS = int(os.getenv("ONBOARD_MAX_ERRORS", "1000"))
@@ -0,0 +1,67 @@
+# utils/idempotency.py
+#
+# Idempotency-Key support: the first successful response for a key is
+# remembered (per caller and endpoint) and replayed for retries of the same
+# request, without touching the DB again. In-process, LRU + TTL bounded.
+# Each entry keeps a fingerprint of the request body: reusing a key with a
+# different body is a client bug and gets 422 instead of a stale replay.
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+
+from utils.config import IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL
+
+
+def fingerprint(body: Any) -> str:
+    """Stable hash of a JSON-able request body."""
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyCache:
+
+    def __init__(self, max_keys: int, ttl: float):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, str, Any]]" = OrderedDict()
+        self.replays = 0
+
+    def get(self, scope: str, caller: str, key: Optional[str], body_hash: str):
+        """The stored response for a retry; 422 if the key was used with another body."""
+        if not key:
+            return None
+        entry_key = (scope, caller, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                return None
+            stored_at, stored_hash, response = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[entry_key]
+                return None
+            if stored_hash != body_hash:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used with a different request body"
+                )
+            self._entries.move_to_end(entry_key)
+            self.replays += 1
+            return response
+
+    def put(self, scope: str, caller: str, key: Optional[str], body_hash: str, response: Any):
+        if not key:
+            return
+        with self._lock:
+            self._entries[(scope, caller, key)] = (time.monotonic(), body_hash, response)
+            self._entries.move_to_end((scope, caller, key))
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+
+idempotency = IdempotencyCache(max_keys=IDEMPOTENCY_MAX_KEYS, ttl=IDEMPOTENCY_TTL)
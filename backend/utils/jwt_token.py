@@ -1,7 +1,12 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from fastapi import HTTPException, Header
 import jwt
-from utils.config import JWT_SECRET, JWT_ALGORITHM
+from utils.config import JWT_SECRET, JWT_ALGORITHM, TOKEN_CACHE_SIZE
 
 def create_access_token(data: dict, expires_minutes: int = 60*24):
     """Create a JWT access token"""
@@ -10,11 +15,69 @@ def create_access_token(data: dict, expires_minutes: int = 60*24):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+# ---------------------------
+# Verified token cache
+# ---------------------------
+class TokenCache:
+    """
+    LRU of tokens whose signature already checked out, keyed by the token's
+    SHA-256, so a client sending the same bearer token on every request
+    skips the HMAC + JSON decode. Entries die at the token's own `exp`.
+    Invalid tokens are never cached.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return dict(payload)
+
+    def put(self, token: str, payload: dict):
+        if self.max_size <= 0 or "exp" not in payload:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(payload["exp"]), dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
 def decode_access_token(token: str):
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except Exception:
         return None
+    token_cache.put(token, payload)
+    return payload
 
 def verify_token(authorization: str = Header(None)):
     if not authorization:
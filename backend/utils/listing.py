@@ -0,0 +1,60 @@
+# utils/listing.py
+#
+# Column-projected listings for the admin / teacher list endpoints.
+# A listing is a dict of public field name -> SQL column; only the fields
+# asked for (?fields=usn,name) are selected, rows are plain tuples (no ORM
+# objects), and ?limit= switches on keyset pagination over a unique key
+# column (?cursor= is the key of the last row of the previous page).
+
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from utils.config import LIST_MAX_PAGE_SIZE
+
+
+def select_fields(fields: Optional[str], columns: Dict[str, object], key: str) -> Dict[str, object]:
+    """The requested subset of `columns` (all when `fields` is empty); `key` is always included."""
+    if not fields:
+        return columns
+
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [n for n in names if n not in columns]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(columns)})"
+        )
+    if key not in names:
+        names.insert(0, key)
+    return {n: columns[n] for n in names}
+
+
+def fetch_page(query, columns: Dict[str, object], key: str,
+               limit: Optional[int], cursor: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+    """
+    Run `query` (already selecting `columns`, in order) ordered by `key`.
+    Without `limit` every row is returned. Returns (rows, next_cursor).
+    """
+    key_column = columns[key]
+    query = query.order_by(key_column)
+    if cursor:
+        query = query.filter(key_column > cursor)
+
+    if limit is None:
+        rows, has_more = query.all(), False
+    else:
+        limit = max(1, min(limit, LIST_MAX_PAGE_SIZE))
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+    names = list(columns)
+    records = [dict(zip(names, row)) for row in rows]
+    next_cursor = records[-1][key] if has_more else None
+    return records, next_cursor
+
+
+def labelled(columns: Dict[str, object]) -> list:
+    """Columns for db.query(), labelled with their public names."""
+    return [column.label(name) for name, column in columns.items()]
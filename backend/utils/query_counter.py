@@ -0,0 +1,141 @@
+# utils/query_counter.py
+#
+# Per-request SQL statement counter.
+# A context variable holds a counter for the current request; an engine
+# event bumps it for every statement executed. Sync routes run in the
+# threadpool with a copy of the request context, so their queries are
+# counted too.
+# query_budget(n) caps the statements of a route (or any block) so N+1
+# patterns fail loudly: QUERY_BUDGET_MODE=raise in tests, warn in dev.
+
+import contextvars
+import functools
+import time
+
+from sqlalchemy import event
+
+from utils.config import QUERY_BUDGET_MODE
+
+_counter = contextvars.ContextVar("query_counter", default=None)
+_installed = set()
+
+
+class _Count:
+    __slots__ = ("n",)
+
+    def __init__(self):
+        self.n = 0
+
+
+def install(engine):
+    """Count statements run on `engine` (idempotent)."""
+    if id(engine) in _installed:
+        return
+    _installed.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        current = _counter.get()
+        if current is not None:
+            current.n += 1
+
+
+def start() -> contextvars.Token:
+    return _counter.set(_Count())
+
+
+def current() -> int:
+    c = _counter.get()
+    return c.n if c is not None else 0
+
+
+def stop(token: contextvars.Token):
+    _counter.reset(token)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class query_budget:
+    """
+    At most `limit` statements inside the block / decorated function.
+
+        @router.get("/teachers")
+        @query_budget(2)
+        def list_teachers(...): ...
+
+        with query_budget(3, "report page", mode="raise"):
+            ...
+
+    Statements count towards the enclosing counter (X-Query-Count) too.
+    Route dependencies run outside the decorated function and are not
+    counted. mode defaults to QUERY_BUDGET_MODE; "off" costs nothing.
+    """
+
+    def __init__(self, limit: int, label: str = None, mode: str = None):
+        self.limit = limit
+        self.label = label
+        self.mode = mode or QUERY_BUDGET_MODE
+        self._tokens = []
+
+    def __enter__(self):
+        if self.mode != "off":
+            self._tokens.append(_counter.set(_Count()))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.mode == "off":
+            return False
+        used = current()
+        token = self._tokens.pop()
+        _counter.reset(token)
+        parent = _counter.get()
+        if parent is not None:
+            parent.n += used
+
+        if used > self.limit and exc_type is None:
+            message = f"{self.label or 'block'} ran {used} SQL statements (budget {self.limit})"
+            if self.mode == "raise":
+                raise QueryBudgetExceeded(message)
+            print(f"⚠️ {message}")
+        return False
+
+    def __call__(self, func):
+        if self.mode == "off":
+            return func
+        label = self.label or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with query_budget(self.limit, label, self.mode):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class QueryCountMiddleware:
+    """ASGI middleware adding X-Query-Count and X-Response-Time-Ms headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = start()
+        started = time.perf_counter()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(current()).encode()))
+                headers.append((b"x-response-time-ms", f"{elapsed_ms:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            stop(token)
@@ -5,6 +5,7 @@ function AdminDashboard({ admin, onLogout }) {
   const [students, setStudents] = useState([]);
   const [teachers, setTeachers] = useState([]);
   const [report, setReport] = useState([]);
+  const [reportCursor, setReportCursor] = useState(null);
   const [reportFilter, setReportFilter] = useState({
     subject: "",
     from_date: "",
@@ -52,12 +53,14 @@ function AdminDashboard({ admin, onLogout }) {
     }
   };
 
-  const loadReport = async () => {
+  // cursor = null loads the first page, otherwise appends the next one
+  const loadReport = async (cursor = null) => {
     try {
       const cleanFilter = {
         subject: reportFilter.subject || undefined,
         from_date: reportFilter.from_date || undefined,
         to_date: reportFilter.to_date || undefined,
+        cursor: cursor || undefined,
       };
 
       const data = await apiFetch(
@@ -67,13 +70,40 @@ function AdminDashboard({ admin, onLogout }) {
           body: JSON.stringify(cleanFilter),
         }
       );
-      setReport(data.records || []);
+      const records = data.records || [];
+      setReport(prev => (cursor ? [...prev, ...records] : records));
+      setReportCursor(data.next_cursor || null);
     } catch (err) {
       console.error(err);
       alert("Failed to load report");
     }
   };
 
+  // Full report as a file (streamed by the server)
+  const exportReport = async (format) => {
+    try {
+      const params = new URLSearchParams({ format });
+      if (reportFilter.subject) params.set("subject", reportFilter.subject);
+      if (reportFilter.from_date) params.set("from_date", reportFilter.from_date);
+      if (reportFilter.to_date) params.set("to_date", reportFilter.to_date);
+
+      const res = await fetch(
+        `http://localhost:5000/admin/attendance/export?${params}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      if (!res.ok) throw new Error(`Export failed (${res.status})`);
+
+      const url = window.URL.createObjectURL(await res.blob());
+      const a = document.createElement("a");
+      a.href = url;
+      a.download = `attendance_report.${format}`;
+      a.click();
+      window.URL.revokeObjectURL(url);
+    } catch (err) {
+      alert(err.message);
+    }
+  };
+
   // ---------- Create student ----------
   const handleCreateStudent = async (e) => {
     e.preventDefault();
@@ -100,6 +130,41 @@ function AdminDashboard({ admin, onLogout }) {
     }
   };
 
+  // ---------- Bulk import (CSV / NDJSON) ----------
+  const handleImport = async (e, kind) => {
+    e.preventDefault();
+    const form = e.target;
+    const file = form.file.files[0];
+    if (!file) return;
+    const format = file.name.toLowerCase().endsWith(".csv") ? "csv" : "ndjson";
+    try {
+      const res = await fetch(
+        `http://localhost:5000/admin/import/${kind}?format=${format}&skip_invalid=${form.skip_invalid.checked}`,
+        {
+          method: "POST",
+          headers: { Authorization: `Bearer ${token}` },
+          body: file,
+        }
+      );
+      const data = await res.json().catch(() => ({}));
+      const result = res.ok ? data : data.detail;
+      if (!result || typeof result !== "object") {
+        throw new Error(data.detail || "Import failed");
+      }
+      const errors = (result.errors || [])
+        .slice(0, 10)
+        .map((err) => `line ${err.line} (${err.usn || "-"}): ${err.error}`);
+      alert(
+        `Imported ${result.inserted} of ${result.rows} rows` +
+          (result.failed ? `, ${result.failed} failed:\n${errors.join("\n")}` : "")
+      );
+      form.reset();
+      if (result.inserted) kind === "students" ? loadStudents() : loadTeachers();
+    } catch (err) {
+      alert(err.message);
+    }
+  };
+
   // ---------- Create teacher ----------
   const handleCreateTeacher = async (e) => {
     e.preventDefault();
@@ -320,7 +385,7 @@ function AdminDashboard({ admin, onLogout }) {
   const [secSection, setSecSection] = useState("");
   const [sectionSlots, setSectionSlots] = useState([]);
 
-  const handleSectionTimetableSubmit = (e) => {
+  const handleSectionTimetableSubmit = async (e) => {
     e.preventDefault();
 
     if (!secDept.trim() || !secYear.trim() || !secSection.trim()) {
@@ -331,27 +396,23 @@ function AdminDashboard({ admin, onLogout }) {
     // Convention: section code like "CSE-3A"
     const sectionCode = `${secDept}-${secYear}${secSection}`;
 
-    const slots = [];
-    // teachers already loaded via /admin/teachers
-    teachers.forEach((t) => {
-      const timetable = t.timetable || {};
-      const ttSlots = (timetable && timetable.slots) || [];
-
-      ttSlots.forEach((s) => {
-        if (s.section === sectionCode) {
-          slots.push({
-            day: s.day,
-            time: s.time,
-            subject: s.subject,
-            section: s.section,
-            teacher_name: t.name,
-            teacher_id: t.teacher_id,
-          });
-        }
+    try {
+      // sorted by day + start time on the server
+      const data = await apiFetch(
+        `http://localhost:5000/admin/timetable/section/${encodeURIComponent(sectionCode)}`
+      );
+      // teacher names from the list already loaded via /admin/teachers
+      const names = {};
+      teachers.forEach((t) => {
+        names[t.teacher_id] = t.name;
       });
-    });
-
-    setSectionSlots(slots);
+      setSectionSlots(
+        (data.slots || []).map((s) => ({ ...s, teacher_name: names[s.teacher_id] }))
+      );
+    } catch (err) {
+      console.error(err);
+      alert("Failed to load section timetable");
+    }
   };
 
   // pre-load lists when opening views
@@ -489,6 +550,25 @@ function AdminDashboard({ admin, onLogout }) {
                 <button className="btn btn-success">Create</button>
               </form>
             </div>
+            <div className="card p-3 mb-3">
+              <h5>Bulk Import (CSV / NDJSON)</h5>
+              <small className="text-muted mb-2">
+                Columns: usn, name, email, department, year, section, password
+              </small>
+              <form onSubmit={(e) => handleImport(e, "students")}>
+                <input
+                  name="file"
+                  type="file"
+                  accept=".csv,.ndjson,.jsonl"
+                  className="form-control mb-2"
+                />
+                <div className="form-check mb-2">
+                  <input name="skip_invalid" type="checkbox" className="form-check-input" />
+                  <label className="form-check-label">Import valid rows even if some are invalid</label>
+                </div>
+                <button className="btn btn-primary">Import</button>
+              </form>
+            </div>
           </div>
 
           <div className="col-md-6">
@@ -543,6 +623,25 @@ function AdminDashboard({ admin, onLogout }) {
                 <button className="btn btn-success">Create</button>
               </form>
             </div>
+            <div className="card p-3 mb-3">
+              <h5>Bulk Import (CSV / NDJSON)</h5>
+              <small className="text-muted mb-2">
+                Columns: teacher_id, name, email, phone_number, qualification, subjects (; separated), password
+              </small>
+              <form onSubmit={(e) => handleImport(e, "teachers")}>
+                <input
+                  name="file"
+                  type="file"
+                  accept=".csv,.ndjson,.jsonl"
+                  className="form-control mb-2"
+                />
+                <div className="form-check mb-2">
+                  <input name="skip_invalid" type="checkbox" className="form-check-input" />
+                  <label className="form-check-label">Import valid rows even if some are invalid</label>
+                </div>
+                <button className="btn btn-primary">Import</button>
+              </form>
+            </div>
           </div>
 
           <div className="col-md-6">
@@ -880,6 +979,14 @@ function AdminDashboard({ admin, onLogout }) {
                 />
                 <button className="btn btn-primary w-100">Load Report</button>
               </form>
+              <div className="d-flex gap-2 mt-2">
+                <button className="btn btn-outline-secondary w-50" onClick={() => exportReport("csv")}>
+                  Export CSV
+                </button>
+                <button className="btn btn-outline-secondary w-50" onClick={() => exportReport("ndjson")}>
+                  Export NDJSON
+                </button>
+              </div>
             </div>
           </div>
 
@@ -918,6 +1025,11 @@ function AdminDashboard({ admin, onLogout }) {
                   </tbody>
                 </table>
               </div>
+              {reportCursor && (
+                <button className="btn btn-sm btn-outline-primary mt-2" onClick={() => loadReport(reportCursor)}>
+                  Load more
+                </button>
+              )}
             </div>
           </div>
         </div>
@@ -3,19 +3,25 @@ import { useState, useEffect } from "react";
 function AttendanceHistory({ user, onBack }) {
   const [records, setRecords] = useState([]);
   const [stats, setStats] = useState({ total: 0, attended: 0, percentage: 0 });
+  const [subjects, setSubjects] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchAttendanceHistory();
   }, []);
 
-  const fetchAttendanceHistory = async () => {
+  // cursor = next_cursor of the previous page (older records); none = first page
+  const fetchAttendanceHistory = async (cursor = null) => {
     try {
       const token = sessionStorage.getItem("token");
+      if (cursor) setLoadingMore(true);
 
       // 🔥 FIXED — use USN instead of NAME
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
       const response = await fetch(
-        `http://localhost:5000/attendance/history/${user.usn}`,
+        `http://localhost:5000/attendance/history/${user.usn}${query}`,
         {
           headers: {
             Authorization: `Bearer ${token}`,
@@ -26,7 +32,11 @@ function AttendanceHistory({ user, onBack }) {
       const data = await response.json();
 
       if (response.ok) {
-        setRecords(data.records || []);
+        setRecords((prev) =>
+          cursor ? [...prev, ...(data.records || [])] : data.records || []
+        );
+        setNextCursor(data.next_cursor || null);
+        setSubjects(data.subjects || []);
 
         const totalRecords = data.total_records || 0;
         const attended = data.attended || 0;
@@ -46,6 +56,7 @@ function AttendanceHistory({ user, onBack }) {
       console.error("Error fetching attendance:", error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -96,6 +107,41 @@ function AttendanceHistory({ user, onBack }) {
         </div>
       </div>
 
+      {/* Per subject */}
+      {subjects.length > 0 && (
+        <div className="card">
+          <h3>By Subject</h3>
+          <div className="table-container">
+            <table className="attendance-table">
+              <thead>
+                <tr>
+                  <th>Subject</th>
+                  <th>Attended</th>
+                  <th>Held</th>
+                  <th>Rate</th>
+                </tr>
+              </thead>
+              <tbody>
+                {subjects.map((s) => (
+                  <tr key={s.subject}>
+                    <td>{s.subject || "N/A"}</td>
+                    <td>{s.attended}</td>
+                    <td>{s.held}</td>
+                    <td
+                      style={{
+                        color: s.percentage >= 75 ? "#28a745" : "#dc3545",
+                      }}
+                    >
+                      {s.percentage.toFixed(2)}%
+                    </td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </div>
+        </div>
+      )}
+
       {/* Table */}
       <div className="card">
         <h3>Attendance Records</h3>
@@ -167,6 +213,15 @@ function AttendanceHistory({ user, onBack }) {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <button
+                onClick={() => fetchAttendanceHistory(nextCursor)}
+                className="btn"
+                disabled={loadingMore}
+              >
+                {loadingMore ? "Loading..." : "Load older records"}
+              </button>
+            )}
           </div>
         )}
       </div>
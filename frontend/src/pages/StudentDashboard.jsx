@@ -11,24 +11,20 @@ function StudentDashboard({ user, onLogout }) {
   const [locationVerified, setLocationVerified] = useState(false);
   const [cameraActive, setCameraActive] = useState(false);
   const videoRef = useRef(null);
+  // Idempotency-Key of the last mark request, reused only for the same body
+  const markKeyRef = useRef({ body: null, key: null });
   const [attendanceMarked, setAttendanceMarked] = useState(false);
   const [markedSessionId, setMarkedSessionId] = useState(null);
   const [loading, setLoading] = useState(false);
   const [showHistory, setShowHistory] = useState(false);
 
   // ============================================================
-  // POLLING FOR SESSION
+  // LIVE SESSION UPDATES (SSE, polling fallback)
   // ============================================================
   useEffect(() => {
     if (showHistory) return;
 
-    const poll = async () => {
-      try {
-        const res = await fetch("http://localhost:5000/qr/active-session");
-        if (!res.ok) return;
-
-        const data = await res.json();
-
+    const applySession = (data) => {
         if (!data.active) {
           setAttendanceActive(false);
           setCurrentSession(null);
@@ -66,14 +62,43 @@ function StudentDashboard({ user, onLogout }) {
           setLocationVerified(false);
           setCameraActive(false);
         }
+    };
+
+    const poll = async () => {
+      try {
+        const res = await fetch(
+          `http://localhost:5000/qr/active-session?section=${encodeURIComponent(user.section)}`
+        );
+        if (!res.ok) return;
+        applySession(await res.json());
       } catch (error) {
         console.log(error);
       }
     };
 
-    poll();
-    const t = setInterval(poll, 2500);
-    return () => clearInterval(t);
+    if (!window.EventSource) {
+      poll();
+      const t = setInterval(poll, 2500);
+      return () => clearInterval(t);
+    }
+
+    const token = sessionStorage.getItem("token");
+    const events = new EventSource(
+      `http://localhost:5000/events/stream?token=${encodeURIComponent(token)}`
+    );
+
+    events.addEventListener("snapshot", (e) => {
+      const data = JSON.parse(e.data);
+      applySession({ active: data.active, section: data.section, ...data.session });
+    });
+    events.addEventListener("session_started", (e) => {
+      applySession({ active: true, ...JSON.parse(e.data) });
+    });
+    events.addEventListener("session_stopped", () => {
+      applySession({ active: false });
+    });
+
+    return () => events.close();
   }, [showHistory, currentSession?.session_id, user.section]);
 
   // ---- QR Verify ----
@@ -126,18 +151,26 @@ function StudentDashboard({ user, onLogout }) {
     try {
       const token = sessionStorage.getItem("token");
 
+      const body = JSON.stringify({
+        session_id: currentSession.session_id,
+        student_id: user.usn,
+        location,
+        face_image: faceImage,
+      });
+      // same key for retries / double taps of this exact request; a new
+      // photo is a new request (the server rejects a key reused with another body)
+      if (markKeyRef.current.body !== body) {
+        markKeyRef.current = { body, key: `mark-${currentSession.session_id}-${user.usn}-${Date.now()}` };
+      }
+
       const res = await fetch("http://localhost:5000/attendance/mark", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,
+          "Idempotency-Key": markKeyRef.current.key,
         },
-        body: JSON.stringify({
-          session_id: currentSession.session_id,
-          student_id: user.usn,
-          location,
-          face_image: faceImage,
-        }),
+        body,
       });
 
       const data = await res.json();
@@ -1,22 +1,41 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 
 function TeacherAttendanceView({ session, onBack }) {
   const [attendanceList, setAttendanceList] = useState([]);
   const [stats, setStats] = useState({ total: 0, present: 0, percentage: 0 });
   const [loading, setLoading] = useState(true);
+  // cursor of the last response: refreshes only fetch new / changed rows
+  const cursorRef = useRef(null);
 
   useEffect(() => {
+    cursorRef.current = null;
+    setAttendanceList([]);
     fetchSessionAttendance();
-    // Refresh every 5 seconds to show live updates
-    const interval = setInterval(fetchSessionAttendance, 5000);
-    return () => clearInterval(interval);
+
+    if (!window.EventSource || !session.section) {
+      // Refresh every 5 seconds to show live updates
+      const interval = setInterval(fetchSessionAttendance, 5000);
+      return () => clearInterval(interval);
+    }
+
+    // Live updates: refetch only when someone in this session is marked
+    const token = sessionStorage.getItem("token");
+    const events = new EventSource(
+      `http://localhost:5000/events/stream?section=${encodeURIComponent(session.section)}&token=${encodeURIComponent(token)}`
+    );
+    events.addEventListener("attendance_marked", (e) => {
+      const data = JSON.parse(e.data);
+      if (data.session_id === session.session_id) fetchSessionAttendance();
+    });
+    return () => events.close();
   }, [session]);
 
   const fetchSessionAttendance = async () => {
     try {
-      const token = localStorage.getItem("token");
+      const token = sessionStorage.getItem("token");
       
-      const response = await fetch(`http://localhost:5000/attendance/session/${session.session_id}`, {
+      const since = cursorRef.current !== null ? `?since=${encodeURIComponent(cursorRef.current)}` : "";
+      const response = await fetch(`http://localhost:5000/attendance/session/${session.session_id}${since}`, {
         headers: {
           "Authorization": `Bearer ${token}`
         }
@@ -25,7 +44,19 @@ function TeacherAttendanceView({ session, onBack }) {
       const data = await response.json();
 
       if (response.ok) {
-        setAttendanceList(data.records || []);
+        const fresh = data.records || [];
+        if (cursorRef.current === null) {
+          setAttendanceList(fresh);
+        } else if (fresh.length) {
+          // refreshes overlap and re-send changed rows: replace by id
+          setAttendanceList(prev => {
+            const byId = new Map(fresh.map(r => [r.id, r]));
+            const updated = prev.map(r => byId.get(r.id) || r);
+            const known = new Set(prev.map(r => r.id));
+            return [...updated, ...fresh.filter(r => !known.has(r.id))];
+          });
+        }
+        cursorRef.current = data.cursor ?? cursorRef.current;
         setStats({
           total: data.total_students || 0,
           present: data.present_count || 0,
@@ -70,8 +70,9 @@ function TeacherOverride({ teacher, onClose }) {
   // ------------------------------------------------
   // Manual Attendance Override
   // ------------------------------------------------
-  const handleOverride = async () => {
-    if (!subject || selected.length === 0) {
+  // allExcept: mark the whole section except the selected students
+  const handleOverride = async (allExcept = false) => {
+    if (!subject || (!allExcept && selected.length === 0)) {
       alert("⚠️ Select subject and at least one student!");
       return;
     }
@@ -81,23 +82,28 @@ function TeacherOverride({ teacher, onClose }) {
     try {
       const token = sessionStorage.getItem("token");
 
+      const body = allExcept
+        ? { subject, section: teacher.section, all_except: selected, classroom_id: 1 }
+        : { usns: selected, subject, classroom_id: 1 };
+
       const res = await fetch("http://localhost:5000/teacher/mark", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,
         },
-        body: JSON.stringify({
-          usns: selected,
-          subject,
-          classroom_id: 1,
-        }),
+        body: JSON.stringify(body),
       });
 
       const data = await res.json();
 
       if (res.ok) {
-        setSuccessMsg(`Attendance overridden for: ${selected.join(", ")}`);
+        const counts = data.counts || {};
+        setSuccessMsg(
+          `Marked ${counts.marked || 0}, already present ${
+            counts.already_present || 0
+          }, unknown ${counts.unknown || 0}`
+        );
         setSelected([]);
 
         setTimeout(() => setSuccessMsg(""), 3000);
@@ -233,7 +239,7 @@ function TeacherOverride({ teacher, onClose }) {
           }}
         >
           <button
-            onClick={handleOverride}
+            onClick={() => handleOverride(false)}
             disabled={loading}
             style={{
               padding: "10px 20px",
@@ -247,6 +253,21 @@ function TeacherOverride({ teacher, onClose }) {
             {loading ? "Marking..." : "✅ Mark Selected Present"}
           </button>
 
+          <button
+            onClick={() => handleOverride(true)}
+            disabled={loading}
+            style={{
+              padding: "10px 20px",
+              borderRadius: "5px",
+              border: "none",
+              backgroundColor: "#17a2b8",
+              color: "white",
+              fontWeight: "bold",
+            }}
+          >
+            {loading ? "Marking..." : "✅ All Present Except Selected"}
+          </button>
+
           <button
             onClick={onClose}
             style={{